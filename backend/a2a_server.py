@@ -4,13 +4,16 @@ Hosts the LangGraph-based agent over A2A protocol
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 import uvicorn
 import asyncio
+import json
 
-from agents.langgraph_agent import LangGraphA2AAgent
+from agents.langgraph_agent import LangGraphA2AAgent, PROFILES
 from agents.a2a_protocol import A2AMessage
+from agents.trace_store import trace_store
 from config import get_settings
 
 settings = get_settings()
@@ -37,6 +40,9 @@ class ProcessRequest(BaseModel):
     description: str
     context: Optional[Dict[str, Any]] = None
     session_id: Optional[str] = "default"
+    profile: Optional[str] = None  # fast | standard | deep
+    run_id: Optional[str] = None  # Resume a failed run with the same id from its checkpoint
+    trace: Optional[str] = None  # none | summary | full (default: answer only)
 
 @app.get("/health")
 async def health_check():
@@ -60,7 +66,9 @@ async def get_capabilities():
             "reflection"
         ],
         "protocol": "A2A",
-        "graph_type": "LangGraph"
+        "graph_type": "LangGraph",
+        "profiles": list(PROFILES),
+        "default_profile": langgraph_agent.profile
     }
 
 @app.post("/a2a/message")
@@ -78,37 +86,94 @@ async def receive_a2a_message(message: A2AMessage):
         # Process through LangGraph agent
         result = await langgraph_agent.process_message(
             message=task_description,
-            context=context
+            context=context,
+            profile=message.content.get("profile"),
+            run_id=message.content.get("run_id"),
+            trace=message.content.get("trace")
         )
         
         # Return A2A formatted response
-        return {
-            "sender": langgraph_agent.agent_name,
-            "receiver": message.sender,
-            "message_type": "response",
-            "session_id": message.session_id,
-            "content": {
-                "status": "success",
-                "response": result["response"],
-                "agent": result["agent_name"]
-            },
-            "metadata": {
-                "processed_with": "LangGraph",
-                "workflow_completed": True
-            }
-        }
+        return success_response(message, result["response"], result["agent_name"], result.get("trace"))
         
     except Exception as e:
-        return {
-            "sender": langgraph_agent.agent_name,
-            "receiver": message.sender,
-            "message_type": "response",
-            "session_id": message.session_id,
-            "content": {
-                "status": "error",
-                "error": str(e)
-            }
+        return error_response(message, e)
+
+@app.post("/a2a/message/stream")
+async def stream_a2a_message(message: A2AMessage):
+    """
+    Process an A2A message, streaming progress as NDJSON
+
+    One JSON object per line: ``node`` events as graph nodes finish, ``token``
+    events while the final answer is generated, then a ``final`` event holding
+    the same A2A response ``/a2a/message`` returns (or an ``error`` event).
+    """
+    
+    task_description = message.content.get("description", "")
+    context = message.content.get("context", {})
+    
+    if not task_description:
+        raise HTTPException(status_code=400, detail="No task description provided")
+    
+    async def events():
+        try:
+            async for event in langgraph_agent.stream_message(
+                message=task_description, context=context,
+                profile=message.content.get("profile"), run_id=message.content.get("run_id"),
+                trace=message.content.get("trace")
+            ):
+                if event["event"] == "final":
+                    event = {
+                        "event": "final",
+                        "message": success_response(
+                            message, event["response"], event["agent_name"], event.get("trace")
+                        )
+                    }
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "message": error_response(message, e)}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def success_response(message: A2AMessage, response: str, agent_name: str,
+                     trace: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """A2A response carrying the agent's answer (and the requested trace, or its id)"""
+    return {
+        "sender": langgraph_agent.agent_name,
+        "receiver": message.sender,
+        "message_type": "response",
+        "session_id": message.session_id,
+        "content": {
+            "status": "success",
+            "response": response,
+            "agent": agent_name,
+            **trace_store.shape(trace)
+        },
+        "metadata": {
+            "processed_with": "LangGraph",
+            "workflow_completed": True
         }
+    }
+
+def error_response(message: A2AMessage, error: Exception) -> Dict[str, Any]:
+    """A2A response reporting a processing error"""
+    return {
+        "sender": langgraph_agent.agent_name,
+        "receiver": message.sender,
+        "message_type": "response",
+        "session_id": message.session_id,
+        "content": {
+            "status": "error",
+            "error": str(error)
+        }
+    }
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Trace of a run that was too large to return inline"""
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found or expired")
+    return trace
 
 @app.post("/process")
 async def process_direct(request: ProcessRequest):
@@ -117,13 +182,18 @@ async def process_direct(request: ProcessRequest):
     try:
         result = await langgraph_agent.process_message(
             message=request.description,
-            context=request.context
+            context=request.context,
+            profile=request.profile,
+            run_id=request.run_id,
+            trace=request.trace
         )
         
+        trace = result.pop("trace", None)
+        
         return {
             "status": "success",
             "session_id": request.session_id,
-            "result": result
+            "result": {**result, **trace_store.shape(trace)}
         }
         
     except Exception as e:
@@ -4,9 +4,10 @@ Handles communication between agents using A2A protocol
 """
 import httpx
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 from pydantic import BaseModel
 import json
+from services.http_client_manager import get_http_client_manager
 
 class A2AMessage(BaseModel):
     """A2A Protocol Message Format"""
@@ -23,7 +24,11 @@ class A2AProtocolHandler:
     def __init__(self, agent_id: str, endpoint: str):
         self.agent_id = agent_id
         self.endpoint = endpoint
-        self.client = httpx.AsyncClient(timeout=60.0)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client shared by every handler talking to this endpoint"""
+        return get_http_client_manager().get_client(self.endpoint)
     
     async def send_message(self, 
                           receiver: str, 
@@ -54,6 +59,44 @@ class A2AProtocolHandler:
                 "status": "failed"
             }
     
+    async def stream_message(self,
+                             receiver: str,
+                             content: Dict[str, Any],
+                             session_id: str,
+                             message_type: str = "request") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send a message to the agent's streaming endpoint and yield its events
+
+        The last event is ``final`` or ``error`` and carries the A2A response
+        under ``message``; transport failures end the stream with an ``error``
+        event whose message has ``status: failed``, like ``send_message``.
+        """
+        
+        message = A2AMessage(
+            sender=self.agent_id,
+            receiver=receiver,
+            message_type=message_type,
+            content=content,
+            session_id=session_id
+        )
+        
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{self.endpoint}/a2a/message/stream",
+                json=message.dict(),
+                headers={"Content-Type": "application/json", "Accept": "application/x-ndjson"}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            yield {
+                "event": "error",
+                "message": {"error": str(e), "status": "failed"}
+            }
+    
     async def receive_message(self, message: A2AMessage) -> Dict[str, Any]:
         """Process an incoming A2A message"""
         # This will be implemented by each agent
@@ -81,6 +124,10 @@ class A2AProtocolHandler:
         }
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """
+        Release the handler
+
+        The underlying connections belong to the process-wide client manager and
+        are closed on application shutdown, not per handler.
+        """
 
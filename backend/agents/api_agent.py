@@ -4,8 +4,8 @@ This agent is accessible through REST API and performs specific tasks
 """
 import httpx
 from typing import Dict, Any
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage
+from services.llm_gateway import get_llm_gateway
 from config import get_settings
 
 settings = get_settings()
@@ -18,11 +18,7 @@ class APIAgent:
     
     def __init__(self, agent_name: str = "DataAnalyzer"):
         self.agent_name = agent_name
-        self.llm = ChatGroq(
-            temperature=0.3,
-            model="llama-3.3-70b-versatile",
-            groq_api_key=settings.groq_api_key
-        )
+        self.llm = get_llm_gateway().bind(temperature=0.3)
         self.capabilities = [
             "data_analysis",
             "text_processing",
@@ -71,7 +67,7 @@ class APIAgent:
         Provide a detailed analysis with insights and recommendations.
         """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
         
         return {
             "status": "success",
@@ -90,7 +86,7 @@ class APIAgent:
         Instructions: {instructions}
         """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
         
         return {
             "status": "success",
@@ -107,7 +103,7 @@ class APIAgent:
         {text}
         """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
         
         return {
             "status": "success",
@@ -124,7 +120,7 @@ class APIAgent:
         {data}
         """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
         
         return {
             "status": "success",
@@ -145,7 +141,7 @@ class APIAgent:
         Keep your response short and to the point.
         """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
         
         return {
             "status": "success",
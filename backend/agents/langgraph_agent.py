@@ -2,68 +2,126 @@
 LangGraph-based Agent for A2A Server
 This agent uses LangGraph to create a stateful, multi-step reasoning agent
 """
-from typing import TypedDict, Annotated, Sequence
-from langchain_groq import ChatGroq
+from typing import TypedDict, Annotated, Sequence, AsyncIterator, Dict, Any, List, Optional, Tuple, Union
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send, StreamWriter
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+import json
 import operator
+import re
+from services.llm_gateway import get_llm_gateway
+from agents.run_checkpoints import get_run_checkpoints
 from config import get_settings
 
 settings = get_settings()
 
+# Workflow depths: fast merges analyze+plan and execute+finalize (2 LLM calls),
+# standard runs every node once, deep may repeat execute up to a budget
+PROFILES = ("fast", "standard", "deep")
+
+# Run detail returned with an answer: none (answer only), summary (excerpts), full
+TRACE_LEVELS = ("none", "summary", "full")
+
+# Node that runs one sub-task of a fanned-out execute stage
+SUBTASK_NODE = "execute_subtask"
+
+JSON_ARRAY = re.compile(r"\[[^\[\]]*\]", re.DOTALL)
+
 # Define the agent state
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     next_step: str
     task_context: dict
-    intermediate_results: list
+    # Appended to by parallel sub-task branches, so nodes return only new results
+    intermediate_results: Annotated[list, operator.add]
+    max_iterations: int
+
+class SubtaskState(TypedDict):
+    original_task: str
+    plan: str
+    subtask: str
 
 class LangGraphA2AAgent:
     """
     A sophisticated agent built with LangGraph for A2A protocol
     """
     
-    def __init__(self, agent_name: str = "ResearchAgent"):
+    def __init__(self, agent_name: str = "ResearchAgent", profile: str = None):
         self.agent_name = agent_name
-        self.llm = ChatGroq(
-            temperature=0.7,
-            model="llama-3.3-70b-versatile",
-            groq_api_key=settings.groq_api_key
-        )
-        self.graph = self._build_graph()
-        
-    def _build_graph(self) -> StateGraph:
+        self.profile = profile or settings.langgraph_profile
+        self.llm = get_llm_gateway().bind(temperature=0.7)
+        self._graphs: Dict[str, Any] = {}
+        self.graph = self.graph_for(self.profile)
+    
+    def graph_for(self, profile: Optional[str] = None):
+        """Compiled graph of a profile (the agent's default if None), built once"""
+        
+        profile = profile or self.profile
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown workflow profile '{profile}' (expected one of {', '.join(PROFILES)})")
+        if profile not in self._graphs:
+            self._graphs[profile] = self._build_graph(profile)
+        return self._graphs[profile]
+        
+    def _build_graph(self, profile: str = "standard") -> StateGraph:
         """Build the LangGraph workflow"""
         
         # Create the graph
         workflow = StateGraph(AgentState)
         
+        if profile == "fast":
+            workflow.add_node("analyze_plan", self._analyze_and_plan)
+            workflow.add_node("execute_finalize", self._execute_and_finalize)
+            self._set_entry_point(workflow, "analyze_plan")
+            workflow.add_edge("analyze_plan", "execute_finalize")
+            workflow.add_edge("execute_finalize", END)
+            return workflow.compile()
+        
         # Add nodes
         workflow.add_node("analyze", self._analyze_task)
         workflow.add_node("plan", self._plan_execution)
         workflow.add_node("execute", self._execute_task)
+        workflow.add_node(SUBTASK_NODE, self._execute_subtask)
+        workflow.add_node("merge", self._merge_results)
         workflow.add_node("reflect", self._reflect_on_results)
         workflow.add_node("finalize", self._finalize_response)
         
         # Add edges
-        workflow.set_entry_point("analyze")
+        self._set_entry_point(workflow, "analyze")
         
         workflow.add_edge("analyze", "plan")
-        workflow.add_edge("plan", "execute")
-        workflow.add_conditional_edges(
-            "execute",
-            self._should_continue,
-            {
-                "continue": "execute",
-                "reflect": "reflect"
-            }
-        )
+        # Independent sub-tasks run as parallel branches, then merge
+        workflow.add_conditional_edges("plan", self._fan_out, ["execute", SUBTASK_NODE])
+        workflow.add_edge(SUBTASK_NODE, "merge")
+        for node in ("execute", "merge"):
+            workflow.add_conditional_edges(
+                node,
+                self._should_continue,
+                {
+                    "continue": "execute",
+                    "reflect": "reflect"
+                }
+            )
         workflow.add_edge("reflect", "finalize")
         workflow.add_edge("finalize", END)
         
         return workflow.compile()
     
-    def _analyze_task(self, state: AgentState) -> AgentState:
+    def _set_entry_point(self, workflow: StateGraph, first: str):
+        """Start at ``first``, or at the state's ``next_step`` when resuming a checkpoint"""
+        nodes = list(workflow.nodes)
+        
+        def entry(state: AgentState):
+            step = state.get("next_step")
+            if step not in nodes:
+                return first
+            if step == "execute" and SUBTASK_NODE in nodes:
+                return self._fan_out(state)
+            return step
+        
+        workflow.set_conditional_entry_point(entry, {node: node for node in nodes})
+    
+    async def _analyze_task(self, state: AgentState) -> AgentState:
         """Analyze the incoming task"""
         messages = state["messages"]
         last_message = messages[-1]
@@ -77,7 +135,7 @@ class LangGraphA2AAgent:
         Task: {last_message.content}
         """
         
-        response = self.llm.invoke([HumanMessage(content=analysis_prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=analysis_prompt)])
         
         return {
             "messages": [AIMessage(content=f"Analysis: {response.content}")],
@@ -85,7 +143,7 @@ class LangGraphA2AAgent:
             "next_step": "plan"
         }
     
-    def _plan_execution(self, state: AgentState) -> AgentState:
+    async def _plan_execution(self, state: AgentState) -> AgentState:
         """Create an execution plan"""
         task_context = state.get("task_context", {})
         analysis = task_context.get("analysis", "")
@@ -99,10 +157,17 @@ class LangGraphA2AAgent:
         2. Expected outcomes for each step
         3. Dependencies between steps
         """
+        if settings.langgraph_max_subtasks > 1:
+            planning_prompt += f"""
+        Finally, if the work splits into independent parts that can be done in
+        parallel, end with a JSON array (at most {settings.langgraph_max_subtasks}
+        strings) describing each part; otherwise end with [].
+        """
         
-        response = self.llm.invoke([HumanMessage(content=planning_prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=planning_prompt)])
         
         task_context["plan"] = response.content
+        task_context["subtasks"] = self._parse_subtasks(response.content)
         
         return {
             "messages": [AIMessage(content=f"Plan: {response.content}")],
@@ -110,41 +175,131 @@ class LangGraphA2AAgent:
             "next_step": "execute"
         }
     
-    def _execute_task(self, state: AgentState) -> AgentState:
+    async def _execute_task(self, state: AgentState) -> AgentState:
         """Execute the planned task"""
-        task_context = state.get("task_context", {})
+        task_context = dict(state.get("task_context", {}))
         plan = task_context.get("plan", "")
         messages = state["messages"]
         original_task = messages[0].content
         
+        intermediate_results = state.get("intermediate_results", [])
+        
         execution_prompt = f"""
         Original Task: {original_task}
         Plan: {plan}
         
         Now execute this task and provide detailed results.
         """
+        if intermediate_results:
+            # Another pass (deep profile): extend the earlier work rather than repeat it
+            execution_prompt += f"""
+        Results so far: {intermediate_results}
         
-        response = self.llm.invoke([HumanMessage(content=execution_prompt)])
+        Fill gaps, verify claims and go deeper where it matters. If nothing
+        meaningful is left to add, reply with just DONE.
+        """
         
-        intermediate_results = state.get("intermediate_results", [])
-        intermediate_results.append(response.content)
+        response = await self.llm.ainvoke([HumanMessage(content=execution_prompt)])
+        
+        task_context["execution_passes"] = task_context.get("execution_passes", 0) + 1
+        
+        if intermediate_results and response.content.strip().rstrip(".").upper() == "DONE":
+            task_context["execution_complete"] = True
+            return {
+                "messages": [AIMessage(content="Execution: complete")],
+                "task_context": task_context,
+                "next_step": "reflect"
+            }
         
         return {
             "messages": [AIMessage(content=f"Execution: {response.content}")],
-            "intermediate_results": intermediate_results,
-            "next_step": "reflect"
+            "intermediate_results": [response.content],
+            "task_context": task_context,
+            "next_step": self._after_execution({**state, "task_context": task_context})
         }
     
+    def _fan_out(self, state: AgentState) -> Union[str, List[Send]]:
+        """One parallel branch per planned sub-task, or the single execute node"""
+        task_context = state.get("task_context", {})
+        subtasks = task_context.get("subtasks") or []
+        
+        # Later (deep) passes work over the merged results as a whole
+        if len(subtasks) < 2 or task_context.get("execution_passes"):
+            return "execute"
+        
+        original_task = state["messages"][0].content
+        return [
+            Send(SUBTASK_NODE, {
+                "original_task": original_task,
+                "plan": task_context.get("plan", ""),
+                "subtask": subtask
+            })
+            for subtask in subtasks
+        ]
+    
+    async def _execute_subtask(self, state: SubtaskState) -> Dict[str, Any]:
+        """Execute one independent part of the plan (runs in parallel with its siblings)"""
+        
+        execution_prompt = f"""
+        Original Task: {state["original_task"]}
+        Plan: {state["plan"]}
+        
+        Your part: {state["subtask"]}
+        
+        Execute only your part and provide detailed results.
+        """
+        
+        response = await self.llm.ainvoke([HumanMessage(content=execution_prompt)])
+        
+        return {"intermediate_results": [f"{state['subtask']}:\n{response.content}"]}
+    
+    async def _merge_results(self, state: AgentState) -> AgentState:
+        """Reduce the sub-task results into one execution pass"""
+        task_context = dict(state.get("task_context", {}))
+        task_context["execution_passes"] = task_context.get("execution_passes", 0) + 1
+        
+        merged = "\n\n".join(state.get("intermediate_results", []))
+        
+        return {
+            "messages": [AIMessage(content=f"Execution: {merged}")],
+            "task_context": task_context,
+            "next_step": self._after_execution({**state, "task_context": task_context})
+        }
+    
+    def _after_execution(self, state: AgentState) -> str:
+        return "execute" if self._should_continue(state) == "continue" else "reflect"
+    
     def _should_continue(self, state: AgentState) -> str:
         """Decide if we need more execution or can move to reflection"""
-        intermediate_results = state.get("intermediate_results", [])
+        task_context = state.get("task_context", {})
         
-        # Simple logic: if we have results, move to reflection
-        if len(intermediate_results) > 0:
+        # Execute passes until the profile's budget is spent or the model has nothing to add
+        if task_context.get("execution_complete"):
+            return "reflect"
+        if task_context.get("execution_passes", 0) >= max(1, state.get("max_iterations", 1)):
             return "reflect"
         return "continue"
     
-    def _reflect_on_results(self, state: AgentState) -> AgentState:
+    @staticmethod
+    def _parse_subtasks(plan: str) -> List[str]:
+        """The plan's trailing JSON array of independent parts, capped at langgraph_max_subtasks"""
+        
+        for candidate in reversed(JSON_ARRAY.findall(plan)):
+            try:
+                parts = json.loads(candidate)
+            except ValueError:
+                continue
+            if not isinstance(parts, list) or not all(isinstance(part, str) for part in parts):
+                continue
+            subtasks = [part.strip() for part in parts if part.strip()]
+            limit = max(1, settings.langgraph_max_subtasks)
+            if len(subtasks) > limit:
+                # Fold the overflow into the last branch rather than drop it
+                subtasks = subtasks[:limit - 1] + ["; ".join(subtasks[limit - 1:])]
+            return subtasks
+        return []
+    
+    async def _reflect_on_results(self, state: AgentState) -> AgentState:
         """Reflect on the execution results"""
         intermediate_results = state.get("intermediate_results", [])
         
@@ -158,7 +313,7 @@ class LangGraphA2AAgent:
         3. Any issues or improvements needed
         """
         
-        response = self.llm.invoke([HumanMessage(content=reflection_prompt)])
+        response = await self.llm.ainvoke([HumanMessage(content=reflection_prompt)])
         
         return {
             "messages": [AIMessage(content=f"Reflection: {response.content}")],
@@ -166,7 +321,7 @@ class LangGraphA2AAgent:
             "next_step": "finalize"
         }
     
-    def _finalize_response(self, state: AgentState) -> AgentState:
+    async def _finalize_response(self, state: AgentState, writer: StreamWriter) -> AgentState:
         """Create the final response"""
         messages = state["messages"]
         intermediate_results = state.get("intermediate_results", [])
@@ -177,33 +332,193 @@ class LangGraphA2AAgent:
         Results: {intermediate_results}
         """
         
-        response = self.llm.invoke([HumanMessage(content=final_prompt)])
+        response = await self._stream_response(final_prompt, writer)
         
         return {
-            "messages": [AIMessage(content=response.content)],
+            "messages": [AIMessage(content=response)],
             "task_context": state.get("task_context", {}),
             "next_step": "end"
         }
     
-    async def process_message(self, message: str, context: dict = None) -> dict:
-        """Process an incoming message through the LangGraph"""
+    async def _analyze_and_plan(self, state: AgentState) -> AgentState:
+        """Analyze the task and plan its execution in one call (fast profile)"""
+        task_context = state.get("task_context", {})
+        last_message = state["messages"][-1]
+        
+        prompt = f"""
+        Task: {last_message.content}
         
-        initial_state = {
+        Briefly state what kind of task this is and what it requires, then give
+        a short step-by-step plan to complete it.
+        """
+        
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        
+        task_context["plan"] = response.content
+        
+        return {
+            "messages": [AIMessage(content=f"Plan: {response.content}")],
+            "task_context": task_context,
+            "next_step": "execute_finalize"
+        }
+    
+    async def _execute_and_finalize(self, state: AgentState, writer: StreamWriter) -> AgentState:
+        """Carry out the plan and write the final response in one call (fast profile)"""
+        task_context = state.get("task_context", {})
+        original_task = state["messages"][0].content
+        
+        prompt = f"""
+        Original Task: {original_task}
+        Plan: {task_context.get("plan", "")}
+        
+        Execute this plan and reply with the final, complete response to the task.
+        """
+        
+        response = await self._stream_response(prompt, writer)
+        
+        return {
+            "messages": [AIMessage(content=response)],
+            "intermediate_results": [response],
+            "task_context": task_context,
+            "next_step": "end"
+        }
+    
+    async def _stream_response(self, prompt: str, writer: StreamWriter) -> str:
+        """Generate the answer, streaming its tokens to ``stream_message`` callers"""
+        parts = []
+        async for token in self.llm.astream([HumanMessage(content=prompt)]):
+            parts.append(token)
+            writer({"event": "token", "content": token})
+        return "".join(parts)
+    
+    @staticmethod
+    def _initial_state(message: str, context: dict = None, profile: str = "standard") -> AgentState:
+        return {
             "messages": [HumanMessage(content=message)],
             "next_step": "analyze",
-            "task_context": context or {},
-            "intermediate_results": []
+            "task_context": dict(context or {}),
+            "intermediate_results": [],
+            "max_iterations": settings.langgraph_deep_max_iterations if profile == "deep" else 1
+        }
+    
+    async def _run(self, message: str, context: dict, profile: str,
+                   run_id: Optional[str]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run the profile's graph, yielding its ``custom`` and ``updates`` chunks and
+        finally ``("values", final_state)``
+
+        With a ``run_id`` the state is checkpointed after every node and a run
+        that failed part-way continues from its last completed node (a finished
+        run just returns its result again).
+        """
+        
+        store = get_run_checkpoints() if run_id else None
+        state = await store.load(run_id, profile, message) if store else None
+        if state is None:
+            state = self._initial_state(message, context, profile)
+        elif state.get("next_step") != "end":
+            print(f"Resuming run {run_id} at '{state.get('next_step')}'")
+        
+        if state.get("next_step") != "end":
+            completed_node = False
+            async for mode, chunk in self.graph_for(profile).astream(
+                state,
+                {"max_concurrency": settings.langgraph_max_concurrency},
+                stream_mode=["updates", "custom", "values"]
+            ):
+                if mode != "values":
+                    # Sub-task branches are saved with their merge: a checkpoint
+                    # between them could not tell which branches are missing
+                    completed_node = completed_node or (mode == "updates" and SUBTASK_NODE not in chunk)
+                    yield mode, chunk
+                    continue
+                state = chunk
+                if store and completed_node:
+                    await store.save(run_id, profile, message, state)
+                    completed_node = False
+        
+        yield "values", state
+    
+    @staticmethod
+    def _trace_level(trace: Optional[str]) -> str:
+        level = trace or settings.langgraph_trace_default
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"Unknown trace level '{level}' (expected one of {', '.join(TRACE_LEVELS)})")
+        return level
+    
+    @staticmethod
+    def _build_trace(state: AgentState, level: str) -> Optional[Dict[str, Any]]:
+        """What a caller asked to see of the run besides the answer"""
+        
+        if level == "none":
+            return None
+        if level == "summary":
+            limit = settings.langgraph_trace_summary_chars
+            return {
+                "steps": [message.content[:limit] for message in state["messages"][1:-1]],
+                "results": len(state.get("intermediate_results", []))
+            }
+        return {
+            "messages": [{"type": message.type, "content": message.content} for message in state["messages"]],
+            "intermediate_results": state.get("intermediate_results", []),
+            "task_context": state.get("task_context", {})
         }
+    
+    async def process_message(self, message: str, context: dict = None, profile: str = None,
+                              run_id: str = None, trace: str = None) -> dict:
+        """
+        Process an incoming message through the LangGraph
+
+        ``profile`` picks the workflow depth; ``run_id`` makes the run resumable.
+        Only the answer is returned unless ``trace`` asks for a summary or the
+        full run.
+        """
+        
+        profile = profile or self.profile
+        level = self._trace_level(trace)
         
         # Run the graph
-        final_state = self.graph.invoke(initial_state)
+        final_state = None
+        async for mode, chunk in self._run(message, context, profile, run_id):
+            if mode == "values":
+                final_state = chunk
         
         # Extract the final response
         final_message = final_state["messages"][-1].content
         
-        return {
+        result = {
             "response": final_message,
             "agent_name": self.agent_name,
-            "state": final_state
+            "profile": profile
         }
+        if level != "none":
+            result["trace"] = self._build_trace(final_state, level)
+        return result
+    
+    async def stream_message(self, message: str, context: dict = None, profile: str = None,
+                             run_id: str = None, trace: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a message, yielding progress as it happens
 
+        Events: ``{"event": "node", "node": ...}`` when a node finishes,
+        ``{"event": "token", "content": ...}`` for each token of the answer, and a
+        closing ``{"event": "final", "response": ..., "agent_name": ...}`` (with
+        ``trace`` when asked for).
+        """
+        
+        level = self._trace_level(trace)
+        
+        final_state = None
+        async for mode, chunk in self._run(message, context, profile or self.profile, run_id):
+            if mode == "custom":
+                yield chunk
+            elif mode == "updates":
+                for node in chunk:
+                    yield {"event": "node", "node": node}
+            else:
+                final_state = chunk
+        
+        final = {"event": "final", "response": final_state["messages"][-1].content, "agent_name": self.agent_name}
+        if level != "none":
+            final["trace"] = self._build_trace(final_state, level)
+        yield final
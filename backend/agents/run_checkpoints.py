@@ -0,0 +1,107 @@
+"""
+Run Checkpoints Module
+Snapshots of the LangGraph agent's state after each node, keyed by run id, so
+a retried request resumes after the last completed node
+"""
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+import time
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from concurrency import run_blocking
+from config import get_settings
+
+settings = get_settings()
+
+
+class RunCheckpointStore:
+    """
+    sqlite file of agent states keyed by run id, expired after ``ttl`` seconds
+
+    A checkpoint only resumes a run with the same profile and message; anything
+    else starts over (and replaces it).
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.resumed = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS run_checkpoints ("
+                " run_id TEXT PRIMARY KEY, profile TEXT NOT NULL, message TEXT NOT NULL,"
+                " state TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _dump(state: Dict[str, Any]) -> str:
+        return json.dumps(
+            {**state, "messages": messages_to_dict(state.get("messages", []))},
+            default=str
+        )
+
+    @staticmethod
+    def _restore(payload: str) -> Dict[str, Any]:
+        state = json.loads(payload)
+        state["messages"] = messages_from_dict(state.get("messages", []))
+        return state
+
+    def _load_sync(self, run_id: str, profile: str, message: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT profile, message, state, expires_at FROM run_checkpoints WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] < time.time():
+                conn.execute("DELETE FROM run_checkpoints WHERE run_id = ?", (run_id,))
+                return None
+            if row[0] != profile or row[1] != message:
+                return None
+            return self._restore(row[2])
+
+    def _save_sync(self, run_id: str, profile: str, message: str, state: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_checkpoints (run_id, profile, message, state, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, profile, message, state, now + self.ttl)
+            )
+            conn.execute("DELETE FROM run_checkpoints WHERE expires_at < ?", (now,))
+
+    async def load(self, run_id: str, profile: str, message: str) -> Optional[Dict[str, Any]]:
+        state = await run_blocking(self._load_sync, run_id, profile, message)
+        if state is not None:
+            self.resumed += 1
+        return state
+
+    async def save(self, run_id: str, profile: str, message: str, state: Dict[str, Any]):
+        await run_blocking(self._save_sync, run_id, profile, message, self._dump(state))
+
+
+_store: Optional[RunCheckpointStore] = None
+
+
+def get_run_checkpoints() -> Optional[RunCheckpointStore]:
+    """Process-wide checkpoint store, or None when checkpointing is disabled"""
+
+    global _store
+    if not settings.langgraph_checkpoints_enabled:
+        return None
+    if _store is None:
+        _store = RunCheckpointStore(settings.langgraph_checkpoint_path, settings.langgraph_checkpoint_ttl_seconds)
+    return _store
@@ -0,0 +1,53 @@
+"""
+Trace Store Module
+Keeps large run traces on the A2A server so responses can carry a trace id
+instead of the trace itself
+"""
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import json
+import time
+import uuid
+from config import get_settings
+
+settings = get_settings()
+
+
+class TraceStore:
+    """In-memory LRU of traces by id, expired after ``ttl`` seconds"""
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or settings.a2a_trace_store_max_entries
+        self.ttl = ttl if ttl is not None else settings.a2a_trace_ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def put(self, trace: Dict[str, Any]) -> str:
+        trace_id = uuid.uuid4().hex
+        self._entries[trace_id] = (time.monotonic() + self.ttl, trace)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return trace_id
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(trace_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[trace_id]
+            return None
+        self._entries.move_to_end(trace_id)
+        return entry[1]
+
+    def shape(self, trace: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Response fields for a trace: inline when small, otherwise stored and referenced by id"""
+
+        if not trace:
+            return {}
+        size = len(json.dumps(trace, default=str))
+        if size <= settings.a2a_trace_inline_max_bytes:
+            return {"trace": trace}
+        return {"trace_id": self.put(trace), "trace_bytes": size}
+
+
+# Global trace store
+trace_store = TraceStore()
@@ -0,0 +1,42 @@
+"""
+Blocking Call Helpers
+Runs the remaining synchronous calls (sync SDKs, sqlite3, CPU-heavy parsing)
+on a bounded thread pool so they never stall the event loop
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import functools
+from config import get_settings
+
+settings = get_settings()
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_blocking_pool() -> ThreadPoolExecutor:
+    """Process-wide pool shared by all blocking calls"""
+
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.blocking_pool_size,
+            thread_name_prefix="blocking"
+        )
+    return _pool
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await ``func(*args, **kwargs)`` run on the bounded pool"""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_pool(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_blocking_pool():
+    """Stop the pool (on application shutdown)"""
+
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./agent_orchestrator.db"
@@ -13,6 +14,110 @@ class Settings(BaseSettings):
     adobe_agentic_builder_url: str = "https://agentic-builder-dev.corp.adobe.com"
     allow_iframe_embedding: bool = True
     
+    # Task Execution
+    max_parallel_steps: int = 4
+    step_failure_policy: str = "fail_fast"  # fail_fast | continue_on_error
+    step_context_mode: str = "dependencies"  # dependencies | full
+    step_context_max_chars_per_output: int = 0  # 0 = no limit
+    step_context_max_total_chars: int = 0  # 0 = no limit
+    batch_planning_concurrency: int = 4
+    batch_max_tasks: int = 500
+    plan_cache_enabled: bool = True
+    plan_cache_ttl_seconds: float = 600.0
+    plan_cache_max_entries: int = 1000
+    plan_repair_max_retries: int = 1  # Re-prompts when the planner returns an unusable plan
+    plan_batching_enabled: bool = False  # Plan tasks submitted together in one LLM request
+    plan_batch_window_ms: float = 20.0
+    plan_batch_max_size: int = 8
+    plan_streaming: bool = False  # Stream plans and start ready steps early (runs them in the API process)
+    planner_agent_top_k: int = 10  # Agents shortlisted into the planning prompt (0 = all)
+    fast_path_enabled: bool = True  # Plan trivial tasks locally, without the planning LLM
+    fast_path_min_confidence: float = 0.85
+    fast_path_classifier: str = ""  # Optional "module:function" consulted when the rules have no opinion
+    
+    # Agent performance stats (planner routing hints and plan rebalancing)
+    agent_stats_window: int = 200  # Recent calls kept per agent
+    agent_stats_min_samples: int = 5
+    agent_stats_history_steps: int = 2000  # Finished steps loaded from the database
+    agent_stats_refresh_seconds: float = 60.0
+    agent_rebalance_enabled: bool = True
+    agent_rebalance_min_improvement: float = 0.3  # Required drop in expected latency to swap agents
+    
+    # LangGraph agent workflow (a2a_server.py)
+    langgraph_profile: str = "standard"  # fast | standard | deep, for requests that name none
+    langgraph_deep_max_iterations: int = 3  # Execute passes allowed by the deep profile
+    langgraph_max_subtasks: int = 4  # Parallel execute branches per plan (1 = no fan-out)
+    langgraph_max_concurrency: int = 4  # Graph nodes (sub-task branches) running at once per request
+    langgraph_profile_by_complexity: Dict[str, str] = {"low": "fast", "medium": "fast", "high": "standard"}
+    langgraph_checkpoints_enabled: bool = True  # Resume runs with a known run_id after the last completed node
+    langgraph_checkpoint_path: str = "./data/langgraph_checkpoints.db"
+    langgraph_checkpoint_ttl_seconds: float = 3600.0
+    langgraph_trace_default: str = "none"  # none | summary | full: trace detail returned with an answer
+    langgraph_trace_summary_chars: int = 200  # Per-message excerpt length of summary traces
+    a2a_trace_inline_max_bytes: int = 8192  # Larger traces stay on the server, fetched via /traces/{id}
+    a2a_trace_store_max_entries: int = 200
+    a2a_trace_ttl_seconds: float = 3600.0
+    
+    # Outbound HTTP (pooled per agent host)
+    http_max_connections_per_host: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_request_timeout: float = 60.0
+    http2_enabled: bool = True
+    http_max_pooled_origins: int = 64  # Least recently used agent hosts beyond this are closed
+    
+    # Thread pool for remaining blocking calls (sync SDKs, sqlite3)
+    blocking_pool_size: int = 8
+    
+    # LLM gateway (limits are per process)
+    llm_model: str = "llama-3.3-70b-versatile"
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 12000
+    llm_max_concurrency: int = 8
+    llm_max_retries: int = 3
+    llm_retry_backoff_seconds: float = 2.0
+    llm_default_output_tokens: int = 1024
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./data/llm_cache.db"
+    llm_cache_max_temperature: float = 0.2
+    llm_cache_ttl_seconds: float = 86400.0
+    
+    # Task Queue / Workers
+    task_execution_mode: str = "queue"  # queue (task_worker.py) | inline (in the API process)
+    task_queue_lease_seconds: float = 60.0
+    task_queue_poll_interval: float = 1.0
+    task_queue_max_attempts: int = 3
+    task_queue_retry_backoff_seconds: float = 5.0
+    task_queue_use_redis: bool = False  # Wake workers and relay task events through redis_url
+    task_cancel_poll_interval: float = 1.0  # How often workers check for cancel requests
+    task_stream_poll_seconds: float = 2.0  # DB check interval of /api/tasks/{id}/stream without live events
+    worker_heartbeat_interval: float = 5.0
+    
+    # Per-agent admission control (overridable in Agent.config)
+    agent_max_concurrency: int = 8
+    agent_max_queue: int = 100
+    agent_max_wait_seconds: float = 30.0
+    agent_adaptive_concurrency: bool = False
+    agent_target_latency_seconds: float = 10.0
+    agent_max_concurrency_limit: int = 64
+    
+    # Circuit breakers and hedged requests (per agent endpoint)
+    circuit_failure_threshold: int = 5  # Failures among the last circuit_window_size calls
+    circuit_window_size: int = 20
+    circuit_reset_seconds: float = 30.0  # Open time before a half-open probe
+    circuit_half_open_max_calls: int = 1
+    hedge_min_samples: int = 20  # Latency samples needed before hedging kicks in
+    hedge_percentile: float = 0.95
+    
+    # Step result cache (only for agents with "cacheable": true in Agent.config)
+    step_cache_backend: str = "none"  # none | memory | sqlite | redis
+    step_cache_ttl_seconds: float = 3600.0
+    step_cache_max_entries: int = 10000
+    step_cache_path: str = "./data/step_cache.db"
+    worker_processes: int = 2
+    worker_concurrency: int = 4
+    
     class Config:
         env_file = ".env"
 
@@ -4,23 +4,40 @@ Multi-Agent Orchestrator with A2A Protocol Support
 """
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from fastapi.responses import Response, StreamingResponse
+from contextlib import asynccontextmanager
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
+import asyncio
+import json
 import uvicorn
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from database import get_db, engine, Base
+from database import get_async_db, engine, Base, AsyncSessionLocal
 from models.agent import Agent, AgentType, AgentStatus
 from models.task import Task, TaskStep, TaskStatus
 from models.memory import ConversationContext, Message
 from models.agent_config_template import AgentConfigTemplate  # Import for table creation
+from models.task_queue import TaskQueueItem  # Import for table creation
+from models.workflow import Workflow
 from services.agent_registry import AgentRegistry
 from services.memory_service import MemoryService
 from orchestrator.task_planner import TaskPlanner
 from orchestrator.task_executor import TaskExecutor
+from orchestrator.admission import admission_controller, merge_snapshots
+from orchestrator.step_cache import get_step_cache, merge_cache_stats
+from orchestrator.plan_coalescer import get_plan_coalescer
+from orchestrator.agent_stats import agent_stats
+from orchestrator.task_events import task_events
 from agents.a2a_protocol import A2AMessage
+from services.http_client_manager import close_http_clients
+from services.llm_gateway import get_llm_gateway
+from concurrency import shutdown_blocking_pool
+from services.task_queue import TaskQueue, get_queue_notifier
+from services.workflow_service import WorkflowService
+from services.plan_cache import plan_cache
 from config import get_settings
 
 # Create database tables
@@ -28,10 +45,26 @@ Base.metadata.create_all(bind=engine)
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    app.state.queue_notifier = get_queue_notifier()
+    task_events.start_listener()
+    yield
+    # Close pooled keep-alive connections to agents
+    await close_http_clients()
+    if app.state.queue_notifier:
+        await app.state.queue_notifier.close()
+    await task_events.close()
+    if get_step_cache():
+        await get_step_cache().close()
+    shutdown_blocking_pool()
+
 app = FastAPI(
     title="Multi-Agent Orchestrator",
     description="Orchestrate multiple AI agents with A2A protocol support",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - Allow frontend and Adobe Agentic Builder
@@ -86,6 +119,32 @@ class TaskRequest(BaseModel):
     user_id: str
     metadata: Optional[Dict[str, Any]] = None
 
+class BatchTaskItem(BaseModel):
+    description: str
+    session_id: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+class BatchTaskRequest(BaseModel):
+    tasks: List[BatchTaskItem]
+    user_id: str
+    session_id: Optional[str] = None  # Shared by items without their own session
+    metadata: Optional[Dict[str, Any]] = None  # Defaults merged into each item's metadata
+    planning_concurrency: Optional[int] = None
+
+class WorkflowRequest(BaseModel):
+    name: str
+    description: str  # May contain {parameter} placeholders
+    parameters: Optional[Dict[str, Any]] = None  # Name -> default (None = required)
+    plan: Optional[Dict[str, Any]] = None
+    task_id: Optional[int] = None  # Save this task's plan instead of an explicit one
+    metadata: Optional[Dict[str, Any]] = None
+
+class WorkflowRunRequest(BaseModel):
+    user_id: str
+    session_id: Optional[str] = None
+    parameters: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None
+
 class MessageRequest(BaseModel):
     session_id: str
     content: str
@@ -106,11 +165,11 @@ async def health_check():
 
 # Agent Registry Endpoints
 @app.post("/api/agents/register", response_model=Dict[str, Any])
-async def register_agent(agent: AgentRegistration, db: Session = Depends(get_db)):
+async def register_agent(agent: AgentRegistration, db: AsyncSession = Depends(get_async_db)):
     """Register a new agent"""
     try:
         registry = AgentRegistry(db)
-        new_agent = registry.register_agent(
+        new_agent = await registry.register_agent(
             name=agent.name,
             description=agent.description,
             agent_type=agent.agent_type,
@@ -132,11 +191,11 @@ async def register_agent(agent: AgentRegistration, db: Session = Depends(get_db)
 async def list_agents(
     agent_type: Optional[AgentType] = None,
     status: Optional[AgentStatus] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all registered agents"""
     registry = AgentRegistry(db)
-    agents = registry.list_agents(agent_type=agent_type, status=status)
+    agents = await registry.list_agents(agent_type=agent_type, status=status)
     
     return [
         {
@@ -152,11 +211,34 @@ async def list_agents(
         for agent in agents
     ]
 
+# Declared before /api/agents/{agent_id} so "stats" is not parsed as an id
+@app.get("/api/agents/stats", response_model=Dict[str, Any])
+async def get_agent_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get agent statistics, including live load per agent"""
+    registry = AgentRegistry(db)
+    stats = await registry.get_agent_stats()
+    
+    # In-flight/queued steps per agent, across this process and the task workers
+    snapshots = [admission_controller.snapshot()]
+    snapshots += [
+        (worker.meta_data or {}).get("admission", {})
+        for worker in await TaskQueue(db).list_workers()
+    ]
+    stats["load"] = merge_snapshots(snapshots)
+    
+    return stats
+
+@app.get("/api/agents/performance", response_model=Dict[str, Any])
+async def get_agent_performance(db: AsyncSession = Depends(get_async_db)):
+    """Get per-agent latency percentiles, error rates and payload sizes used for routing"""
+    await agent_stats.refresh(db, force=True)
+    return {str(agent_id): summary for agent_id, summary in agent_stats.snapshot().items()}
+
 @app.get("/api/agents/{agent_id}", response_model=Dict[str, Any])
-async def get_agent(agent_id: int, db: Session = Depends(get_db)):
+async def get_agent(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get agent details"""
     registry = AgentRegistry(db)
-    agent = registry.get_agent(agent_id)
+    agent = await registry.get_agent(agent_id)
     
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -170,7 +252,7 @@ async def get_agent(agent_id: int, db: Session = Depends(get_db)):
         "capabilities": agent.capabilities,
         "status": agent.status,
         "config": agent.config,
-        "metadata": agent.metadata,
+        "metadata": agent.meta_data,
         "created_at": agent.created_at.isoformat()
     }
 
@@ -178,7 +260,7 @@ async def get_agent(agent_id: int, db: Session = Depends(get_db)):
 async def update_agent(
     agent_id: int,
     updates: AgentUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update agent information"""
     registry = AgentRegistry(db)
@@ -186,7 +268,7 @@ async def update_agent(
     update_dict = {k: v for k, v in updates.dict().items() if v is not None}
     
     try:
-        updated_agent = registry.update_agent(agent_id, update_dict)
+        updated_agent = await registry.update_agent(agent_id, update_dict)
         return {
             "id": updated_agent.id,
             "name": updated_agent.name,
@@ -196,7 +278,7 @@ async def update_agent(
         raise HTTPException(status_code=404, detail=str(e))
 
 @app.post("/api/agents/{agent_id}/health", response_model=Dict[str, Any])
-async def check_agent_health(agent_id: int, db: Session = Depends(get_db)):
+async def check_agent_health(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Check agent health"""
     registry = AgentRegistry(db)
     result = await registry.check_agent_health(agent_id)
@@ -206,18 +288,12 @@ async def check_agent_health(agent_id: int, db: Session = Depends(get_db)):
     
     return result
 
-@app.get("/api/agents/stats", response_model=Dict[str, Any])
-async def get_agent_stats(db: Session = Depends(get_db)):
-    """Get agent statistics"""
-    registry = AgentRegistry(db)
-    return registry.get_agent_stats()
-
 # Task Management Endpoints
 @app.post("/api/tasks", response_model=Dict[str, Any])
 async def create_task(
     task_request: TaskRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create and plan a new task"""
     try:
@@ -226,7 +302,7 @@ async def create_task(
         session_id = task_request.session_id
         
         if not session_id:
-            context = memory_service.create_session(
+            context = await memory_service.create_session(
                 user_id=task_request.user_id,
                 metadata=task_request.metadata
             )
@@ -234,13 +310,25 @@ async def create_task(
         
         # Create task plan
         planner = TaskPlanner(db)
-        task = await planner.create_execution_plan(
-            task_description=task_request.description,
-            session_id=session_id
-        )
-        
-        # Execute task in background
-        background_tasks.add_task(execute_task_background, task.id, db)
+        if (task_request.metadata or {}).get("stream_plan", settings.plan_streaming):
+            # Execute steps in this process as they are planned
+            task = await planner.create_planning_task(
+                task_description=task_request.description,
+                session_id=session_id,
+                metadata=task_request.metadata
+            )
+            step_feed = asyncio.Queue()
+            track_background(asyncio.create_task(execute_task_background(task.id, step_feed)))
+            task = await planner.stream_plan(task, step_feed)
+        else:
+            task = await planner.create_execution_plan(
+                task_description=task_request.description,
+                session_id=session_id,
+                metadata=task_request.metadata
+            )
+            
+            # Hand the task to the worker pool (or run it in this process)
+            await dispatch_task(task.id, db, background_tasks)
         
         return {
             "task_id": task.id,
@@ -252,16 +340,85 @@ async def create_task(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/tasks/batch", response_model=Dict[str, Any])
+async def create_tasks_batch(batch: BatchTaskRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create many tasks at once; they are planned and executed in the background
+
+    In queue mode the unplanned tasks are queued with the same commit and the
+    workers plan them before running them, so nothing is lost if the API
+    restarts. In inline mode they are planned here, ``planning_concurrency``
+    at a time.
+    """
+    if not batch.tasks:
+        raise HTTPException(status_code=400, detail="No tasks given")
+    if len(batch.tasks) > settings.batch_max_tasks:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tasks ({len(batch.tasks)}), the limit is {settings.batch_max_tasks}"
+        )
+    
+    try:
+        # Sessions and task rows go in with a single commit
+        memory_service = MemoryService(db)
+        shared_session_id = batch.session_id
+        tasks = []
+        
+        for item in batch.tasks:
+            metadata = {**(batch.metadata or {}), **(item.metadata or {})}
+            session_id = item.session_id or shared_session_id
+            if not session_id:
+                session_id = (await memory_service.create_session(
+                    user_id=batch.user_id,
+                    metadata=metadata,
+                    commit=False
+                )).session_id
+            
+            task = Task(
+                session_id=session_id,
+                description=item.description,
+                status=TaskStatus.PENDING,
+                meta_data=metadata
+            )
+            db.add(task)
+            tasks.append(task)
+        
+        queued = settings.task_execution_mode != "inline"
+        if queued:
+            await db.flush()
+            queue = TaskQueue(db)
+            for task in tasks:
+                await queue.enqueue(task.id, commit=False)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    task_ids = [task.id for task in tasks]
+    if queued:
+        if app.state.queue_notifier:
+            for task_id in task_ids:
+                await app.state.queue_notifier.notify(task_id)
+    else:
+        concurrency = max(1, batch.planning_concurrency or settings.batch_planning_concurrency)
+        track_background(asyncio.create_task(plan_batch_background(task_ids, concurrency)))
+    
+    return {
+        "task_ids": task_ids,
+        "tasks": [{"task_id": task.id, "session_id": task.session_id} for task in tasks],
+        "status": TaskStatus.PENDING
+    }
+
 @app.get("/api/tasks/{task_id}", response_model=Dict[str, Any])
-async def get_task(task_id: int, db: Session = Depends(get_db)):
+async def get_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get task details and status"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.get(Task, task_id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Get task steps
-    steps = db.query(TaskStep).filter(TaskStep.task_id == task_id).all()
+    steps = await db.scalars(select(TaskStep).where(TaskStep.task_id == task_id))
     
     return {
         "id": task.id,
@@ -284,8 +441,67 @@ async def get_task(task_id: int, db: Session = Depends(get_db)):
         "completed_at": task.completed_at.isoformat() if task.completed_at else None
     }
 
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+@app.get("/api/tasks/{task_id}/stream")
+async def stream_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Stream a task's progress as NDJSON: step status changes, relayed agent
+    events (node progress, answer tokens) and a closing task_finished event
+
+    All events are live for tasks running in this process (inline mode or
+    streamed planning) and, with TASK_QUEUE_USE_REDIS, for tasks run by queue
+    workers. Otherwise step status changes are read from the database every
+    TASK_STREAM_POLL_SECONDS and agent events are not available.
+    """
+    task = await db.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    seen: Dict[int, str] = {}
+    
+    async def poll() -> List[Dict[str, Any]]:
+        """Step changes not seen as events, then task_finished if the task is done"""
+        async with AsyncSessionLocal() as session:
+            current = await session.get(Task, task_id)
+            rows = await session.execute(
+                select(TaskStep.step_number, TaskStep.status)
+                .where(TaskStep.task_id == task_id)
+                .order_by(TaskStep.step_number)
+            )
+        found = []
+        for step_number, status in rows.all():
+            status = getattr(status, "value", status)
+            if seen.get(step_number) != status:
+                seen[step_number] = status
+                found.append({"event": "step", "step_number": step_number, "status": status})
+        if current is None or current.status in FINISHED_STATUSES:
+            status = getattr(current.status, "value", current.status) if current else "deleted"
+            found.append({"event": "task_finished", "status": status})
+        return found
+    
+    async def events():
+        with task_events.subscribe(task_id) as queue:
+            pending = await poll()
+            while True:
+                for event in pending:
+                    yield json.dumps(event, default=str) + "\n"
+                    if event["event"] == "task_finished":
+                        return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.task_stream_poll_seconds)
+                except asyncio.TimeoutError:
+                    # No live events (executed elsewhere, or the finish event was missed)
+                    pending = await poll()
+                    continue
+                if event.get("event") == "step":
+                    seen[event["step_number"]] = event["status"]
+                pending = [event]
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.post("/api/tasks/{task_id}/cancel", response_model=Dict[str, Any])
-async def cancel_task(task_id: int, db: Session = Depends(get_db)):
+async def cancel_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
     """Cancel a running task"""
     executor = TaskExecutor(db)
     result = await executor.cancel_task(task_id)
@@ -295,16 +511,116 @@ async def cancel_task(task_id: int, db: Session = Depends(get_db)):
     
     return result
 
+# Workflow Endpoints
+def workflow_to_dict(workflow: Workflow) -> Dict[str, Any]:
+    return {
+        "id": workflow.id,
+        "name": workflow.name,
+        "description": workflow.description,
+        "parameters": workflow.parameters,
+        "plan": workflow.plan,
+        "metadata": workflow.meta_data
+    }
+
+@app.post("/api/workflows", response_model=Dict[str, Any])
+async def create_workflow(request: WorkflowRequest, db: AsyncSession = Depends(get_async_db)):
+    """Save a named, parameterized plan"""
+    try:
+        workflow = await WorkflowService(db).create_workflow(
+            name=request.name,
+            description=request.description,
+            plan=request.plan,
+            parameters=request.parameters,
+            task_id=request.task_id,
+            metadata=request.metadata
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return workflow_to_dict(workflow)
+
+@app.get("/api/workflows", response_model=List[Dict[str, Any]])
+async def list_workflows(db: AsyncSession = Depends(get_async_db)):
+    """List saved workflows"""
+    return [workflow_to_dict(workflow) for workflow in await WorkflowService(db).list_workflows()]
+
+@app.get("/api/workflows/{name}", response_model=Dict[str, Any])
+async def get_workflow(name: str, db: AsyncSession = Depends(get_async_db)):
+    """Get a saved workflow"""
+    workflow = await WorkflowService(db).get_workflow(name)
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    return workflow_to_dict(workflow)
+
+@app.delete("/api/workflows/{name}", response_model=Dict[str, Any])
+async def delete_workflow(name: str, db: AsyncSession = Depends(get_async_db)):
+    """Delete a saved workflow"""
+    if not await WorkflowService(db).delete_workflow(name):
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    return {"status": "deleted", "name": name}
+
+@app.post("/api/workflows/{name}/run", response_model=Dict[str, Any])
+async def run_workflow(
+    name: str,
+    request: WorkflowRunRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a task from a saved workflow, skipping planning"""
+    service = WorkflowService(db)
+    workflow = await service.get_workflow(name)
+    
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    try:
+        rendered = await service.instantiate(workflow, request.parameters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    session_id = request.session_id
+    if not session_id:
+        context = await MemoryService(db).create_session(
+            user_id=request.user_id,
+            metadata=request.metadata
+        )
+        session_id = context.session_id
+    
+    try:
+        task = await TaskPlanner(db).create_task_from_plan(
+            task_description=rendered["description"],
+            session_id=session_id,
+            plan_data=rendered["plan"],
+            metadata={**(request.metadata or {}), "workflow": name}
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        # Workflows saved before plans were validated may be malformed
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid workflow plan: {e!r}")
+    
+    await dispatch_task(task.id, db, background_tasks)
+    
+    return {
+        "task_id": task.id,
+        "session_id": session_id,
+        "status": task.status,
+        "plan": task.plan,
+        "created_at": task.created_at.isoformat()
+    }
+
 # Memory/Context Management Endpoints
 @app.post("/api/sessions", response_model=Dict[str, Any])
 async def create_session(
     user_id: str,
     metadata: Optional[Dict[str, Any]] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new conversation session"""
     memory_service = MemoryService(db)
-    context = memory_service.create_session(user_id, metadata)
+    context = await memory_service.create_session(user_id, metadata)
     
     return {
         "session_id": context.session_id,
@@ -316,12 +632,12 @@ async def create_session(
 async def add_message(
     session_id: str,
     message: MessageRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a message to a session"""
     try:
         memory_service = MemoryService(db)
-        new_message = memory_service.add_message(
+        new_message = await memory_service.add_message(
             session_id=session_id,
             role=message.role,
             content=message.content,
@@ -341,11 +657,11 @@ async def add_message(
 async def get_messages(
     session_id: str,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get conversation history"""
     memory_service = MemoryService(db)
-    messages = memory_service.get_conversation_history(session_id, limit)
+    messages = await memory_service.get_conversation_history(session_id, limit)
     
     return [
         {
@@ -354,16 +670,16 @@ async def get_messages(
             "content": msg.content,
             "agent_id": msg.agent_id,
             "timestamp": msg.timestamp.isoformat(),
-            "metadata": msg.metadata
+            "metadata": msg.meta_data
         }
         for msg in reversed(messages)
     ]
 
 @app.get("/api/sessions/{session_id}", response_model=Dict[str, Any])
-async def get_session_summary(session_id: str, db: Session = Depends(get_db)):
+async def get_session_summary(session_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get session summary"""
     memory_service = MemoryService(db)
-    summary = memory_service.get_context_summary(session_id)
+    summary = await memory_service.get_context_summary(session_id)
     
     if not summary:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -372,12 +688,12 @@ async def get_session_summary(session_id: str, db: Session = Depends(get_db)):
 
 # A2A Protocol Endpoints
 @app.post("/a2a/message", response_model=Dict[str, Any])
-async def receive_a2a_message(message: A2AMessage, db: Session = Depends(get_db)):
+async def receive_a2a_message(message: A2AMessage, db: AsyncSession = Depends(get_async_db)):
     """Receive A2A protocol message"""
     
     # Find the receiver agent
     registry = AgentRegistry(db)
-    agent = registry.get_agent_by_name(message.receiver)
+    agent = await registry.get_agent_by_name(message.receiver)
     
     if not agent:
         raise HTTPException(status_code=404, detail=f"Agent '{message.receiver}' not found")
@@ -410,24 +726,24 @@ class RegisterAgentWithTemplateRequest(BaseModel):
     auth_config: Optional[Dict[str, Any]] = None
 
 @app.get("/api/agent-templates", response_model=List[Dict[str, Any]])
-async def list_agent_templates(db: Session = Depends(get_db)):
+async def list_agent_templates(db: AsyncSession = Depends(get_async_db)):
     """List all available agent configuration templates"""
     from services.agent_registration_service import AgentRegistrationService
     
     service = AgentRegistrationService(db)
     # Initialize templates if they don't exist
-    service.initialize_templates()
+    await service.initialize_templates()
     
-    return service.list_templates()
+    return await service.list_templates()
 
 @app.get("/api/agent-templates/{template_id}", response_model=Dict[str, Any])
-async def get_agent_template(template_id: int, db: Session = Depends(get_db)):
+async def get_agent_template(template_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific agent template"""
     from services.agent_registration_service import AgentRegistrationService
     from models.agent_config_template import AgentConfigTemplate
     
     service = AgentRegistrationService(db)
-    template = service.get_template(template_id)
+    template = await service.get_template(template_id)
     
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
@@ -449,7 +765,7 @@ async def get_agent_template(template_id: int, db: Session = Depends(get_db)):
 @app.post("/api/agents/test-connection", response_model=Dict[str, Any])
 async def test_agent_connection(
     request: TestAgentRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Test connection to an external agent"""
     from services.agent_registration_service import AgentRegistrationService
@@ -467,7 +783,7 @@ async def test_agent_connection(
 @app.post("/api/agents/register-with-template", response_model=Dict[str, Any])
 async def register_agent_with_template(
     request: RegisterAgentWithTemplateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new agent using a configuration template"""
     from services.agent_registration_service import AgentRegistrationService
@@ -475,7 +791,7 @@ async def register_agent_with_template(
     service = AgentRegistrationService(db)
     
     try:
-        agent = service.register_agent_with_template(
+        agent = await service.register_agent_with_template(
             name=request.name,
             description=request.description,
             endpoint=request.endpoint,
@@ -497,14 +813,87 @@ async def register_agent_with_template(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/cache/stats", response_model=Dict[str, Any])
+async def get_cache_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get step result cache hit/miss counts across this process and the task workers"""
+    step_cache = get_step_cache()
+    if not step_cache:
+        return {"enabled": False}
+    
+    reports = [step_cache.stats()]
+    reports += [(worker.meta_data or {}).get("step_cache") for worker in await TaskQueue(db).list_workers()]
+    return {"enabled": True, **merge_cache_stats(reports)}
+
+@app.get("/api/plans/cache", response_model=Dict[str, Any])
+async def get_plan_cache_stats():
+    """Get plan cache size and hit/miss counts for this process"""
+    return {"enabled": settings.plan_cache_enabled, **plan_cache.stats()}
+
+@app.get("/api/plans/batching", response_model=Dict[str, Any])
+async def get_plan_batching_stats():
+    """Get planning coalescer counts for this process"""
+    return {"enabled": settings.plan_batching_enabled, **get_plan_coalescer().stats()}
+
+@app.get("/api/llm/stats", response_model=Dict[str, Any])
+async def get_llm_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get LLM gateway counters summed over this process and the task workers"""
+    reports = [get_llm_gateway().stats()]
+    reports += [(worker.meta_data or {}).get("llm") for worker in await TaskQueue(db).list_workers()]
+    
+    totals: Dict[str, Any] = {"processes": 0}
+    for report in filter(None, reports):
+        totals["processes"] += 1
+        for key, value in report.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+@app.get("/api/queue/stats", response_model=Dict[str, Any])
+async def get_queue_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get task queue depth and live worker count"""
+    return await TaskQueue(db).get_stats()
+
 # Helper functions
-async def execute_task_background(task_id: int, db: Session):
+# Strong references to fire-and-forget tasks (the event loop only keeps weak ones)
+_background_tasks = set()
+
+def track_background(task: asyncio.Task):
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def dispatch_task(task_id: int, db: AsyncSession, background_tasks: Optional[BackgroundTasks] = None):
+    """Queue a planned task for the workers, or run it in-process in inline mode"""
+    if settings.task_execution_mode == "inline":
+        if background_tasks is not None:
+            background_tasks.add_task(execute_task_background, task_id)
+        else:
+            track_background(asyncio.create_task(execute_task_background(task_id)))
+        return
+    
+    await TaskQueue(db).enqueue(task_id)
+    if app.state.queue_notifier:
+        await app.state.queue_notifier.notify(task_id)
+
+async def execute_task_background(task_id: int, step_feed: Optional[asyncio.Queue] = None):
     """Execute task in background"""
-    executor = TaskExecutor(db)
-    try:
-        await executor.execute_task(task_id)
-    finally:
-        await executor.cleanup()
+    # The request's session is closed once the response is sent, use our own
+    async with AsyncSessionLocal() as db:
+        executor = TaskExecutor(db)
+        try:
+            await executor.execute_task(task_id, step_feed=step_feed)
+        finally:
+            await executor.cleanup()
+
+async def plan_batch_background(task_ids: List[int], concurrency: int):
+    """Plan batch-submitted tasks in this process (inline mode), at most ``concurrency`` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def plan_one(task_id: int):
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                if await TaskPlanner(db).plan_or_fail(task_id):
+                    await dispatch_task(task_id, db)
+    
+    await asyncio.gather(*(plan_one(task_id) for task_id in task_ids))
 
 if __name__ == "__main__":
     uvicorn.run(
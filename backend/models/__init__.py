@@ -4,6 +4,8 @@ Models package
 from models.agent import Agent, AgentType, AgentStatus
 from models.memory import ConversationContext, Message, AgentMemory
 from models.task import Task, TaskStep, TaskStatus
+from models.task_queue import TaskQueueItem, TaskWorker, QueueStatus
+from models.workflow import Workflow
 
 __all__ = [
     'Agent',
@@ -15,5 +17,9 @@ __all__ = [
     'Task',
     'TaskStep',
     'TaskStatus',
+    'TaskQueueItem',
+    'TaskWorker',
+    'QueueStatus',
+    'Workflow',
 ]
 
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum, ForeignKey, Text
+from sqlalchemy.sql import func
+from database import Base
+import enum
+
+class QueueStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class TaskQueueItem(Base):
+    __tablename__ = "task_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), unique=True, index=True)
+    status = Column(Enum(QueueStatus), default=QueueStatus.QUEUED, index=True)
+    priority = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    worker_id = Column(String, nullable=True)  # Worker holding the lease
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    available_at = Column(DateTime(timezone=True), nullable=True)  # Retry backoff
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class TaskWorker(Base):
+    __tablename__ = "task_workers"
+
+    id = Column(String, primary_key=True)  # hostname:pid:suffix
+    hostname = Column(String)
+    pid = Column(Integer)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    meta_data = Column(JSON)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Text
+from sqlalchemy.sql import func
+from database import Base
+
+class Workflow(Base):
+    """A saved, parameterized plan that can be run without planning"""
+    __tablename__ = "workflows"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    description = Column(Text)  # Task description template, e.g. "Sales report for {region}"
+    plan = Column(JSON)  # Same structure as Task.plan; step descriptions may use {parameters}
+    parameters = Column(JSON)  # Parameter name -> default value (None = required)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    meta_data = Column(JSON)
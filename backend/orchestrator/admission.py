@@ -0,0 +1,262 @@
+"""
+Admission Control Module
+Per-agent bulkheads that cap concurrent steps sent to each agent endpoint,
+queue the excess for a bounded time, and optionally adapt the cap (AIMD) to
+observed latency and errors
+"""
+from typing import Dict, Any, Optional, Iterable
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import time
+from config import get_settings
+
+settings = get_settings()
+
+
+class AdmissionError(RuntimeError):
+    """Raised when a step could not be admitted to its agent"""
+
+
+class AIMDLimit:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit
+
+    Each fast, successful call grows the limit by 1/limit (about +1 per full
+    window); a failure or a call slower than the target latency shrinks it.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64,
+                 target_latency: float = 10.0, backoff: float = 0.7):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._limit = float(min(max(initial, min_limit), self.max_limit))
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_success(self, latency: float):
+        if latency > self.target_latency:
+            self._decrease()
+        else:
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+
+    def on_failure(self):
+        self._decrease()
+
+    def _decrease(self):
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+
+
+class Permit:
+    """Handle for one admitted call; lets the caller report a soft failure"""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+    def mark_failed(self):
+        self.failed = True
+
+
+class AgentBulkhead:
+    """
+    Concurrency cap plus bounded FIFO wait queue for one agent
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float,
+                 adaptive: Optional[AIMDLimit] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        return self.adaptive.limit if self.adaptive else self.max_concurrency
+
+    def configure(self, max_concurrency: int, max_queue: int, max_wait: float,
+                  adaptive: Optional[AIMDLimit] = None):
+        """Apply new settings; in-flight calls and queued steps are kept"""
+
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.adaptive = adaptive
+        # A higher limit frees slots for steps already waiting
+        self._wake_waiters()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Hold one of the agent's concurrency slots for the duration of the block"""
+
+        await self._admit()
+        permit = Permit()
+        started = time.monotonic()
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            permit.mark_failed()
+            raise
+        finally:
+            self._release(permit, time.monotonic() - started)
+
+    async def _admit(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionError(f"Agent queue full ({self.max_queue} steps waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The slot is handed over by _release, which increments in_flight for us
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            self._abandon(waiter)
+            raise AdmissionError(f"Timed out after {self.max_wait}s waiting for an agent slot")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: asyncio.Future):
+        """Leave the queue; give back the slot if it was handed over meanwhile"""
+
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        elif waiter.done() and not waiter.cancelled():
+            self.in_flight -= 1
+            self._wake_waiters()
+        waiter.cancel()
+
+    def _release(self, permit: Permit, latency: float):
+        self.in_flight -= 1
+        if self.adaptive:
+            if permit.failed:
+                self.adaptive.on_failure()
+            else:
+                self.adaptive.on_success(latency)
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "adaptive": self.adaptive is not None
+        }
+
+
+class AdmissionController:
+    """
+    Bulkheads for every agent this process talks to, configured from Agent.config:
+
+        max_concurrency        Concurrent steps (initial limit when adaptive)
+        max_queue              Steps allowed to wait for a slot
+        max_wait_seconds       How long a step may wait before failing
+        adaptive_concurrency   Enable the AIMD limit
+        target_latency_seconds Latency above which the AIMD limit backs off
+        max_concurrency_limit  Upper bound for the AIMD limit
+    """
+
+    def __init__(self):
+        self._bulkheads: Dict[int, Any] = {}
+
+    @staticmethod
+    def _settings_for(config: Dict[str, Any]) -> tuple:
+        return (
+            int(config.get("max_concurrency") or settings.agent_max_concurrency),
+            int(config.get("max_queue") if config.get("max_queue") is not None else settings.agent_max_queue),
+            float(config.get("max_wait_seconds") or settings.agent_max_wait_seconds),
+            bool(config.get("adaptive_concurrency", settings.agent_adaptive_concurrency)),
+            float(config.get("target_latency_seconds") or settings.agent_target_latency_seconds),
+            int(config.get("max_concurrency_limit") or settings.agent_max_concurrency_limit)
+        )
+
+    def get(self, agent) -> AgentBulkhead:
+        """Bulkhead for an agent, reconfigured in place if its admission settings changed"""
+
+        options = self._settings_for(agent.config or {})
+        cached = self._bulkheads.get(agent.id)
+        if cached and cached[0] == options:
+            return cached[1]
+
+        max_concurrency, max_queue, max_wait, adaptive, target_latency, max_limit = options
+        limit = AIMDLimit(
+            initial=max_concurrency,
+            max_limit=max_limit,
+            target_latency=target_latency
+        ) if adaptive else None
+        if cached:
+            # Calls admitted under the old settings release on the same bulkhead
+            bulkhead = cached[1]
+            bulkhead.configure(max_concurrency, max_queue, max_wait, limit)
+        else:
+            bulkhead = AgentBulkhead(
+                max_concurrency=max_concurrency,
+                max_queue=max_queue,
+                max_wait=max_wait,
+                adaptive=limit
+            )
+
+        self._bulkheads[agent.id] = (options, bulkhead)
+        return bulkhead
+
+    def acquire(self, agent):
+        """Async context manager admitting one step to ``agent``"""
+
+        return self.get(agent).acquire()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current load per agent id (string keys, JSON friendly)"""
+
+        return {
+            str(agent_id): bulkhead.snapshot()
+            for agent_id, (_, bulkhead) in self._bulkheads.items()
+        }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum per-agent load reported by several processes"""
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for agent_id, load in (snapshot or {}).items():
+            total = merged.setdefault(agent_id, {
+                "in_flight": 0, "queued": 0, "limit": 0, "rejected": 0, "processes": 0
+            })
+            total["in_flight"] += load.get("in_flight", 0)
+            total["queued"] += load.get("queued", 0)
+            total["limit"] += load.get("limit", 0)
+            total["rejected"] += load.get("rejected", 0)
+            total["processes"] += 1
+    return merged
+
+
+admission_controller = AdmissionController()
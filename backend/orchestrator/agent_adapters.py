@@ -0,0 +1,236 @@
+"""
+Agent Adapter Module
+Compiles template request/response mappings into reusable adapters so steps
+can call an agent's native endpoint (CrewAI /kickoff, Databricks /invocations,
+OpenAI /v1/chat/completions, ...) directly
+"""
+from typing import Dict, Any, Optional, Tuple
+from jsonpath_ng import parse as jsonpath_parse
+import hashlib
+import json
+import os
+import re
+
+ENV_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+PATH_PARAM_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+_MISSING = object()
+
+
+class UnresolvedAdapterError(ValueError):
+    """Raised when a mapping cannot be turned into a concrete request"""
+
+
+class _JSONPathValue:
+    """Body placeholder resolved from the step input at request time"""
+
+    __slots__ = ("expression",)
+
+    def __init__(self, path: str):
+        self.expression = jsonpath_parse(path)
+
+    def resolve(self, data: Any) -> Any:
+        matches = self.expression.find(data)
+        return matches[0].value if matches else None
+
+
+def _compile_template(value: Any) -> Any:
+    """Replace JSONPath strings in a body mapping with precompiled expressions"""
+
+    if isinstance(value, str) and value.startswith("$."):
+        return _JSONPathValue(value)
+    if isinstance(value, dict):
+        return {key: _compile_template(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compile_template(item) for item in value]
+    return value
+
+
+def _render_template(template: Any, data: Dict[str, Any]) -> Any:
+    """Build a concrete body from a compiled template"""
+
+    if isinstance(template, _JSONPathValue):
+        return template.resolve(data)
+    if isinstance(template, dict):
+        return {key: _render_template(item, data) for key, item in template.items()}
+    if isinstance(template, list):
+        return [_render_template(item, data) for item in template]
+    return template
+
+
+def _substitute_env(value: str) -> Optional[str]:
+    """Expand ${VAR} references; None if any variable is unset"""
+
+    missing = [name for name in ENV_PATTERN.findall(value) if name not in os.environ]
+    if missing:
+        return None
+    return ENV_PATTERN.sub(lambda match: os.environ[match.group(1)], value)
+
+
+class CompiledAdapter:
+    """
+    Precompiled request/response mapping for one agent configuration
+    """
+
+    def __init__(self,
+                 request_mapping: Dict[str, Any],
+                 response_mapping: Optional[Dict[str, Any]] = None,
+                 auth_config: Optional[Dict[str, Any]] = None,
+                 path_params: Optional[Dict[str, Any]] = None):
+        response_mapping = response_mapping or {}
+
+        self.method = request_mapping.get("method", "POST").upper()
+        self.path = self._compile_path(request_mapping.get("path", "/process"), path_params or {})
+        self.headers = self._compile_headers(request_mapping.get("headers") or {}, auth_config or {})
+        self.body = _compile_template(request_mapping.get("body_mapping") or {})
+
+        self.result_path = jsonpath_parse(response_mapping.get("result_path", "$.result"))
+        self.status_path = self._optional_path(response_mapping.get("status_path"))
+        self.error_path = self._optional_path(response_mapping.get("error_path"))
+
+    @staticmethod
+    def _optional_path(path: Optional[str]):
+        return jsonpath_parse(path) if path else None
+
+    @staticmethod
+    def _compile_path(path: str, path_params: Dict[str, Any]) -> str:
+        """Fill {param} placeholders from the agent config"""
+
+        def replace(match):
+            name = match.group(1)
+            if name not in path_params:
+                raise UnresolvedAdapterError(f"Missing path parameter '{name}' for path {path}")
+            return str(path_params[name])
+
+        resolved = _substitute_env(path)
+        if resolved is None:
+            raise UnresolvedAdapterError(f"Unset environment variable in path {path}")
+        return "/" + PATH_PARAM_PATTERN.sub(replace, resolved).lstrip("/")
+
+    @staticmethod
+    def _compile_headers(headers: Dict[str, str], auth_config: Dict[str, Any]) -> Dict[str, str]:
+        """Resolve static headers once; headers with unset ${VAR}s are dropped"""
+
+        compiled = {"Content-Type": "application/json"}
+        for name, value in headers.items():
+            resolved = _substitute_env(str(value))
+            if resolved is not None:
+                compiled[name] = resolved
+
+        auth_type = auth_config.get("type", "none")
+        token = auth_config.get("token")
+        if token is None and auth_config.get("env_var"):
+            token = os.environ.get(auth_config["env_var"])
+
+        if token:
+            if auth_type == "bearer_token":
+                compiled["Authorization"] = f"Bearer {token}"
+            elif auth_type == "api_key":
+                compiled[auth_config.get("header", "X-API-Key")] = token
+
+        return compiled
+
+    def build_request(self, endpoint: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword arguments for ``httpx.AsyncClient.request``"""
+
+        request = {
+            "method": self.method,
+            "url": endpoint.rstrip("/") + self.path,
+            "headers": self.headers
+        }
+        if self.method != "GET":
+            request["json"] = _render_template(self.body, input_data)
+        return request
+
+    def parse_response(self, response_data: Any, agent_name: str) -> Dict[str, Any]:
+        """
+        Normalize a native response into the executor's step result format
+
+        An error the agent reports (``error_path``) gets status "error", not the
+        "failed" of transport failures, so it does not count against the
+        endpoint's circuit breaker.
+        """
+
+        error = self._first(self.error_path, response_data)
+        if error not in (None, _MISSING):
+            return {
+                "status": "error",
+                "agent": agent_name,
+                "error": error
+            }
+
+        result = self._first(self.result_path, response_data)
+        if result is _MISSING:
+            result = json.dumps(response_data)
+
+        parsed = {
+            "status": "success",
+            "agent": agent_name,
+            "result": result
+        }
+        native_status = self._first(self.status_path, response_data)
+        if native_status is not _MISSING:
+            parsed["native_status"] = native_status
+        return parsed
+
+    @staticmethod
+    def _first(expression, data: Any) -> Any:
+        if expression is None:
+            return _MISSING
+        matches = expression.find(data)
+        return matches[0].value if matches else _MISSING
+
+
+class AdapterCache:
+    """
+    Compiled adapters keyed by agent id and config version
+    """
+
+    def __init__(self):
+        self._adapters: Dict[int, Tuple[str, Optional[CompiledAdapter]]] = {}
+
+    @staticmethod
+    def config_version(config: Dict[str, Any]) -> str:
+        """Stable fingerprint of an agent config"""
+
+        encoded = json.dumps(config, sort_keys=True, default=str).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    def get(self, agent) -> Optional[CompiledAdapter]:
+        """
+        Adapter for an agent, or None if it has no usable template mapping and
+        should be called through the generic /process route
+        """
+
+        config = agent.config or {}
+        if not config.get("request_mapping"):
+            return None
+
+        version = self.config_version(config)
+        cached = self._adapters.get(agent.id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        try:
+            adapter = CompiledAdapter(
+                request_mapping=config["request_mapping"],
+                response_mapping=config.get("response_mapping"),
+                auth_config=config.get("auth_config"),
+                path_params=config.get("path_params")
+            )
+        except UnresolvedAdapterError:
+            adapter = None
+
+        self._adapters[agent.id] = (version, adapter)
+        return adapter
+
+    def invalidate(self, agent_id: Optional[int] = None):
+        """Drop one agent's adapter, or all of them"""
+
+        if agent_id is None:
+            self._adapters.clear()
+        else:
+            self._adapters.pop(agent_id, None)
+
+
+adapter_cache = AdapterCache()
@@ -0,0 +1,253 @@
+"""
+Agent Stats Module
+Rolling per-agent latency, error rate and payload size statistics, used as
+routing hints for the planner and by the post-planning rebalancer
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from collections import deque
+from datetime import datetime
+import json
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.agent import Agent
+from models.task import TaskStep, TaskStatus
+from services.agent_registry import AgentRegistry
+from services.task_queue import TaskQueue
+from config import get_settings
+
+settings = get_settings()
+
+
+def payload_size(value: Any) -> int:
+    return len(json.dumps(value, default=str)) if value is not None else 0
+
+
+def is_failed_result(result: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether an agent call produced no usable result: a transport failure
+    (status "failed"), an error the agent reported at the top level, or an A2A
+    response whose content has status "error" (sent with HTTP 200)
+    """
+
+    if not result:
+        return False
+    if result.get("status") in ("failed", "error") or result.get("error"):
+        return True
+    content = result.get("content")
+    return isinstance(content, dict) and content.get("status") == "error"
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class AgentStats:
+    """Rolling window of one agent's calls: (latency, ok, input bytes, output bytes)"""
+
+    def __init__(self, window_size: int = None):
+        self.samples = deque(maxlen=window_size or settings.agent_stats_window)
+
+    def record(self, latency: Optional[float], ok: bool, input_bytes: int = 0, output_bytes: int = 0):
+        self.samples.append((latency, ok, input_bytes, output_bytes))
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        if not self.samples:
+            return None
+        latencies = sorted(latency for latency, ok, _, _ in self.samples if ok and latency is not None)
+        calls = len(self.samples)
+        return {
+            "calls": calls,
+            "error_rate": round(sum(1 for _, ok, _, _ in self.samples if not ok) / calls, 3),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000) if latencies else None,
+            "avg_input_bytes": round(sum(sample[2] for sample in self.samples) / calls),
+            "avg_output_bytes": round(sum(sample[3] for sample in self.samples) / calls)
+        }
+
+
+class AgentStatsStore:
+    """
+    Live measurements from this process and from the task workers, plus
+    history from the task_steps table
+
+    Workers publish their live samples with their heartbeat (``export``).
+    History latencies run from step creation to completion and so include
+    waiting time; it is only used for agents without enough live samples
+    (``agent_stats_min_samples``) here or on the workers.
+    """
+
+    def __init__(self):
+        self.live: Dict[int, AgentStats] = {}
+        self.workers: Dict[int, AgentStats] = {}
+        self.history: Dict[int, AgentStats] = {}
+        self.refreshed_at: Optional[float] = None
+
+    def record(self, agent_id: int, latency: Optional[float], ok: bool,
+               input_bytes: int = 0, output_bytes: int = 0):
+        if agent_id not in self.live:
+            self.live[agent_id] = AgentStats()
+        self.live[agent_id].record(latency, ok, input_bytes, output_bytes)
+
+    def export(self) -> Dict[str, List[list]]:
+        """This process' live samples per agent id (string keys, JSON friendly)"""
+
+        return {str(agent_id): [list(sample) for sample in stats.samples] for agent_id, stats in self.live.items()}
+
+    def _load_workers(self, exports: Iterable[Dict[str, List[list]]]):
+        """Combine the samples the task workers published (see ``export``)"""
+
+        exports = [export for export in exports if export]
+        workers: Dict[int, AgentStats] = {}
+        for export in exports:
+            for agent_id, samples in export.items():
+                stats = workers.setdefault(int(agent_id), AgentStats(settings.agent_stats_window * len(exports)))
+                for latency, ok, input_bytes, output_bytes in samples:
+                    stats.record(latency, ok, input_bytes, output_bytes)
+        self.workers = workers
+
+    async def refresh(self, db: AsyncSession, force: bool = False):
+        """Reload history from recent finished steps (at most every agent_stats_refresh_seconds)"""
+
+        now = time.monotonic()
+        if not force and self.refreshed_at is not None \
+                and now - self.refreshed_at < settings.agent_stats_refresh_seconds:
+            return
+        self.refreshed_at = now
+
+        self._load_workers(
+            (worker.meta_data or {}).get("agent_stats")
+            for worker in await TaskQueue(db).list_workers()
+        )
+
+        steps = await db.scalars(
+            select(TaskStep)
+            .where(
+                TaskStep.agent_id.is_not(None),
+                TaskStep.status.in_([TaskStatus.COMPLETED, TaskStatus.FAILED])
+            )
+            .order_by(TaskStep.id.desc())
+            .limit(settings.agent_stats_history_steps)
+        )
+
+        history: Dict[int, AgentStats] = {}
+        for step in reversed(list(steps)):
+            latency = None
+            if step.created_at and step.completed_at:
+                started, finished = step.created_at, step.completed_at
+                if (started.tzinfo is None) != (finished.tzinfo is None):
+                    started, finished = started.replace(tzinfo=None), finished.replace(tzinfo=None)
+                seconds = (finished - started).total_seconds()
+                latency = seconds if seconds >= 0 else None
+            ok = step.status == TaskStatus.COMPLETED and not is_failed_result(step.output_data)
+            history.setdefault(step.agent_id, AgentStats()).record(
+                latency, ok, payload_size(step.input_data), payload_size(step.output_data)
+            )
+        self.history = history
+
+    def summary(self, agent_id: int) -> Optional[Dict[str, Any]]:
+        live = self.live.get(agent_id)
+        if live and len(live.samples) >= settings.agent_stats_min_samples:
+            return {**live.summary(), "source": "live"}
+        workers = self.workers.get(agent_id)
+        if workers and len(workers.samples) >= settings.agent_stats_min_samples:
+            return {**workers.summary(), "source": "workers"}
+        history = self.history.get(agent_id)
+        if history and history.samples:
+            return {**history.summary(), "source": "history"}
+        if live and live.samples:
+            return {**live.summary(), "source": "live"}
+        return None
+
+    def hints(self, agent_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Compact stats for the planning prompt"""
+
+        hints = {}
+        for agent_id in agent_ids:
+            summary = self.summary(agent_id)
+            if summary and summary["calls"] >= settings.agent_stats_min_samples:
+                hints[agent_id] = {
+                    key: summary[key] for key in ("p50_ms", "p95_ms", "error_rate")
+                    if summary[key] is not None
+                }
+        return hints
+
+    def snapshot(self) -> Dict[int, Dict[str, Any]]:
+        agent_ids = set(self.live) | set(self.workers) | set(self.history)
+        return {agent_id: self.summary(agent_id) for agent_id in sorted(agent_ids)}
+
+
+def routing_cost(summary: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Expected cost of a call in ms: median latency, inflated by the error rate"""
+
+    if not summary or summary.get("p50_ms") is None or summary["calls"] < settings.agent_stats_min_samples:
+        return None
+    return summary["p50_ms"] * (1 + 4 * summary["error_rate"])
+
+
+class PlanRebalancer:
+    """
+    Moves planned steps to an equivalent agent (same or more capabilities)
+    whose current stats are clearly better
+    """
+
+    def __init__(self, db: AsyncSession, store: "AgentStatsStore" = None):
+        self.db = db
+        self.store = store or agent_stats
+        self._by_capability: Dict[str, List[Agent]] = {}
+
+    async def _equivalents(self, agent: Agent) -> List[Agent]:
+        capabilities = set(agent.capabilities or [])
+        if not capabilities:
+            return []
+        capability = sorted(capabilities)[0]
+        if capability not in self._by_capability:
+            self._by_capability[capability] = await AgentRegistry(self.db).find_agents_by_capability(capability)
+        return [
+            candidate for candidate in self._by_capability[capability]
+            if candidate.id != agent.id and capabilities.issubset(candidate.capabilities or [])
+        ]
+
+    async def rebalance_step(self, step: Dict[str, Any], agents_by_id: Dict[int, Agent]) -> Optional[Dict[str, Any]]:
+        """Reassign one step in place; returns a description of the swap, if any"""
+
+        agent = agents_by_id.get(step.get("agent_id"))
+        if agent is None:
+            return None
+        current = routing_cost(self.store.summary(agent.id))
+        if current is None:
+            return None
+
+        best, best_cost = None, current * (1 - settings.agent_rebalance_min_improvement)
+        for candidate in await self._equivalents(agent):
+            cost = routing_cost(self.store.summary(candidate.id))
+            if cost is not None and cost < best_cost:
+                best, best_cost = candidate, cost
+        if best is None:
+            return None
+
+        step["agent_id"] = best.id
+        step["agent_name"] = best.name
+        step["rebalanced_from"] = agent.name
+        return {
+            "step_number": step.get("step_number"),
+            "from": agent.name,
+            "to": best.name,
+            "expected_ms": round(best_cost),
+            "previous_expected_ms": round(current)
+        }
+
+    async def rebalance(self, plan_data: Dict[str, Any], agents: Iterable[Agent]) -> Dict[str, Any]:
+        agents_by_id = {agent.id: agent for agent in agents}
+        swaps = []
+        for step in plan_data.get("steps", []):
+            swap = await self.rebalance_step(step, agents_by_id)
+            if swap:
+                swaps.append(swap)
+        if swaps:
+            plan_data["rebalanced"] = swaps
+        return plan_data
+
+
+# Global stats store
+agent_stats = AgentStatsStore()
@@ -0,0 +1,62 @@
+"""
+Task Cancellation Module
+Tracks task executions running in this process so a cancel request can
+interrupt them instead of only flagging the database row
+"""
+from typing import Dict, List, Set
+import asyncio
+
+
+class CancellationRegistry:
+    """
+    Running executions keyed by task id
+
+    Cancelling an execution raises CancelledError inside it, which propagates to
+    its in-flight step coroutines and aborts their outbound HTTP/A2A requests.
+    """
+
+    def __init__(self):
+        self._executions: Dict[int, asyncio.Task] = {}
+        self._requested: Set[int] = set()
+
+    def register(self, task_id: int, execution: asyncio.Task):
+        """Track the asyncio task executing ``task_id``"""
+
+        self._executions[task_id] = execution
+
+    def unregister(self, task_id: int, execution: asyncio.Task):
+        """Stop tracking an execution once it finished"""
+
+        if self._executions.get(task_id) is execution:
+            del self._executions[task_id]
+        self._requested.discard(task_id)
+
+    def cancel(self, task_id: int) -> bool:
+        """Interrupt the execution of a task; False if it is not running here"""
+
+        execution = self._executions.get(task_id)
+        if execution is None or execution.done():
+            return False
+
+        self._requested.add(task_id)
+        execution.cancel()
+        return True
+
+    def consume_request(self, task_id: int) -> bool:
+        """
+        Whether a CancelledError seen by the execution came from a user cancel
+        request (as opposed to worker shutdown or a lost lease)
+        """
+
+        if task_id in self._requested:
+            self._requested.discard(task_id)
+            return True
+        return False
+
+    def running_tasks(self) -> List[int]:
+        """Task ids executing in this process"""
+
+        return [task_id for task_id, execution in self._executions.items() if not execution.done()]
+
+
+cancellation_registry = CancellationRegistry()
@@ -0,0 +1,176 @@
+"""
+Fast-Path Router
+Classifies trivial tasks locally and plans them as a single step on the
+simplest matching agent, without a planning LLM call
+"""
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import importlib
+import re
+from config import get_settings
+
+settings = get_settings()
+
+# Category -> agent capabilities that can handle it
+CATEGORY_CAPABILITIES = {
+    "calculation": ["calculation", "math", "arithmetic"],
+    "definition": ["definitions", "quick_answers", "simple_queries"],
+    "summarization": ["summarization", "text_processing"],
+}
+
+ARITHMETIC = re.compile(r"^[\d\s\.\+\-\*/\^%\(\)x×÷=]+\??$")
+CALCULATION = re.compile(
+    r"^(what is|what's|calculate|compute|evaluate|solve)\s+[\d\s\.\+\-\*/\^%\(\)x×÷]+\??$"
+)
+DEFINITION = re.compile(r"^(what is|what's|what are|define|who is|who was|meaning of)\s+(.+?)\??$")
+SUMMARIZATION = re.compile(r"^(summarize|summarise|tl;?dr)\b")
+
+# Wording that signals multi-step work
+COMPLEX_MARKERS = re.compile(
+    r"\b(research|investigate|strategy|strategic|recommendations?|compare|comparison|"
+    r"step[- ]by[- ]step|plan|workflow|and then|then|report|analy[sz]e|trends?|impact)\b"
+)
+
+# (category, confidence, reason) or None when the classifier has no opinion
+Classification = Optional[Tuple[str, float, str]]
+
+
+def classify_heuristic(description: str) -> Classification:
+    """Rule-based classification of obviously simple tasks"""
+
+    text = re.sub(r"\s+", " ", description or "").strip().lower()
+    if not text:
+        return None
+
+    if ARITHMETIC.match(text) and re.search(r"\d", text):
+        return "calculation", 0.98, "pure arithmetic expression"
+    if CALCULATION.match(text):
+        return "calculation", 0.95, "arithmetic question"
+
+    words = len(text.split())
+    if COMPLEX_MARKERS.search(text) or words > 40:
+        return "complex", 0.9, "multi-step wording or long description"
+
+    match = DEFINITION.match(text)
+    if match and len(match.group(2).split()) <= 6:
+        return "definition", 0.9, "short definition question"
+
+    if SUMMARIZATION.match(text):
+        return "summarization", 0.9, "single summarization request"
+
+    return None
+
+
+def load_classifier(path: str) -> Optional[Callable[[str], Classification]]:
+    """Import an extra classifier given as "module:function" (e.g. a small local model)"""
+
+    if not path:
+        return None
+    module_name, _, attribute = path.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError) as e:
+        print(f"Warning: could not load fast-path classifier {path}: {e}")
+        return None
+
+
+class FastPathRouter:
+    """
+    Decides whether a task can skip the planning LLM
+
+    The heuristic classifier runs first; an optional pluggable classifier
+    (FAST_PATH_CLASSIFIER) is consulted when the rules have no opinion.
+    """
+
+    def __init__(self, classifier: Callable[[str], Classification] = None,
+                 min_confidence: float = None):
+        self.classifier = classifier or load_classifier(settings.fast_path_classifier)
+        self.min_confidence = min_confidence or settings.fast_path_min_confidence
+
+    def classify(self, description: str) -> Tuple[Classification, str]:
+        result = classify_heuristic(description)
+        if result is not None:
+            return result, "heuristic"
+        if self.classifier:
+            try:
+                return self.classifier(description), "plugin"
+            except Exception as e:
+                print(f"Warning: fast-path classifier failed: {e}")
+        return None, "none"
+
+    @staticmethod
+    def match_agent(category: str, agents: Sequence) -> Tuple[Optional[Any], float]:
+        """
+        Active agent best covering the category; ties go to the agent with the
+        fewest capabilities (the simplest one). Returns (agent, match score 0-1).
+        """
+
+        wanted = CATEGORY_CAPABILITIES.get(category, [])
+        best, best_key, best_score = None, None, 0.0
+        for agent in agents:
+            capabilities = set(agent.capabilities or [])
+            overlap = len(capabilities.intersection(wanted))
+            if not overlap:
+                continue
+            key = (overlap, -len(capabilities))
+            if best_key is None or key > best_key:
+                best, best_key, best_score = agent, key, overlap / len(wanted)
+        # Any matching capability is a solid signal; more overlap breaks ties only
+        return best, (0.95 + 0.05 * best_score) if best else 0.0
+
+    def route(self, description: str, agents: Sequence) -> Dict[str, Any]:
+        """
+        Routing decision for a task; includes a single-step ``plan`` when the
+        fast path is taken
+        """
+
+        classification, source = self.classify(description)
+        decision: Dict[str, Any] = {"route": "planner", "classifier": source}
+
+        if classification is None:
+            decision["reason"] = "no confident classification"
+            return decision
+
+        category, confidence, reason = classification
+        decision.update({"category": category, "reason": reason})
+
+        if category not in CATEGORY_CAPABILITIES:
+            decision["confidence"] = round(confidence, 3)
+            return decision
+
+        agent, match_score = self.match_agent(category, agents)
+        confidence = confidence * match_score
+        decision["confidence"] = round(confidence, 3)
+
+        if agent is None:
+            decision["reason"] = f"{reason}; no active agent with {category} capabilities"
+            return decision
+        if confidence < self.min_confidence:
+            decision["reason"] = f"{reason}; confidence below {self.min_confidence}"
+            return decision
+
+        decision.update({"route": "fast_path", "agent_id": agent.id, "agent_name": agent.name})
+        decision["plan"] = {
+            "steps": [{
+                "step_number": 1,
+                "description": description,
+                "agent_id": agent.id,
+                "agent_name": agent.name,
+                "dependencies": [],
+                "expected_output": f"Direct answer ({category})"
+            }],
+            "estimated_duration": "< 5 seconds",
+            "complexity": "low"
+        }
+        return decision
+
+
+_router: Optional[FastPathRouter] = None
+
+
+def get_fast_path_router() -> FastPathRouter:
+    """Process-wide router"""
+
+    global _router
+    if _router is None:
+        _router = FastPathRouter()
+    return _router
@@ -0,0 +1,135 @@
+"""
+Plan Coalescer Module
+Collects planning requests that arrive close together and plans them with a
+single LLM call, sending the agent catalog once per batch
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+from orchestrator.plan_repair import PlanRepairer, PlanValidationError, extract_json
+from orchestrator.planning_prompt import batch_planning_messages
+from orchestrator.agent_stats import agent_stats
+from services.agent_index import agent_index
+from services.llm_gateway import get_llm_gateway, PRIORITY_HIGH
+from services.plan_cache import roster_fingerprint
+from config import get_settings
+
+settings = get_settings()
+
+
+class PlanningCoalescer:
+    """
+    Micro-batches planning requests
+
+    Requests against the same agent roster wait up to ``window_ms`` (or until
+    ``max_batch`` have arrived) and are planned together. ``plan`` returns
+    None when the task should be planned on its own: it was alone in its
+    window, or the batched answer had no usable plan for it.
+    """
+
+    def __init__(self, window_ms: float = None, max_batch: int = None):
+        self.window = (window_ms if window_ms is not None else settings.plan_batch_window_ms) / 1000.0
+        self.max_batch = max(2, max_batch or settings.plan_batch_max_size)
+        self.llm = get_llm_gateway().bind(temperature=0.2, priority=PRIORITY_HIGH)
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._flushes = set()
+        self.batches = 0
+        self.batched_requests = 0
+        self.unbatched_requests = 0
+
+    async def plan(self, task_description: str, agents: Sequence) -> Optional[Dict[str, Any]]:
+        key = roster_fingerprint(agents)
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((task_description, future))
+
+        if len(batch) >= self.max_batch:
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+            self._start_flush(key, agents)
+        elif len(batch) == 1:
+            self._timers[key] = asyncio.create_task(self._flush_later(key, agents))
+
+        return await future
+
+    async def _flush_later(self, key: str, agents: Sequence):
+        await asyncio.sleep(self.window)
+        self._timers.pop(key, None)
+        self._start_flush(key, agents)
+
+    def _start_flush(self, key: str, agents: Sequence):
+        requests = self._pending.pop(key, [])
+        flush = asyncio.create_task(self._flush(requests, list(agents)))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, requests: List[Tuple[str, asyncio.Future]], agents: List):
+        waiting = [(description, future) for description, future in requests if not future.done()]
+        if len(waiting) < 2:
+            self.unbatched_requests += len(waiting)
+            self._resolve(waiting, {})
+            return
+
+        tasks = {f"r{number}": description for number, (description, _) in enumerate(waiting, start=1)}
+        plans = {}
+        try:
+            catalog = self._catalog(tasks, agents)
+            response = await self.llm.ainvoke(batch_planning_messages(
+                tasks, catalog, agent_stats.hints(agent.id for agent in catalog)
+            ))
+            document = extract_json(response.content)
+            plans = document.get("plans") if isinstance(document, dict) else None
+            if not isinstance(plans, dict):
+                raise PlanValidationError("the response has no 'plans' object")
+        except Exception as e:
+            # Everyone plans on their own instead
+            print(f"Warning: batched planning of {len(waiting)} tasks failed: {e}")
+            plans = {}
+
+        self.batches += 1
+        self.batched_requests += len(waiting)
+
+        results = {}
+        for (request_id, description), (_, future) in zip(tasks.items(), waiting):
+            try:
+                results[future] = PlanRepairer(agents, description).repair(plans.get(request_id))
+            except PlanValidationError:
+                results[future] = None
+        self._resolve(waiting, results)
+
+    @staticmethod
+    def _resolve(requests: List[Tuple[str, asyncio.Future]], results: Dict[asyncio.Future, Any]):
+        for _, future in requests:
+            if not future.done():
+                future.set_result(results.get(future))
+
+    @staticmethod
+    def _catalog(tasks: Dict[str, str], agents: List) -> List:
+        """Union of the agents shortlisted for each task, in first-seen order"""
+
+        selected = {}
+        for description in tasks.values():
+            for agent in agent_index.shortlist(description, agents, settings.planner_agent_top_k):
+                selected.setdefault(agent.id, agent)
+        return list(selected.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "unbatched_requests": self.unbatched_requests,
+            "waiting": sum(len(batch) for batch in self._pending.values())
+        }
+
+
+_coalescer: Optional[PlanningCoalescer] = None
+
+
+def get_plan_coalescer() -> PlanningCoalescer:
+    """Process-wide coalescer"""
+
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = PlanningCoalescer()
+    return _coalescer
@@ -0,0 +1,247 @@
+"""
+Plan Repair Module
+Extracts the plan JSON from an LLM response, validates it and fixes common
+mistakes (unknown agents, missing step numbers, dangling dependencies)
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import re
+from models.agent import AgentType
+from orchestrator.step_scheduler import StepGraph, DependencyCycleError
+from services.agent_index import agent_index
+
+FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+COMPLEXITY_LEVELS = ("low", "medium", "high")
+
+
+class PlanValidationError(ValueError):
+    """Raised when a response cannot be turned into a usable plan"""
+
+
+def _balanced_objects(text: str):
+    """Top-level ``{...}`` spans of ``text``, ignoring braces inside strings"""
+
+    depth, start, in_string, escaped = 0, None, False, False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start:index + 1]
+
+
+def extract_json(text: str) -> Any:
+    """
+    The plan document in an LLM response
+
+    Accepts bare JSON, fenced code blocks and JSON surrounded by prose (the
+    largest parseable top-level object wins).
+    """
+
+    text = (text or "").strip()
+    candidates = [text] + [match.strip() for match in FENCE.findall(text)]
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+
+    for candidate in sorted(_balanced_objects(text), key=len, reverse=True):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+
+    raise PlanValidationError("no JSON object found in the response")
+
+
+def _key(name: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name or "").lower())
+
+
+class PlanRepairer:
+    """
+    Validates plans against the active agents and repairs what it can
+
+    Every change is recorded in ``repairs`` so bad planner output stays visible.
+    """
+
+    def __init__(self, agents: Sequence, task_description: str = ""):
+        self.agents = list(agents)
+        self.by_id = {agent.id: agent for agent in self.agents}
+        self.by_name = {_key(agent.name): agent for agent in self.agents}
+        self.task_description = task_description
+        self.repairs: List[str] = []
+
+    def fallback_agent(self, description: str = None):
+        """
+        Most relevant agent for a description; without any relevant agent the
+        cheapest kind (API agents, then fewest capabilities) is used
+        """
+
+        if not self.agents:
+            return None
+        agent_index.sync(self.agents)
+        scores = agent_index.score(description or self.task_description, list(self.by_id))
+        return min(self.agents, key=lambda agent: (
+            -scores.get(agent.id, 0.0),
+            agent.agent_type != AgentType.API,
+            len(agent.capabilities or []),
+            agent.id
+        ))
+
+    def repair_agent(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """Point the step at an active agent (by id, then by name, then by relevance)"""
+
+        agent_id = step.get("agent_id")
+        if isinstance(agent_id, str) and agent_id.isdigit():
+            agent_id = int(agent_id)
+
+        agent = self.by_id.get(agent_id) if isinstance(agent_id, int) else None
+        if agent is None:
+            agent = self.by_name.get(_key(step.get("agent_name")))
+            if agent is None:
+                agent = self.by_name.get(_key(agent_id))
+            reason = "matched by name"
+            if agent is None:
+                agent = self.fallback_agent(step.get("description"))
+                reason = "chosen by relevance"
+            if agent is not None:
+                requested = step.get("agent_id", step.get("agent_name"))
+                self.repairs.append(
+                    f"step {step.get('step_number')}: "
+                    f"{'unknown agent ' + repr(requested) if requested is not None else 'no agent'} "
+                    f"-> {agent.name} ({reason})"
+                )
+
+        if agent is not None:
+            step["agent_id"] = agent.id
+            step["agent_name"] = agent.name
+        return step
+
+    def repair(self, plan: Any) -> Dict[str, Any]:
+        """A valid plan built from ``plan``; raises PlanValidationError if nothing usable is left"""
+
+        if isinstance(plan, list):
+            plan = {"steps": plan}
+            self.repairs.append("wrapped a bare list of steps")
+        if not isinstance(plan, dict):
+            raise PlanValidationError("the plan is not a JSON object")
+        if not isinstance(plan.get("steps"), list):
+            raise PlanValidationError("the plan has no 'steps' list")
+
+        steps = []
+        for position, step in enumerate(plan["steps"], start=1):
+            if not isinstance(step, dict) or not str(step.get("description") or "").strip():
+                self.repairs.append(f"dropped step #{position} without a description")
+                continue
+            steps.append(dict(step))
+        if not steps:
+            raise PlanValidationError("the plan has no usable steps")
+
+        self._renumber(steps)
+        for step in steps:
+            self.repair_agent(step)
+        self._repair_dependencies(steps)
+
+        repaired = {
+            **plan,
+            "steps": steps,
+            "estimated_duration": plan.get("estimated_duration") or "unknown",
+        }
+        if repaired.get("complexity") not in COMPLEXITY_LEVELS:
+            repaired["complexity"] = "medium"
+        if self.repairs:
+            repaired["repairs"] = list(self.repairs)
+        return repaired
+
+    def _renumber(self, steps: List[Dict[str, Any]]):
+        """Give every step a unique positive step number, keeping valid ones"""
+
+        numbers = [step.get("step_number") for step in steps]
+        valid = all(isinstance(n, int) and not isinstance(n, bool) and n > 0 for n in numbers)
+        if valid and len(set(numbers)) == len(numbers):
+            return
+
+        mapping = {}
+        for position, step in enumerate(steps, start=1):
+            old = step.get("step_number")
+            if isinstance(old, str) and old.isdigit():
+                old = int(old)
+            if isinstance(old, int) and old not in mapping:
+                mapping[old] = position
+            step["step_number"] = position
+        for step in steps:
+            # References to steps that had no usable number are taken as positions
+            step["dependencies"] = [
+                mapping.get(dep, dep) for dep in StepGraph.normalize_dependencies(step.get("dependencies"))
+                if dep in mapping or 1 <= dep <= len(steps)
+            ]
+        self.repairs.append("renumbered steps")
+
+    def _repair_dependencies(self, steps: List[Dict[str, Any]]):
+        """Drop references to unknown steps; break cycles by keeping only backward references"""
+
+        numbers = {step["step_number"] for step in steps}
+        for step in steps:
+            declared = StepGraph.normalize_dependencies(step.get("dependencies"))
+            deps = sorted({dep for dep in declared if dep in numbers and dep != step["step_number"]})
+            if len(deps) != len(set(declared)):
+                self.repairs.append(f"step {step['step_number']}: dropped dangling dependencies")
+            step["dependencies"] = deps
+
+        try:
+            StepGraph([_StepView(step) for step in steps])
+        except DependencyCycleError:
+            for step in steps:
+                step["dependencies"] = [dep for dep in step["dependencies"] if dep < step["step_number"]]
+            self.repairs.append("removed forward dependencies to break a cycle")
+
+    def fallback_plan(self) -> Dict[str, Any]:
+        """Single step on the most suitable agent, used when no plan can be recovered"""
+
+        agent = self.fallback_agent()
+        return {
+            "steps": [{
+                "step_number": 1,
+                "description": self.task_description,
+                "agent_id": agent.id if agent else None,
+                "agent_name": agent.name if agent else "unknown",
+                "dependencies": [],
+                "expected_output": "Task completion"
+            }],
+            "estimated_duration": "unknown",
+            "complexity": "medium",
+            "repairs": list(self.repairs) + ["fell back to a single-step plan"]
+        }
+
+
+class _StepView:
+    """Plan step dict seen as a TaskStep for the cycle check"""
+
+    def __init__(self, step: Dict[str, Any]):
+        self.step_number = step["step_number"]
+        self.input_data = {"dependencies": step["dependencies"]}
+
+
+def parse_plan(text: str, agents: Sequence,
+               task_description: str = "") -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Extract and repair a plan; returns (plan, None) or (None, reason it is unusable)"""
+
+    repairer = PlanRepairer(agents, task_description)
+    try:
+        return repairer.repair(extract_json(text)), None
+    except PlanValidationError as e:
+        return None, str(e)
@@ -0,0 +1,80 @@
+"""
+Plan Stream Module
+Incremental parser that pulls complete steps out of a plan while the LLM is
+still writing it
+"""
+from typing import Any, Dict, List
+import json
+import re
+
+STEPS_ARRAY = re.compile(r'"steps"\s*:\s*\[')
+
+
+class StreamingStepParser:
+    """
+    Feed it chunks of the planner's JSON output; each call returns the
+    entries of the ``steps`` array that were completed by that chunk
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._position = None  # Next character to scan inside the steps array
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+        self.finished = False  # The steps array has been closed
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
+        if self.finished:
+            return []
+
+        if self._position is None:
+            match = STEPS_ARRAY.search(self.text)
+            if not match:
+                return []
+            self._position = match.end()
+
+        steps = []
+        text = self.text
+        index = self._position
+        while index < len(text):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the steps array
+                    self.finished = True
+                    index += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    step = self._load(text[self._object_start:index + 1])
+                    if step is not None:
+                        steps.append(step)
+                    self._object_start = None
+            index += 1
+
+        self._position = index
+        return steps
+
+    @staticmethod
+    def _load(fragment: str):
+        try:
+            step = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return step if isinstance(step, dict) else None
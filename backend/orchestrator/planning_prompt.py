@@ -0,0 +1,132 @@
+"""
+Planning Prompt Module
+Prompts for the planning LLM, for a single task or a batch of tasks
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import json
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+SYSTEM_PROMPT = "You are an expert task planning AI. Always respond with valid JSON."
+
+PLANNING_GUIDELINES = """CRITICAL ROUTING GUIDELINES:
+
+1. ALWAYS prefer the SIMPLEST agent that can complete the task
+
+2. Use DataAnalyzer (API agent) for:
+   - Simple calculations (1+1, 5*10, math operations)
+   - Quick facts and definitions (What is X?, Define Y)
+   - Short text processing and summarization
+   - Data analysis tasks
+   - Any task completable in under 5 seconds
+   - Single-step queries
+
+3. Use ResearchAgent (A2A/LangGraph) for:
+   - Multi-step reasoning and research
+   - Complex analysis requiring multiple sources
+   - Strategic planning and recommendations
+   - Tasks requiring deep investigation
+   - Workflows with multiple stages
+
+4. Task Complexity Assessment:
+   - Simple (1 step, < 5 sec) → DataAnalyzer
+   - Medium (2-3 steps, < 15 sec) → DataAnalyzer or light planning
+   - Complex (4+ steps, > 15 sec) → ResearchAgent with full workflow
+
+EXAMPLES:
+- "1+1" → DataAnalyzer (simple calculation)
+- "What is AI?" → DataAnalyzer (simple definition)
+- "Summarize this text" → DataAnalyzer (simple processing)
+- "Research AI impact on healthcare and create strategic recommendations" → ResearchAgent (complex research)
+- "Analyze quarterly sales data and identify trends" → DataAnalyzer (data analysis)
+
+Create a plan with these elements:
+1. Assess task complexity first
+2. Break down the task into sequential steps (keep it simple if possible)
+3. Assign each step to the MOST APPROPRIATE agent (prefer simpler agents)
+4. Define inputs and expected outputs for each step
+5. Identify dependencies between steps (list the step_numbers each step needs;
+   steps without dependencies on each other will run in parallel)"""
+
+PLAN_FORMAT = """{
+    "steps": [
+        {
+            "step_number": 1,
+            "description": "...",
+            "agent_id": 1,
+            "agent_name": "...",
+            "dependencies": [],
+            "expected_output": "..."
+        }
+    ],
+    "estimated_duration": "...",
+    "complexity": "low|medium|high"
+}"""
+
+
+STATS_GUIDELINE = """Agents with "stats" list their recent median (p50_ms) and p95 latency and
+error rate. Between agents that fit a step equally well, prefer the faster and
+more reliable one."""
+
+
+def agent_catalog(agents: Sequence, hints: Optional[Dict[int, Dict[str, Any]]] = None) -> str:
+    """Compact JSON listing of agents for a prompt, with performance stats where known"""
+
+    catalog = []
+    for agent in agents:
+        entry = {
+            "id": agent.id,
+            "name": agent.name,
+            "type": agent.agent_type,
+            "capabilities": agent.capabilities
+        }
+        if hints and agent.id in hints:
+            entry["stats"] = hints[agent.id]
+        catalog.append(entry)
+    return json.dumps(catalog, separators=(",", ":"))
+
+
+def _guidelines(hints: Optional[Dict[int, Dict[str, Any]]]) -> str:
+    return f"{PLANNING_GUIDELINES}\n\n{STATS_GUIDELINE}" if hints else PLANNING_GUIDELINES
+
+
+def planning_messages(task_description: str, agents: Sequence,
+                      hints: Optional[Dict[int, Dict[str, Any]]] = None) -> List[BaseMessage]:
+    """Prompt for planning one task"""
+
+    prompt = f"""You are a task planning AI. Given a task description and available agents,
+create a detailed execution plan.
+
+Task: {task_description}
+
+Available Agents:
+{agent_catalog(agents, hints)}
+
+{_guidelines(hints)}
+
+Return your response as JSON with this structure:
+{PLAN_FORMAT}
+"""
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
+
+
+def batch_planning_messages(tasks: Dict[str, str], agents: Sequence,
+                            hints: Optional[Dict[int, Dict[str, Any]]] = None) -> List[BaseMessage]:
+    """Prompt for planning several independent tasks (request id -> description) at once"""
+
+    prompt = f"""You are a task planning AI. Given several independent tasks and the available
+agents, create a separate execution plan for each task.
+
+Tasks (by request id):
+{json.dumps(tasks, indent=1)}
+
+Available Agents:
+{agent_catalog(agents, hints)}
+
+{_guidelines(hints)}
+
+Return your response as JSON with one plan per request id:
+{{"plans": {{"<request id>": <plan>, ...}}}}
+where each <plan> has this structure:
+{PLAN_FORMAT}
+"""
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
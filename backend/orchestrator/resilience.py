@@ -0,0 +1,175 @@
+"""
+Resilience Module
+Per-endpoint circuit breakers and hedged requests for agent calls
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+from collections import deque
+import asyncio
+import time
+from config import get_settings
+
+settings = get_settings()
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when an agent endpoint's circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after too many failures among the recent calls; open ->
+    half-open after a cool-down, letting a few probe calls through; a probe
+    success closes the circuit, a probe failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = None, window_size: int = None,
+                 reset_seconds: float = None, half_open_max_calls: int = None):
+        self.failure_threshold = failure_threshold or settings.circuit_failure_threshold
+        self.reset_seconds = reset_seconds or settings.circuit_reset_seconds
+        self.half_open_max_calls = half_open_max_calls or settings.circuit_half_open_max_calls
+        self.outcomes = deque(maxlen=window_size or settings.circuit_window_size)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.probe_started_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now (reserves a probe slot when half-open)"""
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) must not block forever
+            probe_stale = time.monotonic() - self.probe_started_at >= self.reset_seconds
+            if self.half_open_calls >= self.half_open_max_calls and not probe_stale:
+                return False
+            if probe_stale:
+                self.half_open_calls = 0
+            self.half_open_calls += 1
+            self.probe_started_at = time.monotonic()
+
+        return True
+
+    def record_success(self):
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.outcomes.clear()
+        self.outcomes.append(True)
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self.outcomes.append(False)
+        if self.outcomes.count(False) >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_failures": self.outcomes.count(False),
+            "recent_calls": len(self.outcomes)
+        }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for one endpoint"""
+
+    def __init__(self, window_size: int = 200):
+        self.samples = deque(maxlen=window_size)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class EndpointHealth:
+    """Circuit breakers and latency trackers keyed by agent endpoint"""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        key = endpoint.rstrip("/")
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker()
+        return self.breakers[key]
+
+    def latency(self, endpoint: str) -> LatencyTracker:
+        key = endpoint.rstrip("/")
+        if key not in self.latencies:
+            self.latencies[key] = LatencyTracker()
+        return self.latencies[key]
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """p95-based delay before hedging, None until enough samples exist"""
+
+        tracker = self.latency(endpoint)
+        if len(tracker.samples) < settings.hedge_min_samples:
+            return None
+        return tracker.percentile(settings.hedge_percentile)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: breaker.snapshot() for endpoint, breaker in self.breakers.items()}
+
+
+async def hedged(call: Callable[[int], Awaitable[Dict[str, Any]]], delay: Optional[float],
+                 is_failure: Callable[[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    """
+    Run ``call(0)``; if it has not answered after ``delay`` seconds, start a
+    duplicate ``call(1)`` and return whichever succeeds first (the other is
+    cancelled). Only use for idempotent calls; the attempt number lets the
+    duplicate keep per-run state apart from the first call.
+    """
+
+    if delay is None:
+        return await call(0)
+
+    attempts = {asyncio.ensure_future(call(0))}
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if done:
+            return done.pop().result()
+
+        attempts.add(asyncio.ensure_future(call(1)))
+        result = None
+        error = None
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                result = future.result()
+                if not is_failure(result):
+                    return result
+        # Every attempt failed: prefer a failure result over an exception
+        if result is None:
+            raise error
+        return result
+    finally:
+        for future in attempts:
+            future.cancel()
+
+
+endpoint_health = EndpointHealth()
@@ -0,0 +1,236 @@
+"""
+Step Result Cache
+Content-addressed cache of agent step results, keyed by agent, agent config
+version, step description and the dependency outputs the step consumes
+"""
+from typing import Dict, Any, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from orchestrator.agent_adapters import AdapterCache
+from concurrency import run_blocking
+from config import get_settings
+
+settings = get_settings()
+
+
+class StepCache(ABC):
+    """Base class: key derivation and hit/miss accounting"""
+
+    backend = "none"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(agent, description: str, dependency_outputs: Dict[str, Any]) -> str:
+        """Hash of everything that determines a step's result"""
+
+        payload = json.dumps({
+            "agent_id": agent.id,
+            "config_version": AdapterCache.config_version(agent.config or {}),
+            "description": description,
+            "inputs": dependency_outputs
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float):
+        await self._set(key, value, ttl)
+        self.writes += 1
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored value for ``key``, None when missing or expired"""
+
+    @abstractmethod
+    async def _set(self, key: str, value: Dict[str, Any], ttl: float):
+        """Store ``value`` under ``key`` for ``ttl`` seconds"""
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions
+        }
+
+    async def close(self):
+        pass
+
+
+class MemoryStepCache(StepCache):
+    """In-process LRU with per-entry TTL"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: Dict[str, Any], ttl: float):
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class SQLiteStepCache(StepCache):
+    """
+    File-backed LRU shared by every process on the host (API and workers)
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_entries: int):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS step_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS step_cache_accessed ON step_cache (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection committed and closed on exit"""
+
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM step_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM step_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE step_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def _set_sync(self, key: str, value: Dict[str, Any], ttl: float) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO step_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now + ttl, now)
+            )
+            conn.execute("DELETE FROM step_cache WHERE expires_at < ?", (now,))
+            evicted = conn.execute(
+                "DELETE FROM step_cache WHERE key IN ("
+                " SELECT key FROM step_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            return max(evicted, 0)
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self._get_sync, key)
+
+    async def _set(self, key: str, value: Dict[str, Any], ttl: float):
+        self.evictions += await run_blocking(self._set_sync, key, value, ttl)
+
+
+class RedisStepCache(StepCache):
+    """
+    Redis-backed cache shared across hosts; TTL via key expiry, LRU via the
+    server's maxmemory-policy (allkeys-lru / volatile-lru)
+    """
+
+    backend = "redis"
+    PREFIX = "orchestrator:step_cache:"
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        import redis.asyncio as aioredis  # Optional dependency
+
+        self.redis = aioredis.from_url(redis_url)
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self.PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def _set(self, key: str, value: Dict[str, Any], ttl: float):
+        await self.redis.set(self.PREFIX + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+_cache: Optional[StepCache] = None
+
+
+def get_step_cache() -> Optional[StepCache]:
+    """The configured step cache, or None when caching is disabled"""
+
+    global _cache
+    if _cache is None and settings.step_cache_backend != "none":
+        if settings.step_cache_backend == "memory":
+            _cache = MemoryStepCache(settings.step_cache_max_entries)
+        elif settings.step_cache_backend == "sqlite":
+            _cache = SQLiteStepCache(settings.step_cache_path, settings.step_cache_max_entries)
+        elif settings.step_cache_backend == "redis":
+            _cache = RedisStepCache(settings.redis_url)
+        else:
+            raise ValueError(f"Unknown step cache backend: {settings.step_cache_backend}")
+    return _cache
+
+
+def merge_cache_stats(reports) -> Dict[str, Any]:
+    """Sum hit/miss counters reported by several processes"""
+
+    merged = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "processes": 0}
+    for report in reports:
+        if not report:
+            continue
+        merged["backend"] = report.get("backend")
+        for field in ("hits", "misses", "writes", "evictions"):
+            merged[field] += report.get(field, 0)
+        merged["processes"] += 1
+
+    lookups = merged["hits"] + merged["misses"]
+    merged["hit_rate"] = round(merged["hits"] / lookups, 4) if lookups else 0.0
+    return merged
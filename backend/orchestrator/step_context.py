@@ -0,0 +1,102 @@
+"""
+Step Context Module
+Selects which earlier step outputs a step receives and keeps them within
+optional size budgets
+"""
+from typing import Any, Dict, Iterable, Optional
+import json
+
+# Fields that usually hold an agent's actual answer, in order of preference
+ANSWER_KEYS = ("result", "response", "content", "output", "answer", "summary", "text")
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Keep the head and tail of a long text, marking what was cut"""
+
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 2 // 3
+    tail = max(max_chars - head, 0)
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... [{omitted} characters omitted] ...\n{text[len(text) - tail:] if tail else ''}"
+
+
+def find_answer(output: Any, depth: int = 3) -> Optional[str]:
+    """First answer-like string in a (nested) agent response"""
+
+    if isinstance(output, str):
+        return output
+    if not isinstance(output, dict) or depth == 0:
+        return None
+    for key in ANSWER_KEYS:
+        if key in output:
+            found = find_answer(output[key], depth - 1)
+            if found:
+                return found
+    return None
+
+
+def compact_output(output: Any, max_chars: int) -> Any:
+    """
+    Shrink a step output to about ``max_chars`` characters of JSON
+
+    Keeps only the answer text (trimmed to fit) and drops envelopes such as
+    traces and intermediate state; falls back to truncated raw JSON.
+    """
+
+    if not max_chars or _size(output) <= max_chars:
+        return output
+
+    answer = find_answer(output)
+    if answer is not None:
+        return {
+            "result": truncate_text(answer, max_chars),
+            "truncated": True,
+            "original_chars": _size(output)
+        }
+
+    return {
+        "raw": truncate_text(json.dumps(output, default=str), max_chars),
+        "truncated": True,
+        "original_chars": _size(output)
+    }
+
+
+def build_step_context(available: Dict[str, Any],
+                       dependencies: Optional[Iterable[int]],
+                       mode: str = "dependencies",
+                       max_chars_per_output: int = 0,
+                       max_total_chars: int = 0) -> Dict[str, Any]:
+    """
+    Context for one step
+
+    ``available`` maps "step_<n>" to completed outputs. In "dependencies" mode
+    only the step's declared dependencies are passed; "full" passes everything.
+    Budgets of 0 disable trimming.
+    """
+
+    if mode == "full" or dependencies is None:
+        selected = dict(available)
+    else:
+        selected = {
+            f"step_{number}": available[f"step_{number}"]
+            for number in sorted(dependencies)
+            if f"step_{number}" in available
+        }
+
+    if not selected:
+        return selected
+
+    per_output = max_chars_per_output
+    if max_total_chars:
+        share = max_total_chars // len(selected)
+        per_output = min(per_output, share) if per_output else share
+
+    if per_output:
+        selected = {key: compact_output(value, per_output) for key, value in selected.items()}
+
+    return selected
@@ -0,0 +1,92 @@
+"""
+Step Scheduling Module
+Builds a dependency graph from planned task steps and orders them for execution
+"""
+from typing import Any, Dict, Iterable, List, Set
+import re
+
+
+class DependencyCycleError(ValueError):
+    """Raised when task step dependencies form a cycle"""
+
+
+class StepGraph:
+    """
+    Directed acyclic graph of task steps keyed by step number
+    """
+
+    def __init__(self, steps: Iterable[Any]):
+        self.steps = {step.step_number: step for step in steps}
+        self.dependencies: Dict[int, Set[int]] = {}
+        self.dependents: Dict[int, Set[int]] = {number: set() for number in self.steps}
+
+        for number, step in self.steps.items():
+            declared = self.normalize_dependencies(
+                (step.input_data or {}).get("dependencies", [])
+            )
+            # Dependencies on unknown steps (or on itself) cannot be satisfied, drop them
+            deps = {dep for dep in declared if dep in self.steps and dep != number}
+            self.dependencies[number] = deps
+            for dep in deps:
+                self.dependents[dep].add(number)
+
+        self.order = self._topological_order()
+
+    @staticmethod
+    def normalize_dependencies(raw: Any) -> List[int]:
+        """Convert planner dependency references (1, "1", "step_1") to step numbers"""
+
+        if raw is None:
+            return []
+        if not isinstance(raw, (list, tuple, set)):
+            raw = [raw]
+
+        numbers = []
+        for item in raw:
+            if isinstance(item, bool):
+                continue
+            if isinstance(item, int):
+                numbers.append(item)
+            elif isinstance(item, dict) and "step_number" in item:
+                numbers.extend(StepGraph.normalize_dependencies([item["step_number"]]))
+            elif isinstance(item, str):
+                match = re.search(r"\d+", item)
+                if match:
+                    numbers.append(int(match.group()))
+        return numbers
+
+    def _topological_order(self) -> List[int]:
+        """Kahn's algorithm, ties broken by step number"""
+
+        remaining = {number: len(deps) for number, deps in self.dependencies.items()}
+        ready = sorted(number for number, count in remaining.items() if count == 0)
+        order = []
+
+        while ready:
+            number = ready.pop(0)
+            order.append(number)
+            for dependent in sorted(self.dependents[number]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+            ready.sort()
+
+        if len(order) != len(self.steps):
+            cyclic = sorted(number for number in self.steps if number not in order)
+            raise DependencyCycleError(
+                f"Circular dependencies between steps {cyclic}"
+            )
+
+        return order
+
+    def descendants(self, step_number: int) -> Set[int]:
+        """All steps that transitively depend on the given step"""
+
+        found = set()
+        stack = [step_number]
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    stack.append(dependent)
+        return found
@@ -0,0 +1,149 @@
+"""
+Task Events Module
+Fan-out of task progress events (step status changes, relayed agent progress
+and tokens) to streaming clients, across processes through Redis when enabled
+"""
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+from contextlib import contextmanager
+import asyncio
+import json
+from config import get_settings
+
+settings = get_settings()
+
+
+class RedisEventRelay:
+    """
+    Optional Redis pub/sub channel for task events
+
+    Queue workers execute tasks in other processes; they publish here and the
+    API process listens and hands the events to its local subscribers.
+    """
+
+    CHANNEL_PREFIX = "orchestrator:task_events:"
+
+    def __init__(self, redis_url: str = None):
+        import redis.asyncio as aioredis  # Optional dependency
+
+        self.redis = aioredis.from_url(redis_url or settings.redis_url)
+        self._pending: Set[asyncio.Task] = set()
+
+    def publish(self, task_id: int, event: Dict[str, Any]):
+        """Send an event without waiting for Redis"""
+
+        send = asyncio.get_running_loop().create_task(self._send(task_id, event))
+        self._pending.add(send)
+        send.add_done_callback(self._pending.discard)
+
+    async def _send(self, task_id: int, event: Dict[str, Any]):
+        try:
+            await self.redis.publish(f"{self.CHANNEL_PREFIX}{task_id}", json.dumps(event, default=str))
+        except Exception as e:
+            print(f"Warning: could not publish task event for task {task_id}: {e}")
+
+    async def listen(self, deliver: Callable[[int, Dict[str, Any]], None]):
+        """Pass every published event to ``deliver`` until cancelled"""
+
+        pubsub = self.redis.pubsub()
+        await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                deliver(int(channel[len(self.CHANNEL_PREFIX):]), json.loads(message["data"]))
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.redis.aclose()
+
+
+def get_event_relay() -> Optional[RedisEventRelay]:
+    """Redis relay if enabled and importable, otherwise None (events stay in-process)"""
+
+    if not settings.task_queue_use_redis:
+        return None
+    try:
+        return RedisEventRelay()
+    except ImportError:
+        print("Warning: TASK_QUEUE_USE_REDIS is set but the redis package is not installed")
+        return None
+
+
+class TaskEventBus:
+    """
+    Subscribers get a queue per task; events for tasks nobody watches are
+    dropped.
+
+    Without a relay only events of tasks executed in this process are seen.
+    With one, every process publishes through it and the process that serves
+    streams (``start_listener``) receives them from it, its own included.
+    """
+
+    def __init__(self, max_queue: int = 1000, relay: Optional[RedisEventRelay] = None):
+        self.max_queue = max_queue
+        self.relay = relay
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def has_subscribers(self, task_id: int) -> bool:
+        return bool(self._subscribers.get(task_id))
+
+    def publish(self, task_id: int, event: Dict[str, Any]):
+        if self.relay is not None:
+            self.relay.publish(task_id, event)
+        else:
+            self._deliver(task_id, event)
+
+    def _deliver(self, task_id: int, event: Dict[str, Any]):
+        for queue in self._subscribers.get(task_id, ()):
+            if queue.full():
+                # A slow client loses the oldest events rather than stalling execution
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def start_listener(self):
+        """Receive relayed events for local subscribers (no-op without a relay)"""
+
+        if self.relay is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                await self.relay.listen(self._deliver)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: task event listener failed, reconnecting: {e}")
+                await asyncio.sleep(settings.task_stream_poll_seconds)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self.relay is not None:
+            await self.relay.close()
+
+    @contextmanager
+    def subscribe(self, task_id: int) -> Iterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(task_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[task_id]
+
+
+# Global event bus
+task_events = TaskEventBus(relay=get_event_relay())
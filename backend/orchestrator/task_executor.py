@@ -2,107 +2,545 @@
 Task Execution Module
 Executes planned tasks by coordinating with agents
 """
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional, Set
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.task import Task, TaskStep, TaskStatus
 from models.agent import Agent, AgentType
 from models.memory import Message, ConversationContext
 from agents.a2a_protocol import A2AProtocolHandler
+from orchestrator.step_context import build_step_context
+from orchestrator.step_scheduler import StepGraph, DependencyCycleError
+from orchestrator.agent_adapters import adapter_cache
+from orchestrator.cancellation import cancellation_registry
+from orchestrator.admission import admission_controller
+from orchestrator.resilience import endpoint_health, hedged, CircuitOpenError
+from orchestrator.step_cache import get_step_cache
+from orchestrator.agent_stats import agent_stats, payload_size, is_failed_result
+from orchestrator.task_events import task_events
+from services.agent_registry import AgentRegistry
+from services.task_queue import TaskQueue
+from services.http_client_manager import get_http_client_manager
+from database import AsyncSessionLocal
+from config import get_settings
 import httpx
 import asyncio
+import time
 from datetime import datetime
 
+settings = get_settings()
+
 class TaskExecutor:
     """
     Executes tasks by coordinating with assigned agents
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
+        # Agents of the task being executed, loaded once up front. Steps run
+        # concurrently and must not share self.db (an AsyncSession allows only
+        # one operation at a time), so they read agents from here instead.
+        self._agents: Dict[int, Agent] = {}
         self.a2a_handlers = {}
+        self.task_id: Optional[int] = None
+        # Whether the planner may still put steps on the task's step feed, and
+        # items taken off it but not handled before the task stopped
+        self._feed_open = False
+        self._feed_backlog: list = []
     
-    async def execute_task(self, task_id: int) -> Dict[str, Any]:
-        """Execute a complete task"""
+    async def execute_task(self, task_id: int, step_feed: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
+        """
+        Execute a complete task
+
+        Steps are scheduled from their declared dependencies: independent steps
+        run concurrently (bounded by the task's parallelism cap) and each step
+        starts as soon as everything it depends on has completed.
+
+        With a ``step_feed`` (see ``TaskPlanner.stream_plan``) the plan is still
+        being written: step ids arrive on the feed and are scheduled as they
+        come, until ``None`` marks the end of the plan. If the task stops
+        before that, steps the planner still adds are marked cancelled.
+
+        Progress is published on ``task_events`` for streaming clients.
+        """
+        
+        self.task_id = task_id
+        self._feed_open = step_feed is not None
+        self._feed_backlog = []
+        result = await self._execute_task(task_id, step_feed)
         
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        status = result.get("status") or ("failed" if "error" in result else "completed")
+        task_events.publish(task_id, {"event": "task_finished", "status": status})
+        
+        if self._feed_open:
+            await self._drain_feed(step_feed)
+        
+        return result
+    
+    async def _execute_task(self, task_id: int, step_feed: Optional[asyncio.Queue]) -> Dict[str, Any]:
+        task = await self.db.get(Task, task_id)
         if not task:
             return {"error": f"Task {task_id} not found"}
         
+        if task.status == TaskStatus.CANCELLED:
+            # Cancelled while waiting in the queue
+            return {"status": "cancelled", "task_id": task_id}
+        
         # Update task status
         task.status = TaskStatus.IN_PROGRESS
-        self.db.commit()
+        await self.db.commit()
         
         # Get all task steps
-        steps = self.db.query(TaskStep).filter(
+        steps = list(await self.db.scalars(select(TaskStep).where(
             TaskStep.task_id == task_id
-        ).order_by(TaskStep.step_number).all()
+        ).order_by(TaskStep.step_number)))
+        
+        await self._load_agents(steps)
+        
+        try:
+            graph = StepGraph(steps)
+        except DependencyCycleError as e:
+            task.status = TaskStatus.FAILED
+            task.result = {"error": f"Invalid plan: {str(e)}"}
+            await self.db.commit()
+            return task.result
+        
+        feed_waiter = None
+        
+        options = task.meta_data or {}
+        max_parallel = max(1, int(options.get("max_parallel_steps") or settings.max_parallel_steps))
+        failure_policy = options.get("failure_policy") or settings.step_failure_policy
         
-        results = []
+        results = {}
+        errors = {}
         context = {}
+        pending = list(graph.order)
+        running = {}
         
+        # A task re-claimed from the queue keeps the steps that already finished
         for step in steps:
-            try:
-                step_result = await self.execute_step(step, context)
-                results.append(step_result)
+            if step.status == TaskStatus.COMPLETED:
+                results[step.step_number] = step.output_data
+                context[f"step_{step.step_number}"] = step.output_data
+                pending.remove(step.step_number)
+        
+        execution = asyncio.current_task()
+        cancellation_registry.register(task_id, execution)
+        
+        try:
+            while pending or running or self._feed_open:
+                # Launch every step whose dependencies are satisfied, up to the cap
+                for step_number in list(pending):
+                    if len(running) >= max_parallel:
+                        break
+                    
+                    step = graph.steps[step_number]
+                    deps = graph.dependencies[step_number]
+                    if self._feed_open:
+                        # Dependencies on steps that have not arrived yet still count
+                        deps = {
+                            dep for dep in StepGraph.normalize_dependencies(
+                                (step.input_data or {}).get("dependencies", [])
+                            )
+                            if dep != step_number
+                        }
+                    blocked_by = sorted(dep for dep in deps if dep in errors)
+                    
+                    if blocked_by:
+                        # Streamed steps that arrived after their dependency failed
+                        pending.remove(step_number)
+                        errors[step_number] = f"Skipped: depends on failed step(s) {blocked_by}"
+                        await self._mark_step(step, TaskStatus.CANCELLED, {"error": errors[step_number]})
+                        continue
+                    
+                    if deps.issubset(results):
+                        pending.remove(step_number)
+                        step.status = TaskStatus.IN_PROGRESS
+                        await self.db.commit()
+                        self._publish_step(step)
+                        # Each step sees the results that were available when it started
+                        running[asyncio.create_task(self.execute_step(
+                            step, dict(context),
+                            dependencies=deps,
+                            context_mode=options.get("context_mode"),
+                            agent_profile=options.get("agent_profile")
+                        ))] = step
                 
-                # Update context with step results
-                context[f"step_{step.step_number}"] = step_result
+                if not running and not self._feed_open:
+                    break
                 
-                # Update step status
-                step.status = TaskStatus.COMPLETED
-                step.output_data = step_result
-                step.completed_at = datetime.utcnow()
-                self.db.commit()
+                waiting = set(running)
+                if self._feed_open:
+                    if feed_waiter is None:
+                        feed_waiter = asyncio.ensure_future(step_feed.get())
+                    waiting.add(feed_waiter)
                 
-            except Exception as e:
-                step.status = TaskStatus.FAILED
-                step.output_data = {"error": str(e)}
-                self.db.commit()
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
                 
-                task.status = TaskStatus.FAILED
-                task.result = {"error": f"Failed at step {step.step_number}: {str(e)}"}
-                self.db.commit()
+                if feed_waiter in done:
+                    done.discard(feed_waiter)
+                    item, feed_waiter = feed_waiter.result(), None
+                    if item is None or isinstance(item, BaseException):
+                        # The planner is done with the feed
+                        self._feed_open = False
+                    
+                    if isinstance(item, asyncio.CancelledError):
+                        await self._abort_steps(running, pending, graph.steps, {"error": "Cancelled: planning was cancelled"})
+                        task.status = TaskStatus.CANCELLED
+                        task.result = {"status": "cancelled", "error": "Planning was cancelled"}
+                        await self.db.commit()
+                        return task.result
+                    
+                    if isinstance(item, BaseException):
+                        await self._abort_steps(running, pending, graph.steps, {"error": "Cancelled: planning failed"})
+                        task.status = TaskStatus.FAILED
+                        task.result = {"error": f"Planning failed: {str(item)}"}
+                        await self.db.commit()
+                        return task.result
+                    
+                    if item is not None:
+                        if any(step.id == item for step in steps):
+                            # Saved before this executor loaded the task's steps
+                            continue
+                        step = await self.db.get(TaskStep, item)
+                        steps.append(step)
+                        await self._load_agents([step])
+                        pending.append(step.step_number)
+                    
+                    try:
+                        graph = StepGraph(steps)
+                    except DependencyCycleError as e:
+                        await self._abort_steps(
+                            running, pending, {step.step_number: step for step in steps},
+                            {"error": "Cancelled: invalid plan"}
+                        )
+                        task.status = TaskStatus.FAILED
+                        task.result = {"error": f"Invalid plan: {str(e)}"}
+                        await self.db.commit()
+                        return task.result
+                    pending.sort(key=graph.order.index)
                 
-                return task.result
-        
-        # Task completed successfully
-        task.status = TaskStatus.COMPLETED
-        task.result = {
-            "status": "completed",
-            "steps": results,
-            "summary": self._generate_summary(results)
-        }
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        step_result = future.result()
+                    except Exception as e:
+                        errors[step.step_number] = str(e)
+                        await self._mark_step(step, TaskStatus.FAILED, {"error": str(e)})
+                        
+                        if failure_policy != "continue_on_error":
+                            await self._abort_steps(
+                                running, pending, graph.steps,
+                                {"error": f"Cancelled: step {step.step_number} failed"}
+                            )
+                            
+                            task.status = TaskStatus.FAILED
+                            task.result = {"error": f"Failed at step {step.step_number}: {str(e)}"}
+                            await self.db.commit()
+                            
+                            return task.result
+                        
+                        # Skip everything downstream now rather than as launch slots free up
+                        for number in sorted(graph.descendants(step.step_number)):
+                            if number in pending:
+                                pending.remove(number)
+                                errors[number] = f"Skipped: depends on failed step {step.step_number}"
+                                await self._mark_step(graph.steps[number], TaskStatus.CANCELLED, {"error": errors[number]})
+                        continue
+                    
+                    results[step.step_number] = step_result
+                    
+                    # Update context with step results
+                    context[f"step_{step.step_number}"] = step_result
+                    
+                    await self._mark_step(step, TaskStatus.COMPLETED, step_result)
+        except asyncio.CancelledError:
+            if not cancellation_registry.consume_request(task_id):
+                # Worker shutdown or lost lease: stop, and leave the steps for whoever resumes
+                await self._abort_steps(running, pending, graph.steps)
+                raise
+            
+            if hasattr(execution, "uncancel"):
+                execution.uncancel()
+            await self._abort_steps(running, pending, graph.steps, {"error": "Cancelled by request"})
+            
+            ordered_results = [results[number] for number in sorted(results)]
+            task.status = TaskStatus.CANCELLED
+            task.result = {
+                "status": "cancelled",
+                "steps": ordered_results,
+                "summary": self._generate_summary(ordered_results, total_steps=len(graph.steps))
+            }
+            task.completed_at = datetime.utcnow()
+            await self.db.commit()
+            
+            return task.result
+        finally:
+            if feed_waiter is not None:
+                if feed_waiter.done() and not feed_waiter.cancelled():
+                    self._feed_backlog.append(feed_waiter.result())
+                feed_waiter.cancel()
+            cancellation_registry.unregister(task_id, execution)
+        
+        ordered_results = [results[number] for number in sorted(results)]
+        
+        if errors:
+            # Only reachable with the continue_on_error policy
+            task.status = TaskStatus.FAILED
+            task.result = {
+                "status": "failed",
+                "steps": ordered_results,
+                "errors": {f"step_{number}": error for number, error in sorted(errors.items())},
+                "summary": self._generate_summary(ordered_results, total_steps=len(graph.steps))
+            }
+        else:
+            # Task completed successfully
+            task.status = TaskStatus.COMPLETED
+            task.result = {
+                "status": "completed",
+                "steps": ordered_results,
+                "summary": self._generate_summary(ordered_results)
+            }
         task.completed_at = datetime.utcnow()
-        self.db.commit()
+        await self.db.commit()
         
         return task.result
     
-    async def execute_step(self, step: TaskStep, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single task step"""
+    async def _load_agents(self, steps):
+        """Cache the agents of ``steps`` (see __init__)"""
+        
+        agent_ids = {step.agent_id for step in steps if step.agent_id is not None} - set(self._agents)
+        if agent_ids:
+            agents = await self.db.scalars(select(Agent).where(Agent.id.in_(agent_ids)))
+            self._agents.update({agent.id: agent for agent in agents})
+    
+    async def _mark_step(self, step: TaskStep, status: TaskStatus, output_data: Dict[str, Any]):
+        """Persist the outcome of a step"""
+        
+        step.status = status
+        step.output_data = output_data
+        if status == TaskStatus.COMPLETED:
+            step.completed_at = datetime.utcnow()
+        await self.db.commit()
+        self._publish_step(step)
+    
+    def _publish_step(self, step: TaskStep):
+        task_events.publish(step.task_id, {
+            "event": "step",
+            "step_number": step.step_number,
+            "status": getattr(step.status, "value", step.status)
+        })
+    
+    async def _abort_steps(self, running: Dict[asyncio.Task, TaskStep], pending: list,
+                           steps: Dict[int, TaskStep], reason: Dict[str, Any] = None):
+        """Cancel in-flight steps; with a reason, also mark them and unstarted ones cancelled"""
+        
+        for future in running:
+            future.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
         
-        agent = self.db.query(Agent).filter(Agent.id == step.agent_id).first()
+        if reason is not None:
+            for step in running.values():
+                await self._mark_step(step, TaskStatus.CANCELLED, reason)
+            for step_number in pending:
+                await self._mark_step(steps[step_number], TaskStatus.CANCELLED, reason)
+        
+        running.clear()
+        pending.clear()
+    
+    async def _drain_feed(self, step_feed: asyncio.Queue):
+        """
+        Mark the steps a still-running planner adds after the task stopped as
+        cancelled, so they do not stay pending on a finished task
+        """
+        
+        reason = {"error": "Cancelled: planned after the task stopped"}
+        while True:
+            item = self._feed_backlog.pop(0) if self._feed_backlog else await step_feed.get()
+            if item is None or isinstance(item, BaseException):
+                break
+            step = await self.db.get(TaskStep, item)
+            if step is not None and step.status == TaskStatus.PENDING:
+                await self._mark_step(step, TaskStatus.CANCELLED, reason)
+        self._feed_open = False
+    
+    async def execute_step(self, step: TaskStep, context: Dict[str, Any],
+                           dependencies: Optional[Set[int]] = None,
+                           context_mode: Optional[str] = None,
+                           agent_profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute a single task step
+        
+        ``context`` holds every completed result; the step only receives the
+        outputs of its ``dependencies`` unless the agent (or task) asks for
+        ``context_mode: "full"``. A2A agents are asked for the ``agent_profile``
+        workflow depth, unless their config pins one.
+        """
+        
+        agent = await self._get_agent(step.agent_id)
         if not agent:
             raise ValueError(f"Agent {step.agent_id} not found")
         
+        agent_config = agent.config or {}
+        context = build_step_context(
+            context,
+            dependencies,
+            mode=agent_config.get("context_mode") or context_mode or settings.step_context_mode,
+            max_chars_per_output=int(agent_config.get("context_max_chars_per_output")
+                                     or settings.step_context_max_chars_per_output),
+            max_total_chars=int(agent_config.get("context_max_total_chars")
+                                or settings.step_context_max_total_chars)
+        )
+        
         # Prepare input data with context
         input_data = {
             "description": step.description,
             "context": context,
             "step_input": step.input_data
         }
+        if agent.agent_type == AgentType.A2A_SERVER:
+            profile = agent_config.get("agent_profile") or agent_profile
+            if profile:
+                input_data["profile"] = profile
+            if agent_config.get("trace"):
+                # Answers come back without the run trace unless the agent config asks for it
+                input_data["trace"] = agent_config["trace"]
+            # Stable per step, so a retried step resumes the agent's checkpointed run
+            input_data["run_id"] = f"task-{step.task_id}-step-{step.step_number}"
+        
+        # Opt-in result cache for agents flagged cacheable
+        cache = get_step_cache() if (agent.config or {}).get("cacheable") else None
+        cache_key = None
+        if cache:
+            cache_key = cache.make_key(agent, step.description, context)
+            cached = await cache.get(cache_key)
+            # Errors cached before failures were recognised are not served
+            if cached is not None and not is_failed_result(cached):
+                return {**cached, "cached": True}
+        
+        planned_agent = agent
+        agent = await self._select_available_agent(agent)
+        breaker = endpoint_health.breaker(agent.endpoint)
+        
+        # Idempotent agents may get a duplicate request once a call runs past their p95
+        hedge_delay = None
+        if (agent.config or {}).get("idempotent"):
+            hedge_delay = endpoint_health.hedge_delay(agent.endpoint)
+        
+        # Execute within the agent's concurrency bulkhead
+        async with admission_controller.acquire(agent) as permit:
+            started = time.monotonic()
+            try:
+                result = await hedged(
+                    lambda attempt: self._call_agent(
+                        agent, self._hedge_input(input_data, attempt), step.step_number
+                    ),
+                    hedge_delay,
+                    self._is_call_failure
+                )
+            except Exception:
+                breaker.record_failure()
+                agent_stats.record(agent.id, None, False, payload_size(input_data))
+                raise
+            
+            latency = time.monotonic() - started
+            failed = is_failed_result(result)
+            if self._is_call_failure(result):
+                permit.mark_failed()
+                breaker.record_failure()
+            else:
+                # The endpoint answered: errors the agent reports do not trip its
+                # breaker (stats and the rebalancer steer away from such agents),
+                # but they stay out of the latency samples used for hedging
+                breaker.record_success()
+                if not failed:
+                    endpoint_health.latency(agent.endpoint).record(latency)
+            agent_stats.record(
+                agent.id, latency, not failed,
+                payload_size(input_data), payload_size(result)
+            )
+        
+        # The key names the planned agent: a rerouted agent's answer is not its result
+        if cache_key and agent is planned_agent and not is_failed_result(result):
+            ttl = (planned_agent.config or {}).get("cache_ttl_seconds") or settings.step_cache_ttl_seconds
+            await cache.set(cache_key, result, ttl)
+        
+        if agent is not planned_agent:
+            result = {**result, "rerouted_from": planned_agent.name}
+        
+        return result
+    
+    async def _get_agent(self, agent_id: Optional[int]) -> Optional[Agent]:
+        """Agent from the per-task cache, loaded in a separate session on a miss"""
+        
+        if agent_id is None:
+            return None
+        if agent_id not in self._agents:
+            async with AsyncSessionLocal() as db:
+                agent = await db.get(Agent, agent_id)
+            if agent is None:
+                return None
+            self._agents[agent_id] = agent
+        return self._agents[agent_id]
+    
+    async def _call_agent(self, agent: Agent, input_data: Dict[str, Any],
+                          step_number: Optional[int] = None) -> Dict[str, Any]:
+        """Execute based on agent type"""
         
-        # Execute based on agent type
         if agent.agent_type == AgentType.A2A_SERVER:
-            result = await self._execute_a2a_agent(agent, input_data)
+            return await self._execute_a2a_agent(agent, input_data, step_number)
         elif agent.agent_type == AgentType.API:
-            result = await self._execute_api_agent(agent, input_data)
+            return await self._execute_api_agent(agent, input_data)
         else:
-            result = {"error": f"Unknown agent type: {agent.agent_type}"}
+            return {"error": f"Unknown agent type: {agent.agent_type}"}
+    
+    @staticmethod
+    def _hedge_input(input_data: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+        """Input of a hedge attempt: its own run id, so the two runs do not share a checkpoint"""
         
-        return result
+        if attempt == 0 or "run_id" not in input_data:
+            return input_data
+        return {**input_data, "run_id": f"{input_data['run_id']}-hedge-{attempt}"}
     
-    async def _execute_a2a_agent(self, agent: Agent, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute task through A2A protocol"""
+    @staticmethod
+    def _is_call_failure(result: Dict[str, Any]) -> bool:
+        """Transport-level failures (unreachable agent, HTTP errors), as opposed to agent answers"""
+        
+        return result.get("status") == "failed"
+    
+    async def _select_available_agent(self, agent: Agent) -> Agent:
+        """
+        The planned agent if its circuit lets calls through, otherwise an active
+        agent covering the same capabilities whose circuit is closed
+        """
+        
+        if endpoint_health.breaker(agent.endpoint).allow_request():
+            return agent
+        
+        capabilities = set(agent.capabilities or [])
+        if capabilities:
+            async with AsyncSessionLocal() as db:
+                candidates = await AgentRegistry(db).find_agents_by_capability(next(iter(capabilities)))
+            for candidate in candidates:
+                if candidate.id == agent.id or not capabilities.issubset(candidate.capabilities or []):
+                    continue
+                if endpoint_health.breaker(candidate.endpoint).allow_request():
+                    return candidate
+        
+        raise CircuitOpenError(
+            f"Agent {agent.name} is unavailable (circuit open for {agent.endpoint}) "
+            f"and no alternative agent has the same capabilities"
+        )
+    
+    async def _execute_a2a_agent(self, agent: Agent, input_data: Dict[str, Any],
+                                 step_number: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Execute task through A2A protocol
+
+        Agents with ``"streaming": true`` in their config are called on their
+        streaming endpoint and their progress events and tokens are relayed
+        to the task's event stream.
+        """
         
         # Get or create A2A handler for this agent
         if agent.id not in self.a2a_handlers:
@@ -113,6 +551,19 @@ class TaskExecutor:
         
         handler = self.a2a_handlers[agent.id]
         
+        if (agent.config or {}).get("streaming"):
+            result = None
+            async for event in handler.stream_message(
+                receiver=agent.name,
+                content=input_data,
+                session_id=input_data.get("session_id", "default")
+            ):
+                if event.get("event") in ("final", "error"):
+                    result = event.get("message")
+                elif self.task_id is not None:
+                    task_events.publish(self.task_id, {**event, "step_number": step_number, "agent": agent.name})
+            return result or {"error": "Agent stream ended without a response", "status": "failed"}
+        
         # Send message via A2A protocol
         result = await handler.send_message(
             receiver=agent.name,
@@ -123,47 +574,75 @@ class TaskExecutor:
         return result
     
     async def _execute_api_agent(self, agent: Agent, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute task through REST API"""
+        """
+        Execute task through REST API
+
+        Agents registered from a template are called on their native endpoint
+        through a compiled adapter; others use the generic /process route.
+        """
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{agent.endpoint}/process",
-                    json=input_data,
-                    headers={"Content-Type": "application/json"}
-                )
+        client = get_http_client_manager().get_client(agent.endpoint)
+        adapter = adapter_cache.get(agent)
+        try:
+            if adapter:
+                response = await client.request(**adapter.build_request(agent.endpoint, input_data))
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                return {
-                    "error": str(e),
-                    "agent": agent.name,
-                    "status": "failed"
-                }
-    
-    def _generate_summary(self, results: list) -> str:
+                return adapter.parse_response(response.json(), agent.name)
+            
+            response = await client.post(
+                f"{agent.endpoint}/process",
+                json=input_data,
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            return {
+                "error": str(e),
+                "agent": agent.name,
+                "status": "failed"
+            }
+    
+    def _generate_summary(self, results: list, total_steps: int = None) -> str:
         """Generate a summary of task execution"""
         
         successful_steps = len([r for r in results if r.get("status") != "error"])
-        total_steps = len(results)
+        total_steps = total_steps if total_steps is not None else len(results)
         
         summary = f"Completed {successful_steps}/{total_steps} steps successfully."
         
         return summary
     
     async def cancel_task(self, task_id: int) -> Dict[str, Any]:
-        """Cancel a running task"""
+        """
+        Cancel a running task
+
+        An execution in this process is interrupted immediately. Workers in other
+        processes watch the task row and interrupt theirs within
+        ``task_cancel_poll_interval`` seconds.
+        """
         
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        task = await self.db.get(Task, task_id)
         if not task:
             return {"error": f"Task {task_id} not found"}
         
         task.status = TaskStatus.CANCELLED
-        self.db.commit()
+        await self.db.commit()
+        
+        interrupted = cancellation_registry.cancel(task_id)
+        
+        if await TaskQueue(self.db).cancel(task_id):
+            # Never started: nothing will mark its steps, do it here
+            await self.db.execute(update(TaskStep).where(
+                TaskStep.task_id == task_id,
+                TaskStep.status == TaskStatus.PENDING
+            ).values(status=TaskStatus.CANCELLED).execution_options(synchronize_session=False))
+            await self.db.commit()
         
         return {
             "status": "cancelled",
-            "task_id": task_id
+            "task_id": task_id,
+            "interrupted": interrupted
         }
     
     async def cleanup(self):
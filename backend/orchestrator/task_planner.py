@@ -2,14 +2,24 @@
 Task Planning Module
 Breaks down complex tasks into executable steps and assigns them to appropriate agents
 """
-from typing import Dict, Any, List
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
-from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.agent import Agent, AgentType
 from models.task import Task, TaskStep, TaskStatus
+from services.plan_cache import plan_cache
+from services.agent_index import agent_index
+from orchestrator.fast_path import get_fast_path_router
+from orchestrator.plan_stream import StreamingStepParser
+from orchestrator.plan_repair import PlanRepairer, parse_plan
+from orchestrator.plan_coalescer import get_plan_coalescer
+from orchestrator.agent_stats import agent_stats, PlanRebalancer
+from orchestrator.planning_prompt import planning_messages
+from orchestrator.step_scheduler import StepGraph
+from services.llm_gateway import get_llm_gateway, PRIORITY_HIGH
 from config import get_settings
-import json
+import asyncio
 
 settings = get_settings()
 
@@ -18,115 +28,28 @@ class TaskPlanner:
     Plans task execution and assigns work to agents
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.llm = ChatGroq(
-            temperature=0.2,
-            model="llama-3.3-70b-versatile",
-            groq_api_key=settings.groq_api_key
-        )
+        self.llm = get_llm_gateway().bind(temperature=0.2, priority=PRIORITY_HIGH)
     
-    async def create_execution_plan(self, task_description: str, session_id: str) -> Task:
-        """Create an execution plan for a task"""
-        
-        # Get available agents
-        agents = self.db.query(Agent).filter(Agent.status == "active").all()
-        
-        agent_info = [
-            {
-                "id": agent.id,
-                "name": agent.name,
-                "type": agent.agent_type,
-                "capabilities": agent.capabilities
-            }
-            for agent in agents
-        ]
-        
-        # Create planning prompt
-        planning_prompt = f"""
-        You are a task planning AI. Given a task description and available agents,
-        create a detailed execution plan.
-        
-        Task: {task_description}
-        
-        Available Agents:
-        {json.dumps(agent_info, indent=2)}
-        
-        CRITICAL ROUTING GUIDELINES:
-        
-        1. ALWAYS prefer the SIMPLEST agent that can complete the task
-        
-        2. Use DataAnalyzer (API agent) for:
-           - Simple calculations (1+1, 5*10, math operations)
-           - Quick facts and definitions (What is X?, Define Y)
-           - Short text processing and summarization
-           - Data analysis tasks
-           - Any task completable in under 5 seconds
-           - Single-step queries
-        
-        3. Use ResearchAgent (A2A/LangGraph) for:
-           - Multi-step reasoning and research
-           - Complex analysis requiring multiple sources
-           - Strategic planning and recommendations
-           - Tasks requiring deep investigation
-           - Workflows with multiple stages
-        
-        4. Task Complexity Assessment:
-           - Simple (1 step, < 5 sec) → DataAnalyzer
-           - Medium (2-3 steps, < 15 sec) → DataAnalyzer or light planning
-           - Complex (4+ steps, > 15 sec) → ResearchAgent with full workflow
-        
-        EXAMPLES:
-        - "1+1" → DataAnalyzer (simple calculation)
-        - "What is AI?" → DataAnalyzer (simple definition)
-        - "Summarize this text" → DataAnalyzer (simple processing)
-        - "Research AI impact on healthcare and create strategic recommendations" → ResearchAgent (complex research)
-        - "Analyze quarterly sales data and identify trends" → DataAnalyzer (data analysis)
-        
-        Create a plan with these elements:
-        1. Assess task complexity first
-        2. Break down the task into sequential steps (keep it simple if possible)
-        3. Assign each step to the MOST APPROPRIATE agent (prefer simpler agents)
-        4. Define inputs and expected outputs for each step
-        5. Identify dependencies between steps
-        
-        Return your response as JSON with this structure:
-        {{
-            "steps": [
-                {{
-                    "step_number": 1,
-                    "description": "...",
-                    "agent_id": 1,
-                    "agent_name": "...",
-                    "dependencies": [],
-                    "expected_output": "..."
-                }}
-            ],
-            "estimated_duration": "...",
-            "complexity": "low|medium|high"
-        }}
+    async def create_execution_plan(self, task_description: str, session_id: str,
+                                    metadata: Dict[str, Any] = None) -> Task:
+        """
+        Create an execution plan for a task
+
+        ``metadata`` is stored on the task and may carry execution options such as
+        ``max_parallel_steps`` and ``failure_policy`` (fail_fast | continue_on_error).
         """
         
-        system_message = SystemMessage(content="You are an expert task planning AI. Always respond with valid JSON.")
-        response = self.llm.invoke([system_message, HumanMessage(content=planning_prompt)])
+        plan_data = await self.generate_plan(
+            task_description, allow_fast_path=(metadata or {}).get("fast_path", True)
+        )
         
-        # Parse the plan
-        try:
-            plan_data = json.loads(response.content)
-        except json.JSONDecodeError:
-            # Fallback if LLM doesn't return valid JSON
-            plan_data = {
-                "steps": [{
-                    "step_number": 1,
-                    "description": task_description,
-                    "agent_id": agents[0].id if agents else None,
-                    "agent_name": agents[0].name if agents else "unknown",
-                    "dependencies": [],
-                    "expected_output": "Task completion"
-                }],
-                "estimated_duration": "unknown",
-                "complexity": "medium"
-            }
+        return await self.create_task_from_plan(task_description, session_id, plan_data, metadata)
+    
+    async def create_task_from_plan(self, task_description: str, session_id: str,
+                                    plan_data: Dict[str, Any], metadata: Dict[str, Any] = None) -> Task:
+        """Create a task with a ready-made plan (cached plan or saved workflow), no LLM call"""
         
         # Create task in database
         task = Task(
@@ -135,33 +58,323 @@ class TaskPlanner:
             plan=plan_data,
             status=TaskStatus.PLANNING,
             assigned_agents=[step["agent_id"] for step in plan_data["steps"]],
-            metadata={"complexity": plan_data.get("complexity", "medium")}
+            meta_data=self._plan_metadata(plan_data, metadata)
         )
         
+        # Task and steps go in with one commit, so a malformed plan leaves nothing behind
         self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
+        await self.db.flush()
+        self._add_steps(task, plan_data)
+        await self.db.commit()
+        await self.db.refresh(task)
         
-        # Create task steps
-        for step_data in plan_data["steps"]:
-            task_step = TaskStep(
-                task_id=task.id,
-                step_number=step_data["step_number"],
-                agent_id=step_data.get("agent_id"),
-                description=step_data["description"],
-                status=TaskStatus.PENDING,
-                input_data={"dependencies": step_data.get("dependencies", [])}
+        return task
+    
+    async def plan_task(self, task: Task) -> Task:
+        """Plan a task row that was created without a plan (e.g. by a batch submission)"""
+        
+        plan_data = await self.generate_plan(
+            task.description, allow_fast_path=(task.meta_data or {}).get("fast_path", True)
+        )
+        
+        task.plan = plan_data
+        task.status = TaskStatus.PLANNING
+        task.assigned_agents = [step["agent_id"] for step in plan_data["steps"]]
+        task.meta_data = self._plan_metadata(plan_data, task.meta_data)
+        
+        self._add_steps(task, plan_data)
+        await self.db.commit()
+        await self.db.refresh(task)
+        
+        return task
+    
+    async def plan_or_fail(self, task_id: int) -> Optional[Task]:
+        """
+        Plan a task still waiting for its plan (see ``plan_task``)
+
+        Returns the planned task, or None if it no longer waits for a plan or
+        planning failed (the task is then marked failed).
+        """
+        
+        task = await self.db.get(Task, task_id)
+        if not task or task.status != TaskStatus.PENDING:
+            return None  # Deleted, cancelled or already planned
+        try:
+            return await self.plan_task(task)
+        except Exception as e:
+            await self.db.rollback()
+            task = await self.db.get(Task, task_id)
+            task.status = TaskStatus.FAILED
+            task.result = {"error": f"Planning failed: {str(e)}"}
+            await self.db.commit()
+            return None
+    
+    @staticmethod
+    def _plan_metadata(plan_data: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Task metadata with what the plan tells us: complexity, the routing
+        decision (if any) and the workflow profile for LangGraph agents, unless
+        the task already asked for one
+        """
+        
+        metadata = {**(metadata or {}), "complexity": plan_data.get("complexity", "medium")}
+        if "routing" in plan_data:
+            metadata["routing"] = plan_data["routing"]
+        if not metadata.get("agent_profile"):
+            profile = settings.langgraph_profile_by_complexity.get(str(metadata["complexity"]).lower())
+            if profile:
+                metadata["agent_profile"] = profile
+        return metadata
+    
+    async def generate_plan(self, task_description: str, allow_fast_path: bool = True) -> Dict[str, Any]:
+        """
+        Ask the LLM for a plan over the active agents
+
+        Trivial tasks the fast-path router is confident about get a local
+        single-step plan instead. Plans are reused from the plan cache while the
+        description (normalized) and the active agent roster are unchanged.
+        Whatever the source, steps are then moved to equivalent agents that are
+        currently clearly faster (see ``PlanRebalancer``).
+        """
+        
+        agents = await self._active_agents()
+        await agent_stats.refresh(self.db)
+        
+        plan_data = await self._plan_for_agents(task_description, agents, allow_fast_path)
+        if settings.agent_rebalance_enabled:
+            await PlanRebalancer(self.db).rebalance(plan_data, agents)
+        return plan_data
+    
+    async def _plan_for_agents(self, task_description: str, agents: List[Agent],
+                               allow_fast_path: bool) -> Dict[str, Any]:
+        plan_data, routing, cache_key = self._ready_plan(task_description, agents, allow_fast_path)
+        if plan_data is not None:
+            return plan_data
+        
+        if settings.plan_batching_enabled:
+            # Planned together with other tasks submitted at the same moment
+            plan_data = await get_plan_coalescer().plan(task_description, agents)
+            if plan_data is not None:
+                if cache_key:
+                    plan_cache.set(cache_key, plan_data)
+                if routing:
+                    plan_data["routing"] = routing
+                return plan_data
+        
+        messages = self._planning_messages(task_description, agents)
+        # Keep unusable plans out of the LLM response cache
+        usable = lambda content: parse_plan(content, agents, task_description)[0] is not None
+        response = await self.llm.ainvoke(messages, validate=usable)
+        
+        # Parse (and if needed repair) the plan, asking again a bounded number of times
+        plan_data, error = parse_plan(response.content, agents, task_description)
+        for _ in range(settings.plan_repair_max_retries):
+            if plan_data is not None:
+                break
+            print(f"Warning: unusable plan for task {task_description[:80]!r} ({error}), asking again")
+            messages = messages + [response, HumanMessage(content=(
+                f"That response could not be used as a plan: {error}. "
+                "Reply with only the JSON object in the requested structure."
+            ))]
+            response = await self.llm.ainvoke(messages, validate=usable)
+            plan_data, error = parse_plan(response.content, agents, task_description)
+        
+        if plan_data is not None:
+            if cache_key:
+                plan_cache.set(cache_key, plan_data)
+        else:
+            print(f"Warning: falling back to a single-step plan ({error})")
+            plan_data = PlanRepairer(agents, task_description).fallback_plan()
+        
+        if routing:
+            plan_data["routing"] = routing
+        return plan_data
+    
+    async def create_planning_task(self, task_description: str, session_id: str,
+                                   metadata: Dict[str, Any] = None) -> Task:
+        """Create the task row ahead of a streamed plan (see ``stream_plan``)"""
+        
+        task = Task(
+            session_id=session_id,
+            description=task_description,
+            status=TaskStatus.PLANNING,
+            assigned_agents=[],
+            meta_data=metadata or {}
+        )
+        
+        self.db.add(task)
+        await self.db.commit()
+        await self.db.refresh(task)
+        
+        return task
+    
+    async def stream_plan(self, task: Task, step_feed: Optional[asyncio.Queue] = None) -> Task:
+        """
+        Plan ``task`` from the streamed LLM output
+
+        Each step is persisted as soon as its JSON object is complete and its id
+        is put on ``step_feed``, so an executor can start steps while the rest of
+        the plan is still being written. ``None`` on the feed marks the end of
+        the plan; an exception instance means planning failed (or was cancelled).
+        Streamed steps without a usable step number are saved once the plan is
+        complete, numbered after the others.
+        """
+        
+        published = {}
+        deferred = []
+        repairer = None
+        rebalancer = PlanRebalancer(self.db) if settings.agent_rebalance_enabled else None
+        agents_by_id = {}
+        rebalanced = []
+        
+        async def publish(step_data: Dict[str, Any], streamed: bool = False):
+            if not step_data.get("description"):
+                return
+            # Accept the same references as dependencies ("2", "step_2")
+            numbers = StepGraph.normalize_dependencies([step_data.get("step_number")])
+            number = numbers[0] if numbers and numbers[0] > 0 else None
+            if number is None or number in published:
+                if streamed and step_data not in deferred:
+                    deferred.append(step_data)
+                return
+            step_data["step_number"] = number
+            repairer.repair_agent(step_data)
+            if rebalancer:
+                swap = await rebalancer.rebalance_step(step_data, agents_by_id)
+                if swap:
+                    rebalanced.append(swap)
+            step_data["dependencies"] = StepGraph.normalize_dependencies(step_data.get("dependencies"))
+            step = self._add_step(task, step_data)
+            await self.db.commit()
+            published[number] = step_data
+            if step_feed is not None:
+                step_feed.put_nowait(step.id)
+        
+        try:
+            agents = await self._active_agents()
+            await agent_stats.refresh(self.db)
+            agents_by_id = {agent.id: agent for agent in agents}
+            repairer = PlanRepairer(agents, task.description)
+            plan_data, routing, cache_key = self._ready_plan(
+                task.description, agents, (task.meta_data or {}).get("fast_path", True)
             )
-            self.db.add(task_step)
+            
+            if plan_data is None:
+                parser = StreamingStepParser()
+                usable = lambda content: parse_plan(content, agents, task.description)[0] is not None
+                async for chunk in self.llm.astream(self._planning_messages(task.description, agents), validate=usable):
+                    for step_data in parser.feed(chunk):
+                        await publish(step_data, streamed=True)
+                for step_data in deferred:
+                    step_data["step_number"] = max(published, default=0) + 1
+                    await publish(step_data)
+                
+                plan_data, error = parse_plan(parser.text, agents, task.description)
+                if published:
+                    # Steps already saved (and possibly running) are the plan
+                    plan_data = {
+                        **(plan_data or {"estimated_duration": "unknown", "complexity": "medium"}),
+                        "steps": list(published.values())
+                    }
+                    if repairer.repairs:
+                        plan_data["repairs"] = plan_data.get("repairs", []) + repairer.repairs
+                elif plan_data is None:
+                    print(f"Warning: falling back to a single-step plan ({error})")
+                    plan_data = repairer.fallback_plan()
+                if cache_key and error is None:
+                    plan_cache.set(cache_key, plan_data)
+                
+                if routing:
+                    plan_data["routing"] = routing
+            
+            for step_data in plan_data["steps"]:
+                await publish(step_data)
+            if rebalanced:
+                plan_data["rebalanced"] = rebalanced
+            
+            task.plan = plan_data
+            task.assigned_agents = [step["agent_id"] for step in plan_data["steps"]]
+            task.meta_data = self._plan_metadata(plan_data, task.meta_data)
+            await self.db.commit()
+            await self.db.refresh(task)
+        except BaseException as e:
+            # Also on cancellation, or the executor would wait on the feed forever
+            if step_feed is not None:
+                step_feed.put_nowait(e)
+            raise
         
-        self.db.commit()
+        if step_feed is not None:
+            step_feed.put_nowait(None)
         
         return task
     
+    async def _active_agents(self) -> List[Agent]:
+        return list(await self.db.scalars(select(Agent).where(Agent.status == "active")))
+    
+    def _ready_plan(self, task_description: str, agents: List[Agent],
+                    allow_fast_path: bool) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
+        """
+        A plan that needs no LLM call (fast path or plan cache), if any
+
+        Returns (plan, routing decision, plan cache key).
+        """
+        
+        routing = None
+        if settings.fast_path_enabled and allow_fast_path:
+            routing = get_fast_path_router().route(task_description, agents)
+            fast_plan = routing.pop("plan", None)
+            print(
+                f"Routing decision: {routing['route']} "
+                f"(category={routing.get('category')}, confidence={routing.get('confidence')}, "
+                f"agent={routing.get('agent_name')}, reason={routing['reason']}) "
+                f"for task: {task_description[:80]!r}"
+            )
+            if fast_plan is not None:
+                return {**fast_plan, "routing": routing}, routing, None
+        
+        cache_key = None
+        if settings.plan_cache_enabled:
+            cache_key = plan_cache.make_key(task_description, agents)
+            cached = plan_cache.get(cache_key)
+            if cached is not None:
+                plan_data = {**cached, "plan_cache": "hit"}
+                if routing:
+                    plan_data["routing"] = routing
+                return plan_data, routing, cache_key
+        
+        return None, routing, cache_key
+    
+    def _planning_messages(self, task_description: str, agents: List[Agent]) -> List[BaseMessage]:
+        """Planning prompt over the agents most relevant to the task"""
+        
+        # Only the most relevant agents go into the prompt, with their recent performance
+        candidates = agent_index.shortlist(task_description, agents, settings.planner_agent_top_k)
+        return planning_messages(
+            task_description, candidates, agent_stats.hints(agent.id for agent in candidates)
+        )
+    
+    def _add_steps(self, task: Task, plan_data: Dict[str, Any]):
+        """Create the task's step rows (not committed)"""
+        
+        for step_data in plan_data["steps"]:
+            self._add_step(task, step_data)
+    
+    def _add_step(self, task: Task, step_data: Dict[str, Any]) -> TaskStep:
+        task_step = TaskStep(
+            task_id=task.id,
+            step_number=step_data["step_number"],
+            agent_id=step_data.get("agent_id"),
+            description=step_data["description"],
+            status=TaskStatus.PENDING,
+            input_data={"dependencies": step_data.get("dependencies", [])}
+        )
+        self.db.add(task_step)
+        return task_step
+    
     async def update_plan(self, task_id: int, updates: Dict[str, Any]) -> Task:
         """Update an existing task plan"""
         
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        task = await self.db.get(Task, task_id)
         if not task:
             raise ValueError(f"Task {task_id} not found")
         
@@ -170,16 +383,16 @@ class TaskPlanner:
             if hasattr(task, key):
                 setattr(task, key, value)
         
-        self.db.commit()
-        self.db.refresh(task)
+        await self.db.commit()
+        await self.db.refresh(task)
         
         return task
     
-    def get_next_steps(self, task_id: int) -> List[TaskStep]:
+    async def get_next_steps(self, task_id: int) -> List[TaskStep]:
         """Get the next executable steps for a task"""
         
-        return self.db.query(TaskStep).filter(
+        return list(await self.db.scalars(select(TaskStep).where(
             TaskStep.task_id == task_id,
             TaskStep.status == TaskStatus.PENDING
-        ).order_by(TaskStep.step_number).all()
+        ).order_by(TaskStep.step_number)))
 
@@ -0,0 +1,144 @@
+"""
+Agent Index Service
+BM25 index over agent names, descriptions and capabilities, used to shortlist
+the agents sent to the planning LLM
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+import math
+import re
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Field weights: capabilities say most about what an agent does
+CAPABILITY_WEIGHT = 3
+NAME_WEIGHT = 2
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "that", "the",
+    "this", "to", "what", "with", "you", "your"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; CamelCase and snake_case are split"""
+
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "")
+    return [
+        token for token in re.findall(r"[a-z0-9]+", text.lower())
+        if token not in STOPWORDS and len(token) > 1
+    ]
+
+
+def agent_terms(agent) -> Counter:
+    """Weighted term counts of an agent's searchable fields"""
+
+    terms = Counter(tokenize(agent.description))
+    for _ in range(NAME_WEIGHT):
+        terms.update(tokenize(agent.name))
+    for capability in agent.capabilities or []:
+        for _ in range(CAPABILITY_WEIGHT):
+            terms.update(tokenize(capability))
+    return terms
+
+
+def agent_signature(agent) -> Tuple:
+    return (agent.name, agent.description, tuple(agent.capabilities or []))
+
+
+class AgentIndex:
+    """
+    In-process BM25 index, updated incrementally per agent
+
+    ``upsert``/``remove`` keep document frequencies current without a rebuild;
+    ``sync`` catches up with changes made by other processes.
+    """
+
+    def __init__(self):
+        self._docs: Dict[int, Counter] = {}
+        self._lengths: Dict[int, int] = {}
+        self._signatures: Dict[int, Tuple] = {}
+        self._df: Counter = Counter()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, agent):
+        """Add or re-index one agent"""
+
+        signature = agent_signature(agent)
+        if self._signatures.get(agent.id) == signature:
+            return
+        self.remove(agent.id)
+
+        terms = agent_terms(agent)
+        self._docs[agent.id] = terms
+        self._lengths[agent.id] = sum(terms.values())
+        self._signatures[agent.id] = signature
+        self._df.update(terms.keys())
+        self._total_length += self._lengths[agent.id]
+
+    def remove(self, agent_id: int):
+        terms = self._docs.pop(agent_id, None)
+        if terms is None:
+            return
+        self._df.subtract(terms.keys())
+        self._df += Counter()  # Drop terms no agent uses any more
+        self._total_length -= self._lengths.pop(agent_id)
+        self._signatures.pop(agent_id, None)
+
+    def sync(self, agents: Iterable):
+        """Index any of ``agents`` that are missing or changed"""
+
+        for agent in agents:
+            self.upsert(agent)
+
+    def score(self, query: str, agent_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """BM25 score per indexed agent (restricted to ``agent_ids`` if given)"""
+
+        candidates = list(self._docs) if agent_ids is None else [i for i in agent_ids if i in self._docs]
+        if not candidates:
+            return {}
+
+        total = len(self._docs)
+        average_length = self._total_length / total
+        query_terms = set(tokenize(query))
+        scores = {}
+        for agent_id in candidates:
+            terms = self._docs[agent_id]
+            length_norm = K1 * (1 - B + B * self._lengths[agent_id] / average_length)
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term)
+                if not frequency:
+                    continue
+                df = self._df[term]
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                score += idf * frequency * (K1 + 1) / (frequency + length_norm)
+            scores[agent_id] = score
+        return scores
+
+    def shortlist(self, query: str, agents: List, top_k: int) -> List:
+        """
+        The ``top_k`` agents most relevant to ``query``, in relevance order
+
+        Agents without any matching term keep their original order, so the
+        shortlist is never empty while agents are available.
+        """
+
+        if top_k <= 0 or len(agents) <= top_k:
+            return list(agents)
+
+        self.sync(agents)
+        scores = self.score(query, [agent.id for agent in agents])
+        position = {agent.id: index for index, agent in enumerate(agents)}
+        ranked = sorted(agents, key=lambda agent: (-scores.get(agent.id, 0.0), position[agent.id]))
+        return ranked[:top_k]
+
+
+# Global index instance
+agent_index = AgentIndex()
@@ -2,11 +2,14 @@
 Agent Registration Service
 Handles agent registration with configuration templates and testing
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.agent import Agent, AgentType, AgentStatus
 from models.agent_config_template import AgentConfigTemplate, BUILTIN_TEMPLATES
 from typing import Dict, Any, List, Optional
 import httpx
+from services.plan_cache import plan_cache
+from services.agent_index import agent_index
 import json
 from jsonpath_ng import parse as jsonpath_parse
 
@@ -15,27 +18,25 @@ class AgentRegistrationService:
     Service for registering external agents with configuration templates
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def initialize_templates(self):
+    async def initialize_templates(self):
         """Initialize built-in templates if they don't exist"""
+        existing = set(await self.db.scalars(select(AgentConfigTemplate.name)))
+        
         for template_data in BUILTIN_TEMPLATES:
-            existing = self.db.query(AgentConfigTemplate).filter(
-                AgentConfigTemplate.name == template_data["name"]
-            ).first()
-            
-            if not existing:
+            if template_data["name"] not in existing:
                 template = AgentConfigTemplate(**template_data, is_builtin=True)
                 self.db.add(template)
         
-        self.db.commit()
+        await self.db.commit()
     
-    def list_templates(self) -> List[Dict[str, Any]]:
+    async def list_templates(self) -> List[Dict[str, Any]]:
         """List all available configuration templates"""
-        templates = self.db.query(AgentConfigTemplate).filter(
-            AgentConfigTemplate.is_active == True
-        ).all()
+        templates = await self.db.scalars(
+            select(AgentConfigTemplate).where(AgentConfigTemplate.is_active == True)
+        )
         
         return [
             {
@@ -51,17 +52,15 @@ class AgentRegistrationService:
             for t in templates
         ]
     
-    def get_template(self, template_id: int) -> Optional[AgentConfigTemplate]:
+    async def get_template(self, template_id: int) -> Optional[AgentConfigTemplate]:
         """Get a specific template"""
-        return self.db.query(AgentConfigTemplate).filter(
-            AgentConfigTemplate.id == template_id
-        ).first()
+        return await self.db.get(AgentConfigTemplate, template_id)
     
-    def get_template_by_name(self, name: str) -> Optional[AgentConfigTemplate]:
+    async def get_template_by_name(self, name: str) -> Optional[AgentConfigTemplate]:
         """Get a template by name"""
-        return self.db.query(AgentConfigTemplate).filter(
-            AgentConfigTemplate.name == name
-        ).first()
+        return await self.db.scalar(
+            select(AgentConfigTemplate).where(AgentConfigTemplate.name == name)
+        )
     
     async def test_agent_connection(
         self,
@@ -96,7 +95,8 @@ class AgentRegistrationService:
             # Construct full URL
             full_url = endpoint.rstrip('/') + '/' + path.lstrip('/')
             
-            # Make request
+            # Make request with a one-off client: tested URLs are user-supplied
+            # and would otherwise each keep a pooled client alive
             async with httpx.AsyncClient(timeout=30.0) as client:
                 if method == "POST":
                     response = await client.post(full_url, json=body, headers=headers)
@@ -107,40 +107,40 @@ class AgentRegistrationService:
                         "success": False,
                         "error": f"Unsupported HTTP method: {method}"
                     }
+            
+            # Check response
+            if response.status_code >= 200 and response.status_code < 300:
+                response_data = response.json()
                 
-                # Check response
-                if response.status_code >= 200 and response.status_code < 300:
-                    response_data = response.json()
+                # Try to extract result using response mapping
+                try:
+                    result = self._extract_response_data(
+                        response_data,
+                        response_mapping
+                    )
                     
-                    # Try to extract result using response mapping
-                    try:
-                        result = self._extract_response_data(
-                            response_data,
-                            response_mapping
-                        )
-                        
-                        return {
-                            "success": True,
-                            "status_code": response.status_code,
-                            "response": response_data,
-                            "extracted_result": result,
-                            "message": "Connection successful"
-                        }
-                    except Exception as e:
-                        return {
-                            "success": True,
-                            "status_code": response.status_code,
-                            "response": response_data,
-                            "warning": f"Could not extract result: {str(e)}",
-                            "message": "Connected but response format may need adjustment"
-                        }
-                else:
                     return {
-                        "success": False,
+                        "success": True,
                         "status_code": response.status_code,
-                        "error": f"HTTP {response.status_code}: {response.text}"
+                        "response": response_data,
+                        "extracted_result": result,
+                        "message": "Connection successful"
                     }
-        
+                except Exception as e:
+                    return {
+                        "success": True,
+                        "status_code": response.status_code,
+                        "response": response_data,
+                        "warning": f"Could not extract result: {str(e)}",
+                        "message": "Connected but response format may need adjustment"
+                    }
+            else:
+                return {
+                    "success": False,
+                    "status_code": response.status_code,
+                    "error": f"HTTP {response.status_code}: {response.text}"
+                }
+    
         except httpx.TimeoutException:
             return {
                 "success": False,
@@ -157,7 +157,7 @@ class AgentRegistrationService:
                 "error": f"Test failed: {str(e)}"
             }
     
-    def register_agent_with_template(
+    async def register_agent_with_template(
         self,
         name: str,
         description: str,
@@ -171,22 +171,25 @@ class AgentRegistrationService:
         Register a new agent using a configuration template
         """
         # Check if agent already exists
-        existing = self.db.query(Agent).filter(Agent.name == name).first()
+        existing = await self.db.scalar(select(Agent).where(Agent.name == name))
         if existing:
             raise ValueError(f"Agent with name '{name}' already exists")
         
         # Get template
-        template = self.get_template(template_id)
+        template = await self.get_template(template_id)
         if not template:
             raise ValueError(f"Template {template_id} not found")
         
         # Build config combining template and custom config
+        custom_config = custom_config or {}
         agent_config = {
             "template_id": template_id,
             "template_name": template.name,
-            "request_mapping": custom_config.get("request_mapping") if custom_config else template.request_mapping,
-            "response_mapping": custom_config.get("response_mapping") if custom_config else template.response_mapping,
-            "auth_config": auth_config or template.auth_config
+            "request_mapping": custom_config.get("request_mapping") or template.request_mapping,
+            "response_mapping": custom_config.get("response_mapping") or template.response_mapping,
+            "auth_config": auth_config or template.auth_config,
+            # Values for {placeholders} in the request path, e.g. {"model_name": "llama-2-70b-chat"}
+            "path_params": custom_config.get("path_params", {})
         }
         
         # Create agent
@@ -205,8 +208,12 @@ class AgentRegistrationService:
         )
         
         self.db.add(agent)
-        self.db.commit()
-        self.db.refresh(agent)
+        await self.db.commit()
+        await self.db.refresh(agent)
+        
+        # Cached plans were made for the previous roster
+        plan_cache.invalidate()
+        agent_index.upsert(agent)
         
         return agent
     
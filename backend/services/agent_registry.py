@@ -2,20 +2,23 @@
 Agent Registry Service
 Manages agent registration, discovery, and status
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.agent import Agent, AgentType, AgentStatus
 from typing import List, Dict, Any, Optional
-import httpx
+from services.http_client_manager import get_http_client_manager
+from services.plan_cache import plan_cache
+from services.agent_index import agent_index
 
 class AgentRegistry:
     """
     Central registry for managing agents
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def register_agent(self,
+    async def register_agent(self,
                       name: str,
                       description: str,
                       agent_type: AgentType,
@@ -26,7 +29,7 @@ class AgentRegistry:
         """Register a new agent"""
         
         # Check if agent already exists
-        existing = self.db.query(Agent).filter(Agent.name == name).first()
+        existing = await self.get_agent_by_name(name)
         if existing:
             raise ValueError(f"Agent with name '{name}' already exists")
         
@@ -38,44 +41,48 @@ class AgentRegistry:
             capabilities=capabilities,
             config=config or {},
             status=AgentStatus.ACTIVE,
-            metadata=metadata or {}
+            meta_data=metadata or {}
         )
         
         self.db.add(agent)
-        self.db.commit()
-        self.db.refresh(agent)
+        await self.db.commit()
+        await self.db.refresh(agent)
+        
+        # Cached plans were made for the previous roster
+        plan_cache.invalidate()
+        agent_index.upsert(agent)
         
         return agent
     
-    def get_agent(self, agent_id: int) -> Optional[Agent]:
+    async def get_agent(self, agent_id: int) -> Optional[Agent]:
         """Get agent by ID"""
         
-        return self.db.query(Agent).filter(Agent.id == agent_id).first()
+        return await self.db.get(Agent, agent_id)
     
-    def get_agent_by_name(self, name: str) -> Optional[Agent]:
+    async def get_agent_by_name(self, name: str) -> Optional[Agent]:
         """Get agent by name"""
         
-        return self.db.query(Agent).filter(Agent.name == name).first()
+        return await self.db.scalar(select(Agent).where(Agent.name == name))
     
-    def list_agents(self, 
+    async def list_agents(self, 
                    agent_type: Optional[AgentType] = None,
                    status: Optional[AgentStatus] = None) -> List[Agent]:
         """List all agents with optional filters"""
         
-        query = self.db.query(Agent)
+        query = select(Agent)
         
         if agent_type:
-            query = query.filter(Agent.agent_type == agent_type)
+            query = query.where(Agent.agent_type == agent_type)
         
         if status:
-            query = query.filter(Agent.status == status)
+            query = query.where(Agent.status == status)
         
-        return query.all()
+        return list(await self.db.scalars(query))
     
-    def update_agent(self, agent_id: int, updates: Dict[str, Any]) -> Agent:
+    async def update_agent(self, agent_id: int, updates: Dict[str, Any]) -> Agent:
         """Update agent information"""
         
-        agent = self.get_agent(agent_id)
+        agent = await self.get_agent(agent_id)
         if not agent:
             raise ValueError(f"Agent {agent_id} not found")
         
@@ -83,87 +90,89 @@ class AgentRegistry:
             if hasattr(agent, key) and key not in ['id', 'created_at']:
                 setattr(agent, key, value)
         
-        self.db.commit()
-        self.db.refresh(agent)
+        await self.db.commit()
+        await self.db.refresh(agent)
+        plan_cache.invalidate()
+        agent_index.upsert(agent)
         
         return agent
     
-    def deactivate_agent(self, agent_id: int) -> Agent:
+    async def deactivate_agent(self, agent_id: int) -> Agent:
         """Deactivate an agent"""
         
-        return self.update_agent(agent_id, {"status": AgentStatus.INACTIVE})
+        return await self.update_agent(agent_id, {"status": AgentStatus.INACTIVE})
     
-    def activate_agent(self, agent_id: int) -> Agent:
+    async def activate_agent(self, agent_id: int) -> Agent:
         """Activate an agent"""
         
-        return self.update_agent(agent_id, {"status": AgentStatus.ACTIVE})
+        return await self.update_agent(agent_id, {"status": AgentStatus.ACTIVE})
     
     async def check_agent_health(self, agent_id: int) -> Dict[str, Any]:
         """Check if an agent is healthy and responsive"""
         
-        agent = self.get_agent(agent_id)
+        agent = await self.get_agent(agent_id)
         if not agent:
             return {"error": f"Agent {agent_id} not found"}
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{agent.endpoint}/health")
-                
-                if response.status_code == 200:
-                    agent.status = AgentStatus.ACTIVE
-                    self.db.commit()
-                    return {
-                        "agent_id": agent_id,
-                        "status": "healthy",
-                        "response": response.json()
-                    }
-                else:
-                    agent.status = AgentStatus.ERROR
-                    self.db.commit()
-                    return {
-                        "agent_id": agent_id,
-                        "status": "unhealthy",
-                        "error": f"Status code: {response.status_code}"
-                    }
+            client = get_http_client_manager().get_client(agent.endpoint)
+            response = await client.get(f"{agent.endpoint}/health", timeout=10.0)
+            
+            if response.status_code == 200:
+                agent.status = AgentStatus.ACTIVE
+                await self.db.commit()
+                return {
+                    "agent_id": agent_id,
+                    "status": "healthy",
+                    "response": response.json()
+                }
+            else:
+                agent.status = AgentStatus.ERROR
+                await self.db.commit()
+                return {
+                    "agent_id": agent_id,
+                    "status": "unhealthy",
+                    "error": f"Status code: {response.status_code}"
+                }
         except Exception as e:
             agent.status = AgentStatus.ERROR
-            self.db.commit()
+            await self.db.commit()
             return {
                 "agent_id": agent_id,
                 "status": "error",
                 "error": str(e)
             }
     
-    def find_agents_by_capability(self, capability: str) -> List[Agent]:
+    async def find_agents_by_capability(self, capability: str) -> List[Agent]:
         """Find agents with a specific capability"""
         
-        agents = self.db.query(Agent).filter(
-            Agent.status == AgentStatus.ACTIVE
-        ).all()
+        agents = await self.db.scalars(
+            select(Agent).where(Agent.status == AgentStatus.ACTIVE)
+        )
         
         return [
             agent for agent in agents 
             if capability in agent.capabilities
         ]
     
-    def get_agent_stats(self) -> Dict[str, Any]:
+    async def get_agent_stats(self) -> Dict[str, Any]:
         """Get statistics about registered agents"""
         
-        total = self.db.query(Agent).count()
-        active = self.db.query(Agent).filter(Agent.status == AgentStatus.ACTIVE).count()
-        inactive = self.db.query(Agent).filter(Agent.status == AgentStatus.INACTIVE).count()
-        error = self.db.query(Agent).filter(Agent.status == AgentStatus.ERROR).count()
+        # Two grouped queries instead of one count per status and type
+        by_status = dict((await self.db.execute(
+            select(Agent.status, func.count()).group_by(Agent.status)
+        )).all())
+        counts_by_type = dict((await self.db.execute(
+            select(Agent.agent_type, func.count()).group_by(Agent.agent_type)
+        )).all())
         
-        by_type = {}
-        for agent_type in AgentType:
-            count = self.db.query(Agent).filter(Agent.agent_type == agent_type).count()
-            by_type[agent_type.value] = count
+        by_type = {agent_type.value: counts_by_type.get(agent_type, 0) for agent_type in AgentType}
         
         return {
-            "total": total,
-            "active": active,
-            "inactive": inactive,
-            "error": error,
+            "total": sum(by_status.values()),
+            "active": by_status.get(AgentStatus.ACTIVE, 0),
+            "inactive": by_status.get(AgentStatus.INACTIVE, 0),
+            "error": by_status.get(AgentStatus.ERROR, 0),
             "by_type": by_type
         }
 
@@ -0,0 +1,153 @@
+"""
+HTTP Client Manager
+Process-wide pool of keep-alive HTTP clients for outbound agent calls
+"""
+from typing import Dict, Any, Optional, Set
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import asyncio
+import importlib.util
+import httpx
+from config import get_settings
+
+settings = get_settings()
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HTTPClientManager:
+    """
+    Keeps one pooled AsyncClient per agent origin (scheme://host:port) so
+    repeated calls to the same agent reuse open TCP/TLS connections
+
+    At most ``max_origins`` clients are kept; the least recently used one is
+    closed to make room.
+    """
+
+    def __init__(self,
+                 max_connections_per_host: int = None,
+                 max_keepalive_connections: int = None,
+                 keepalive_expiry: float = None,
+                 connect_timeout: float = None,
+                 request_timeout: float = None,
+                 http2: bool = None,
+                 max_origins: int = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host or settings.http_max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections or settings.http_max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry or settings.http_keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(
+            request_timeout or settings.http_request_timeout,
+            connect=connect_timeout or settings.http_connect_timeout
+        )
+        self.http2 = (settings.http2_enabled if http2 is None else http2) and HTTP2_AVAILABLE
+        self.max_origins = max_origins or settings.http_max_pooled_origins
+        self._clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def origin(url: str) -> str:
+        """Normalize a URL to the origin its connections are pooled under"""
+
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"Invalid agent endpoint URL: {url!r}")
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Get the shared client for the origin of ``url``"""
+
+        self._check_event_loop()
+
+        key = self.origin(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+            self._clients[key] = client
+            while len(self._clients) > self.max_origins:
+                _, evicted = self._clients.popitem(last=False)
+                self._close_later(evicted)
+        self._clients.move_to_end(key)
+        return client
+
+    def _check_event_loop(self):
+        """Connections are bound to the loop that opened them; start fresh on a new loop"""
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            stale = list(self._clients.values())
+            self._clients = OrderedDict()
+            self._closing = set()
+            self._loop = loop
+            for client in stale:
+                self._close_later(client)
+
+    def _close_later(self, client: httpx.AsyncClient):
+        """Close a client dropped from the pool without blocking the caller"""
+
+        try:
+            closing = asyncio.get_running_loop().create_task(self._close_quietly(client))
+        except RuntimeError:
+            # No loop to close it on; the client has no open connections yet
+            return
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_quietly(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception:
+            # Connections of a finished event loop cannot be shut down cleanly;
+            # closing the client still releases it
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Describe the open client pools"""
+
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "origins": sorted(key for key, client in self._clients.items() if not client.is_closed)
+        }
+
+    async def close(self):
+        """Close every pooled client"""
+
+        clients = list(self._clients.values())
+        self._clients = OrderedDict()
+        for client in clients:
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+_manager: Optional[HTTPClientManager] = None
+
+
+def get_http_client_manager() -> HTTPClientManager:
+    """Get the application-wide client manager"""
+
+    global _manager
+    if _manager is None:
+        _manager = HTTPClientManager()
+    return _manager
+
+
+async def close_http_clients():
+    """Shut down the application-wide client manager"""
+
+    global _manager
+    if _manager is not None:
+        await _manager.close()
+        _manager = None
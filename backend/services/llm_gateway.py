@@ -0,0 +1,464 @@
+"""
+LLM Gateway
+Single entry point for LLM calls: one client per model/temperature, provider
+rate limits (requests and tokens per minute), a priority queue in front of the
+provider, retries of rate-limited and transient failures, and a persistent cache
+for deterministic calls
+"""
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import time
+import httpx
+from langchain_core.messages import AIMessage, BaseMessage
+from concurrency import run_blocking
+from config import get_settings
+
+settings = get_settings()
+
+# Lower value = served first
+PRIORITY_HIGH = 0     # Interactive planning
+PRIORITY_NORMAL = 5   # Agent work
+PRIORITY_LOW = 10     # Background / batch
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` units per minute up to one minute's worth"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is now)"""
+
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Return (or, if negative, charge) the difference between estimate and actual use"""
+
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class PriorityGate:
+    """
+    At most ``max_concurrency`` calls in flight; waiting calls are released
+    lowest priority value first, FIFO within a priority
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, priority: int):
+        if self.in_flight < self.max_concurrency and not self.queued:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed to us just as we were cancelled
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.max_concurrency:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+
+class LLMResponseCache:
+    """sqlite file of responses keyed by a hash of model, temperature and prompt"""
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: Sequence[BaseMessage]) -> str:
+        payload = json.dumps({
+            "model": model,
+            "temperature": temperature,
+            "messages": [[message.type, message.content] for message in messages]
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            return row[0]
+
+    def _set_sync(self, key: str, content: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, expires_at) VALUES (?, ?, ?)",
+                (key, content, now + self.ttl)
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+
+    async def get(self, key: str) -> Optional[str]:
+        return await run_blocking(self._get_sync, key)
+
+    async def set(self, key: str, content: str):
+        await run_blocking(self._set_sync, key, content)
+
+    async def delete(self, key: str):
+        await run_blocking(self._delete_sync, key)
+
+    def _delete_sync(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+
+class GatewayLLM:
+    """
+    Drop-in for a chat model bound to one model/temperature/priority; call
+    sites keep using ``await llm.ainvoke(messages)``
+    """
+
+    def __init__(self, gateway: "LLMGateway", model: str, temperature: float, priority: int):
+        self.gateway = gateway
+        self.model = model
+        self.temperature = temperature
+        self.priority = priority
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], priority: int = None,
+                      validate: Callable[[str], bool] = None) -> AIMessage:
+        return await self.gateway.ainvoke(
+            messages,
+            model=self.model,
+            temperature=self.temperature,
+            priority=self.priority if priority is None else priority,
+            validate=validate
+        )
+
+    def astream(self, messages: Sequence[BaseMessage], priority: int = None,
+                validate: Callable[[str], bool] = None) -> AsyncIterator[str]:
+        return self.gateway.astream(
+            messages,
+            model=self.model,
+            temperature=self.temperature,
+            priority=self.priority if priority is None else priority,
+            validate=validate
+        )
+
+
+class LLMGateway:
+    """
+    Process-wide LLM access
+
+    Rate limits are enforced per process; give each process its share of the
+    provider quota when running several API/worker processes.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, float], Any] = {}
+        self._loop = None
+        self.cache = (
+            LLMResponseCache(settings.llm_cache_path, settings.llm_cache_ttl_seconds)
+            if settings.llm_cache_enabled else None
+        )
+        self.requests = 0
+        self.cache_hits = 0
+        self.rate_limited = 0
+        self.transient_retries = 0
+        self.tokens_used = 0
+
+    def _reset_for_loop(self):
+        """Queues, buckets and provider clients are bound to the running event loop"""
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._clients = {}
+            self.gate = PriorityGate(settings.llm_max_concurrency)
+            self.request_bucket = TokenBucket(settings.llm_requests_per_minute)
+            self.token_bucket = TokenBucket(settings.llm_tokens_per_minute)
+            self._rate_lock = asyncio.Lock()
+
+    def client(self, model: str, temperature: float):
+        """Shared provider client for a model/temperature pair"""
+
+        key = (model, float(temperature))
+        if key not in self._clients:
+            from langchain_groq import ChatGroq
+
+            self._clients[key] = ChatGroq(
+                model=model,
+                temperature=temperature,
+                groq_api_key=settings.groq_api_key,
+                max_retries=0  # Retries (and their backoff) happen here
+            )
+        return self._clients[key]
+
+    def bind(self, temperature: float = 0.0, model: str = None,
+             priority: int = PRIORITY_NORMAL) -> GatewayLLM:
+        return GatewayLLM(self, model or settings.llm_model, temperature, priority)
+
+    @staticmethod
+    def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+        """Rough prompt size (4 characters per token) plus the expected completion"""
+
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        return prompt_chars // 4 + settings.llm_default_output_tokens
+
+    def cacheable(self, temperature: float) -> bool:
+        return self.cache is not None and temperature <= settings.llm_cache_max_temperature
+
+    async def _cached(self, key: str, validate: Optional[Callable[[str], bool]]) -> Optional[str]:
+        """Cached response, unless the caller's ``validate`` rejects it (then it is dropped)"""
+
+        cached = await self.cache.get(key)
+        if cached is not None and validate is not None and not validate(cached):
+            await self.cache.delete(key)
+            return None
+        return cached
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], model: str = None,
+                      temperature: float = 0.0, priority: int = PRIORITY_NORMAL,
+                      validate: Callable[[str], bool] = None) -> AIMessage:
+        """
+        Call the provider through the cache, priority queue and rate limits
+
+        With ``validate``, only responses it accepts are cached (or served from
+        the cache), so a response the caller cannot use is not replayed.
+        """
+
+        self._reset_for_loop()
+        model = model or settings.llm_model
+        self.requests += 1
+
+        cache_key = None
+        if self.cacheable(temperature):
+            cache_key = LLMResponseCache.make_key(model, temperature, messages)
+            cached = await self._cached(cache_key, validate)
+            if cached is not None:
+                self.cache_hits += 1
+                return AIMessage(content=cached, response_metadata={"cached": True})
+
+        estimate = self.estimate_tokens(messages)
+        await self.gate.acquire(priority)
+        try:
+            response = await self._call_with_retries(model, temperature, messages, estimate)
+        finally:
+            self.gate.release()
+
+        if cache_key and (validate is None or validate(response.content)):
+            await self.cache.set(cache_key, response.content)
+        return response
+
+    async def astream(self, messages: Sequence[BaseMessage], model: str = None,
+                      temperature: float = 0.0, priority: int = PRIORITY_NORMAL,
+                      validate: Callable[[str], bool] = None) -> AsyncIterator[str]:
+        """
+        Like ``ainvoke`` but yields the response text as it arrives
+
+        Failed calls are only retried before the first chunk; the concurrency
+        slot is held until the stream is exhausted or closed.
+        """
+
+        self._reset_for_loop()
+        model = model or settings.llm_model
+        self.requests += 1
+
+        cache_key = None
+        if self.cacheable(temperature):
+            cache_key = LLMResponseCache.make_key(model, temperature, messages)
+            cached = await self._cached(cache_key, validate)
+            if cached is not None:
+                self.cache_hits += 1
+                yield cached
+                return
+
+        estimate = self.estimate_tokens(messages)
+        parts = []
+        await self.gate.acquire(priority)
+        try:
+            attempt = 0
+            while True:
+                await self._wait_for_quota(estimate)
+                usage = {}
+                try:
+                    async for chunk in self.client(model, temperature).astream(list(messages)):
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield chunk.content
+                except Exception as e:
+                    if parts or not self._is_retryable(e) or attempt >= settings.llm_max_retries:
+                        raise
+                    attempt += 1
+                    await self._back_off(e, attempt)
+                    continue
+
+                actual = usage.get("total_tokens")
+                if actual:
+                    self.tokens_used += actual
+                    self.token_bucket.give_back(estimate - actual)
+                break
+        finally:
+            self.gate.release()
+
+        text = "".join(parts)
+        if cache_key and (validate is None or validate(text)):
+            await self.cache.set(cache_key, text)
+
+    async def _back_off(self, error: Exception, attempt: int):
+        """Wait before retrying a rate-limited or transiently failed call"""
+
+        if self._is_rate_limited(error):
+            self.rate_limited += 1
+            # The provider disagrees with our buckets: hold everyone back
+            self.request_bucket.drain()
+        else:
+            self.transient_retries += 1
+        await asyncio.sleep(self._retry_after(error) or settings.llm_retry_backoff_seconds * 2 ** (attempt - 1))
+
+    async def _call_with_retries(self, model: str, temperature: float,
+                                 messages: Sequence[BaseMessage], estimate: int) -> AIMessage:
+        attempt = 0
+        while True:
+            await self._wait_for_quota(estimate)
+            try:
+                response = await self.client(model, temperature).ainvoke(list(messages))
+            except Exception as e:
+                if not self._is_retryable(e) or attempt >= settings.llm_max_retries:
+                    raise
+                attempt += 1
+                await self._back_off(e, attempt)
+                continue
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            actual = usage.get("total_tokens")
+            if actual:
+                self.tokens_used += actual
+                self.token_bucket.give_back(estimate - actual)
+            return response
+
+    async def _wait_for_quota(self, tokens: int):
+        # One request at a time reserves quota, so the queue order is preserved
+        async with self._rate_lock:
+            while True:
+                delay = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(tokens))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.request_bucket.take(1)
+            self.token_bucket.take(tokens)
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        return getattr(error, "status_code", None) == 429 or "rate limit" in str(error).lower()
+
+    @classmethod
+    def _is_retryable(cls, error: Exception) -> bool:
+        """Rate limits, timeouts, connection errors and provider 5xx responses"""
+
+        if cls._is_rate_limited(error):
+            return True
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status == 408 or status >= 500
+        if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+            return True
+        from groq import APIConnectionError  # Also raised on timeouts
+
+        return isinstance(error, APIConnectionError)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        value = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        gate = getattr(self, "gate", None)
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "rate_limited_retries": self.rate_limited,
+            "transient_retries": self.transient_retries,
+            "tokens_used": self.tokens_used,
+            "in_flight": gate.in_flight if gate else 0,
+            "queued": gate.queued if gate else 0,
+            "clients": len(self._clients)
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """The process-wide LLM gateway"""
+
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -2,7 +2,8 @@
 Memory Management Service
 Handles conversation context and agent memory
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.memory import ConversationContext, Message, AgentMemory
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
@@ -12,10 +13,11 @@ class MemoryService:
     Manages conversation context and agent memory
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create_session(self, user_id: str, metadata: Dict[str, Any] = None) -> ConversationContext:
+    async def create_session(self, user_id: str, metadata: Dict[str, Any] = None,
+                       commit: bool = True) -> ConversationContext:
         """Create a new conversation session"""
         
         import uuid
@@ -24,23 +26,25 @@ class MemoryService:
         context = ConversationContext(
             session_id=session_id,
             user_id=user_id,
-            metadata=metadata or {}
+            meta_data=metadata or {}
         )
         
         self.db.add(context)
-        self.db.commit()
-        self.db.refresh(context)
+        
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(context)
         
         return context
     
-    def get_session(self, session_id: str) -> Optional[ConversationContext]:
+    async def get_session(self, session_id: str) -> Optional[ConversationContext]:
         """Get a conversation session"""
         
-        return self.db.query(ConversationContext).filter(
-            ConversationContext.session_id == session_id
-        ).first()
+        return await self.db.scalar(
+            select(ConversationContext).where(ConversationContext.session_id == session_id)
+        )
     
-    def add_message(self, 
+    async def add_message(self, 
                    session_id: str,
                    role: str,
                    content: str,
@@ -48,7 +52,7 @@ class MemoryService:
                    metadata: Dict[str, Any] = None) -> Message:
         """Add a message to conversation context"""
         
-        context = self.get_session(session_id)
+        context = await self.get_session(session_id)
         if not context:
             raise ValueError(f"Session {session_id} not found")
         
@@ -57,31 +61,32 @@ class MemoryService:
             agent_id=agent_id,
             role=role,
             content=content,
-            metadata=metadata or {}
+            meta_data=metadata or {}
         )
         
         self.db.add(message)
-        self.db.commit()
-        self.db.refresh(message)
         
-        # Update context timestamp
+        # Update context timestamp (same commit as the message)
         context.updated_at = datetime.utcnow()
-        self.db.commit()
+        await self.db.commit()
+        await self.db.refresh(message)
         
         return message
     
-    def get_conversation_history(self, session_id: str, limit: int = 50) -> List[Message]:
+    async def get_conversation_history(self, session_id: str, limit: int = 50) -> List[Message]:
         """Get conversation history for a session"""
         
-        context = self.get_session(session_id)
+        context = await self.get_session(session_id)
         if not context:
             return []
         
-        return self.db.query(Message).filter(
-            Message.context_id == context.id
-        ).order_by(Message.timestamp.desc()).limit(limit).all()
+        return list(await self.db.scalars(
+            select(Message).where(
+                Message.context_id == context.id
+            ).order_by(Message.timestamp.desc()).limit(limit)
+        ))
     
-    def save_agent_memory(self,
+    async def save_agent_memory(self,
                          agent_id: int,
                          session_id: str,
                          memory_type: str,
@@ -102,53 +107,53 @@ class MemoryService:
         )
         
         self.db.add(memory)
-        self.db.commit()
-        self.db.refresh(memory)
+        await self.db.commit()
+        await self.db.refresh(memory)
         
         return memory
     
-    def get_agent_memory(self, 
+    async def get_agent_memory(self, 
                         agent_id: int,
                         session_id: str,
                         memory_type: Optional[str] = None) -> List[AgentMemory]:
         """Retrieve agent memory"""
         
-        query = self.db.query(AgentMemory).filter(
+        query = select(AgentMemory).where(
             AgentMemory.agent_id == agent_id,
             AgentMemory.session_id == session_id
         )
         
         if memory_type:
-            query = query.filter(AgentMemory.memory_type == memory_type)
+            query = query.where(AgentMemory.memory_type == memory_type)
         
         # Filter out expired memories
-        query = query.filter(
+        query = query.where(
             (AgentMemory.expires_at == None) | 
             (AgentMemory.expires_at > datetime.utcnow())
         )
         
-        return query.all()
+        return list(await self.db.scalars(query))
     
-    def cleanup_expired_memories(self) -> int:
+    async def cleanup_expired_memories(self) -> int:
         """Remove expired memories"""
         
-        deleted = self.db.query(AgentMemory).filter(
+        result = await self.db.execute(delete(AgentMemory).where(
             AgentMemory.expires_at != None,
             AgentMemory.expires_at <= datetime.utcnow()
-        ).delete()
+        ))
         
-        self.db.commit()
+        await self.db.commit()
         
-        return deleted
+        return result.rowcount
     
-    def get_context_summary(self, session_id: str) -> Dict[str, Any]:
+    async def get_context_summary(self, session_id: str) -> Dict[str, Any]:
         """Get a summary of conversation context"""
         
-        context = self.get_session(session_id)
+        context = await self.get_session(session_id)
         if not context:
             return {}
         
-        messages = self.get_conversation_history(session_id)
+        messages = await self.get_conversation_history(session_id)
         
         return {
             "session_id": session_id,
@@ -156,6 +161,6 @@ class MemoryService:
             "created_at": context.created_at.isoformat(),
             "message_count": len(messages),
             "last_activity": context.updated_at.isoformat() if context.updated_at else None,
-            "metadata": context.metadata
+            "metadata": context.meta_data
         }
 
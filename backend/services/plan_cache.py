@@ -0,0 +1,76 @@
+"""
+Plan Cache Service
+Reuses recent execution plans for repeated task descriptions, as long as the
+active agent roster has not changed
+"""
+from typing import Any, Dict, Iterable, Optional
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import re
+import time
+from config import get_settings
+
+settings = get_settings()
+
+
+def normalize_description(description: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the plan"""
+
+    text = re.sub(r"\s+", " ", description or "").strip().lower()
+    return text.rstrip(" .!?")
+
+
+def roster_fingerprint(agents: Iterable) -> str:
+    """Hash of the agents a plan may use (ids, capabilities, status)"""
+
+    roster = sorted(
+        (agent.id, sorted(agent.capabilities or []), str(getattr(agent.status, "value", agent.status)))
+        for agent in agents
+    )
+    return hashlib.sha1(json.dumps(roster).encode()).hexdigest()
+
+
+class PlanCache:
+    """In-process LRU of plans with a TTL"""
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = ttl or settings.plan_cache_ttl_seconds
+        self.max_entries = max_entries or settings.plan_cache_max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(description: str, agents: Iterable) -> str:
+        return f"{roster_fingerprint(agents)}:{normalize_description(description)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers may modify the plan they get back
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, plan: Dict[str, Any]):
+        self._entries[key] = (time.time() + self.ttl, copy.deepcopy(plan))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every plan (agents were registered, updated or deactivated)"""
+
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,273 @@
+"""
+Task Queue Service
+Durable, database-backed queue of tasks waiting for a worker, with lease-based
+claiming so a crashed worker's tasks are picked up again by another one
+"""
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.task import Task, TaskStatus
+from models.task_queue import TaskQueueItem, TaskWorker, QueueStatus
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+from config import get_settings
+
+settings = get_settings()
+
+
+class TaskQueue:
+    """
+    Database-backed task queue
+
+    Claims are compare-and-set updates on the queue row, so any number of worker
+    processes (on any number of hosts) can share one queue without a broker.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(self, task_id: int, priority: int = 0, commit: bool = True) -> TaskQueueItem:
+        """Queue a task for execution"""
+
+        item = TaskQueueItem(
+            task_id=task_id,
+            status=QueueStatus.QUEUED,
+            priority=priority,
+            max_attempts=settings.task_queue_max_attempts,
+            available_at=datetime.utcnow()
+        )
+        self.db.add(item)
+
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(item)
+
+        return item
+
+    async def claim(self, worker_id: str, lease_seconds: float = None) -> Optional[TaskQueueItem]:
+        """
+        Claim the next runnable task
+
+        Picks queued items and items whose lease expired (their worker died),
+        highest priority first. Returns None when nothing is claimable.
+        """
+
+        lease_seconds = lease_seconds or settings.task_queue_lease_seconds
+        now = datetime.utcnow()
+
+        candidates = list(await self.db.scalars(select(TaskQueueItem).where(
+            ((TaskQueueItem.status == QueueStatus.QUEUED) &
+             ((TaskQueueItem.available_at == None) | (TaskQueueItem.available_at <= now))) |
+            ((TaskQueueItem.status == QueueStatus.RUNNING) &
+             (TaskQueueItem.lease_expires_at < now))
+        ).order_by(
+            TaskQueueItem.priority.desc(),
+            TaskQueueItem.id
+        ).limit(10)))
+
+        for candidate in candidates:
+            if candidate.attempts >= candidate.max_attempts:
+                await self._give_up(candidate, "Lease expired too many times")
+                continue
+
+            # Only succeeds if no other worker changed the row since we read it
+            claimed = await self.db.execute(update(TaskQueueItem).where(
+                TaskQueueItem.id == candidate.id,
+                TaskQueueItem.status == candidate.status,
+                TaskQueueItem.attempts == candidate.attempts
+            ).values(
+                status=QueueStatus.RUNNING,
+                worker_id=worker_id,
+                attempts=candidate.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now
+            ).execution_options(synchronize_session=False))
+            await self.db.commit()
+
+            if claimed.rowcount:
+                await self.db.refresh(candidate)
+                return candidate
+
+        return None
+
+    async def heartbeat(self, item_id: int, worker_id: str, lease_seconds: float = None) -> bool:
+        """Extend a lease; False means the lease was lost to another worker"""
+
+        lease_seconds = lease_seconds or settings.task_queue_lease_seconds
+        now = datetime.utcnow()
+
+        renewed = await self.db.execute(update(TaskQueueItem).where(
+            TaskQueueItem.id == item_id,
+            TaskQueueItem.worker_id == worker_id,
+            TaskQueueItem.status == QueueStatus.RUNNING
+        ).values(
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now
+        ).execution_options(synchronize_session=False))
+        await self.db.commit()
+
+        return bool(renewed.rowcount)
+
+    async def complete(self, item_id: int, worker_id: str):
+        """Mark a claimed item as done"""
+
+        await self.db.execute(update(TaskQueueItem).where(
+            TaskQueueItem.id == item_id,
+            TaskQueueItem.worker_id == worker_id
+        ).values(
+            status=QueueStatus.COMPLETED,
+            lease_expires_at=None
+        ).execution_options(synchronize_session=False))
+        await self.db.commit()
+
+    async def cancel(self, task_id: int) -> bool:
+        """Withdraw a task that no worker has claimed yet"""
+
+        cancelled = await self.db.execute(update(TaskQueueItem).where(
+            TaskQueueItem.task_id == task_id,
+            TaskQueueItem.status == QueueStatus.QUEUED
+        ).values(status=QueueStatus.CANCELLED).execution_options(synchronize_session=False))
+        await self.db.commit()
+
+        return bool(cancelled.rowcount)
+
+    async def is_cancelled(self, task_id: int) -> bool:
+        """Whether the task row was marked cancelled (by any process)"""
+
+        status = await self.db.scalar(select(Task.status).where(Task.id == task_id))
+        return status == TaskStatus.CANCELLED
+
+    async def fail(self, item_id: int, worker_id: str, error: str):
+        """Release a claimed item after a crash, retrying with backoff if attempts remain"""
+
+        item = await self.db.scalar(select(TaskQueueItem).where(
+            TaskQueueItem.id == item_id,
+            TaskQueueItem.worker_id == worker_id
+        ))
+        if not item:
+            return
+
+        if item.attempts >= item.max_attempts:
+            await self._give_up(item, error)
+            return
+
+        item.status = QueueStatus.QUEUED
+        item.worker_id = None
+        item.lease_expires_at = None
+        item.last_error = error
+        item.available_at = datetime.utcnow() + timedelta(
+            seconds=settings.task_queue_retry_backoff_seconds * item.attempts
+        )
+        await self.db.commit()
+
+    async def _give_up(self, item: TaskQueueItem, error: str):
+        """Stop retrying an item and fail its task"""
+
+        item.status = QueueStatus.FAILED
+        item.lease_expires_at = None
+        item.last_error = error
+
+        task = await self.db.get(Task, item.task_id)
+        if task and task.status not in (TaskStatus.COMPLETED, TaskStatus.CANCELLED):
+            task.status = TaskStatus.FAILED
+            task.result = {"error": f"Gave up after {item.attempts} attempt(s): {error}"}
+
+        await self.db.commit()
+
+    async def register_worker(self, worker_id: str, hostname: str, pid: int,
+                        metadata: Dict[str, Any] = None) -> TaskWorker:
+        """Record a live worker process"""
+
+        worker = TaskWorker(
+            id=worker_id,
+            hostname=hostname,
+            pid=pid,
+            heartbeat_at=datetime.utcnow(),
+            meta_data=metadata or {}
+        )
+        await self.db.merge(worker)
+        await self.db.commit()
+
+        return worker
+
+    async def touch_worker(self, worker_id: str, metadata: Dict[str, Any] = None):
+        """Refresh a worker's liveness timestamp"""
+
+        updates = {"heartbeat_at": datetime.utcnow()}
+        if metadata is not None:
+            updates["meta_data"] = metadata
+
+        await self.db.execute(
+            update(TaskWorker).where(TaskWorker.id == worker_id).values(**updates)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def unregister_worker(self, worker_id: str):
+        """Remove a worker that shut down cleanly"""
+
+        await self.db.execute(delete(TaskWorker).where(TaskWorker.id == worker_id))
+        await self.db.commit()
+
+    async def list_workers(self, max_age_seconds: float = None) -> List[TaskWorker]:
+        """Workers that heartbeated recently"""
+
+        max_age_seconds = max_age_seconds or settings.task_queue_lease_seconds * 2
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+
+        return list(await self.db.scalars(select(TaskWorker).where(TaskWorker.heartbeat_at >= cutoff)))
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Queue depth by status and live worker count"""
+
+        counts = dict((await self.db.execute(
+            select(TaskQueueItem.status, func.count()).group_by(TaskQueueItem.status)
+        )).all())
+        by_status = {status.value: counts.get(status, 0) for status in QueueStatus}
+
+        return {
+            "by_status": by_status,
+            "workers": len(await self.list_workers())
+        }
+
+
+class RedisQueueNotifier:
+    """
+    Optional Redis wake-up channel
+
+    The database stays the source of truth; Redis only carries "new work"
+    signals so idle workers wake up immediately instead of waiting for their
+    next poll.
+    """
+
+    CHANNEL_KEY = "orchestrator:task_queue:signals"
+
+    def __init__(self, redis_url: str = None):
+        import redis.asyncio as aioredis  # Optional dependency
+
+        self.redis = aioredis.from_url(redis_url or settings.redis_url)
+
+    async def notify(self, task_id: int):
+        """Signal that a task was queued"""
+
+        await self.redis.rpush(self.CHANNEL_KEY, task_id)
+
+    async def wait(self, timeout: float) -> bool:
+        """Block until a signal arrives or the timeout elapses"""
+
+        result = await self.redis.blpop([self.CHANNEL_KEY], timeout=max(1, int(timeout)))
+        return result is not None
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+def get_queue_notifier() -> Optional[RedisQueueNotifier]:
+    """Redis notifier if enabled and importable, otherwise None (workers poll)"""
+
+    if not settings.task_queue_use_redis:
+        return None
+    try:
+        return RedisQueueNotifier()
+    except ImportError:
+        print("Warning: TASK_QUEUE_USE_REDIS is set but the redis package is not installed")
+        return None
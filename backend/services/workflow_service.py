@@ -0,0 +1,129 @@
+"""
+Workflow Service
+Named, parameterized plans saved from tasks (or written by hand) that can be
+run directly, skipping the planning LLM call
+"""
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.agent import Agent, AgentStatus
+from models.task import Task
+from models.workflow import Workflow
+from orchestrator.plan_repair import PlanRepairer
+from typing import List, Dict, Any, Optional
+import copy
+import re
+
+PARAMETER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class WorkflowService:
+    """
+    Stores workflows and turns them into concrete plans
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_workflow(self,
+                              name: str,
+                              description: str,
+                              plan: Dict[str, Any] = None,
+                              parameters: Dict[str, Any] = None,
+                              task_id: Optional[int] = None,
+                              metadata: Dict[str, Any] = None) -> Workflow:
+        """
+        Save a workflow from an explicit plan or from an existing task's plan
+
+        The plan is validated and normalized like a planner response (see
+        ``PlanRepairer``); raises ValueError if it cannot be used.
+        """
+
+        existing = await self.get_workflow(name)
+        if existing:
+            raise ValueError(f"Workflow '{name}' already exists")
+
+        if plan is None:
+            if task_id is None:
+                raise ValueError("Either a plan or a task_id is required")
+            task = await self.db.get(Task, task_id)
+            if not task or not task.plan:
+                raise ValueError(f"Task {task_id} has no plan to save")
+            plan = {key: value for key, value in task.plan.items() if key not in ("plan_cache", "routing")}
+
+        plan = await self._validated_plan(plan, description)
+
+        workflow = Workflow(
+            name=name,
+            description=description,
+            plan=plan,
+            parameters=parameters or {},
+            meta_data=metadata or {}
+        )
+
+        self.db.add(workflow)
+        await self.db.commit()
+        await self.db.refresh(workflow)
+
+        return workflow
+
+    async def _validated_plan(self, plan: Any, description: str) -> Dict[str, Any]:
+        agents = list(await self.db.scalars(select(Agent).where(Agent.status == AgentStatus.ACTIVE)))
+        plan = PlanRepairer(agents, description).repair(plan)
+        unassigned = [step["step_number"] for step in plan["steps"] if step.get("agent_id") is None]
+        if unassigned:
+            raise ValueError(f"No active agent for workflow step(s) {unassigned}")
+        return plan
+
+    async def get_workflow(self, name: str) -> Optional[Workflow]:
+        """Get a workflow by name"""
+
+        return await self.db.scalar(select(Workflow).where(Workflow.name == name))
+
+    async def list_workflows(self) -> List[Workflow]:
+        """List all workflows"""
+
+        return list(await self.db.scalars(select(Workflow).order_by(Workflow.name)))
+
+    async def delete_workflow(self, name: str) -> bool:
+        """Delete a workflow"""
+
+        result = await self.db.execute(delete(Workflow).where(Workflow.name == name))
+        await self.db.commit()
+
+        return bool(result.rowcount)
+
+    async def instantiate(self, workflow: Workflow,
+                          arguments: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Render a workflow into a task description and plan
+
+        Raises ValueError for missing parameters or agents that are no longer active.
+        """
+
+        values = {**(workflow.parameters or {}), **(arguments or {})}
+        missing = sorted(name for name, value in values.items() if value is None)
+        if missing:
+            raise ValueError(f"Missing workflow parameters: {', '.join(missing)}")
+
+        def render(text: str) -> str:
+            # Only declared parameters are replaced, other braces are left alone
+            return PARAMETER_PATTERN.sub(
+                lambda match: str(values[match.group(1)]) if match.group(1) in values else match.group(0),
+                text or ""
+            )
+
+        plan = copy.deepcopy(workflow.plan)
+        for step in plan["steps"]:
+            step["description"] = render(step.get("description"))
+        plan["workflow"] = workflow.name
+
+        agent_ids = {step.get("agent_id") for step in plan["steps"] if step.get("agent_id") is not None}
+        if agent_ids:
+            active = set(await self.db.scalars(
+                select(Agent.id).where(Agent.id.in_(agent_ids), Agent.status == AgentStatus.ACTIVE)
+            ))
+            unavailable = sorted(agent_ids - active)
+            if unavailable:
+                raise ValueError(f"Workflow uses agents that are not active: {unavailable}")
+
+        return {"description": render(workflow.description), "plan": plan}
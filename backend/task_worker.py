@@ -0,0 +1,257 @@
+"""
+Task Worker
+Runs queued tasks outside the API process. Start as many worker processes (on
+as many hosts) as needed; they coordinate through the shared task queue.
+
+    python task_worker.py --processes 4 --concurrency 8
+"""
+from typing import Optional
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+
+from database import AsyncSessionLocal, engine, Base
+import models  # noqa: F401  Register all tables
+from models.agent_config_template import AgentConfigTemplate  # noqa: F401
+from orchestrator.task_executor import TaskExecutor
+from orchestrator.task_planner import TaskPlanner
+from models.task import Task, TaskStatus
+from orchestrator.cancellation import cancellation_registry
+from orchestrator.admission import admission_controller
+from orchestrator.agent_stats import agent_stats
+from orchestrator.task_events import task_events
+from orchestrator.step_cache import get_step_cache
+from services.task_queue import TaskQueue, get_queue_notifier
+from services.http_client_manager import close_http_clients
+from services.llm_gateway import get_llm_gateway
+from concurrency import shutdown_blocking_pool
+from config import get_settings
+
+settings = get_settings()
+
+
+class TaskWorker:
+    """
+    One worker process: claims up to ``concurrency`` tasks at a time and keeps
+    their leases alive while they run
+    """
+
+    def __init__(self, concurrency: int = None, lease_seconds: float = None):
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.lease_seconds = lease_seconds or settings.task_queue_lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.notifier = get_queue_notifier()
+        self.running = set()
+        self._stopping = asyncio.Event()
+        self._work_available = asyncio.Event()
+
+    async def run(self):
+        """Claim and run tasks until stopped"""
+
+        db = AsyncSessionLocal()
+        queue = TaskQueue(db)
+        await queue.register_worker(self.worker_id, socket.gethostname(), os.getpid(),
+                              {"concurrency": self.concurrency})
+        print(f"Worker {self.worker_id} started (concurrency={self.concurrency})")
+
+        heartbeat = asyncio.create_task(self._worker_heartbeat())
+        try:
+            while not self._stopping.is_set():
+                claimed = None
+                if len(self.running) < self.concurrency:
+                    claimed = await queue.claim(self.worker_id, self.lease_seconds)
+
+                if claimed:
+                    job = asyncio.create_task(self._run_item(claimed.id, claimed.task_id))
+                    self.running.add(job)
+                    job.add_done_callback(self.running.discard)
+                    continue
+
+                await self._wait_for_work()
+        finally:
+            heartbeat.cancel()
+            if self.running:
+                await asyncio.gather(*self.running, return_exceptions=True)
+            await queue.unregister_worker(self.worker_id)
+            await db.close()
+            if self.notifier:
+                await self.notifier.close()
+            await task_events.close()
+            if get_step_cache():
+                await get_step_cache().close()
+            await close_http_clients()
+            shutdown_blocking_pool()
+            print(f"Worker {self.worker_id} stopped")
+
+    def stop(self):
+        """Stop claiming new work; running tasks are allowed to finish"""
+
+        self._stopping.set()
+        self._work_available.set()
+
+    async def _wait_for_work(self):
+        """Sleep until the poll interval passes, a slot frees up, or Redis signals work"""
+
+        self._work_available.clear()
+        waiters = [asyncio.create_task(self._work_available.wait())]
+        if self.notifier and len(self.running) < self.concurrency:
+            waiters.append(asyncio.create_task(
+                self.notifier.wait(settings.task_queue_poll_interval)
+            ))
+
+        await asyncio.wait(waiters, timeout=settings.task_queue_poll_interval,
+                           return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+
+    async def _run_item(self, item_id: int, task_id: int):
+        """Execute one claimed task with its own session, renewing its lease meanwhile"""
+
+        db = AsyncSessionLocal()
+        queue = TaskQueue(db)
+        executor = TaskExecutor(db)
+        execution = asyncio.create_task(self._plan_and_execute(db, executor, task_id))
+        lease = asyncio.create_task(self._watch_item(item_id, task_id, execution))
+
+        try:
+            await execution
+            await queue.complete(item_id, self.worker_id)
+        except asyncio.CancelledError:
+            # Lease lost: another worker owns the task now
+            print(f"Worker {self.worker_id} lost lease on task {task_id}")
+        except Exception as e:
+            await db.rollback()
+            await queue.fail(item_id, self.worker_id, str(e))
+        finally:
+            lease.cancel()
+            await executor.cleanup()
+            await db.close()
+            self._work_available.set()
+
+    @staticmethod
+    async def _plan_and_execute(db, executor: TaskExecutor, task_id: int):
+        """Run a task, planning it first if it was queued without a plan (batch submissions)"""
+
+        task = await db.get(Task, task_id)
+        if task is not None and task.status == TaskStatus.PENDING:
+            if not await TaskPlanner(db).plan_or_fail(task_id):
+                return
+        await executor.execute_task(task_id)
+
+    async def _watch_item(self, item_id: int, task_id: int, execution: asyncio.Task):
+        """
+        Heartbeat the lease (aborting the execution if it is lost) and relay
+        cancel requests made through the API in another process
+        """
+
+        db = AsyncSessionLocal()
+        queue = TaskQueue(db)
+        loop = asyncio.get_running_loop()
+        next_heartbeat = loop.time() + self.lease_seconds / 3
+        try:
+            while True:
+                await asyncio.sleep(min(settings.task_cancel_poll_interval, self.lease_seconds / 3))
+
+                try:
+                    # Until the execution has registered the request cannot be
+                    # delivered: keep polling (and heartbeating) and try again
+                    if await queue.is_cancelled(task_id) and cancellation_registry.cancel(task_id):
+                        return
+
+                    if loop.time() >= next_heartbeat:
+                        if not await queue.heartbeat(item_id, self.worker_id, self.lease_seconds):
+                            execution.cancel()
+                            return
+                        next_heartbeat = loop.time() + self.lease_seconds / 3
+                except Exception as e:
+                    # A transient database error must not stop the lease from being renewed
+                    print(f"Warning: worker {self.worker_id} could not check the lease of task {task_id}: {e}")
+                    await db.rollback()
+        finally:
+            await db.close()
+
+    async def _worker_heartbeat(self):
+        """Keep this worker visible in the worker registry"""
+
+        db = AsyncSessionLocal()
+        queue = TaskQueue(db)
+        try:
+            while True:
+                await asyncio.sleep(settings.worker_heartbeat_interval)
+                step_cache = get_step_cache()
+                try:
+                    await queue.touch_worker(self.worker_id, {
+                        "concurrency": self.concurrency,
+                        "running": len(self.running),
+                        "admission": admission_controller.snapshot(),
+                        "agent_stats": agent_stats.export(),
+                        "step_cache": step_cache.stats() if step_cache else None,
+                        "llm": get_llm_gateway().stats()
+                    })
+                except Exception as e:
+                    print(f"Warning: worker {self.worker_id} heartbeat failed: {e}")
+                    await db.rollback()
+        finally:
+            await db.close()
+
+
+def run_worker_process(concurrency: Optional[int] = None):
+    """Entry point of one worker process"""
+
+    async def main():
+        worker = TaskWorker(concurrency=concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:  # Windows
+                pass
+        await worker.run()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run orchestrator task workers")
+    parser.add_argument("--processes", type=int, default=settings.worker_processes,
+                        help="Worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency,
+                        help="Tasks each process runs at once")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    if args.processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker_process, args=(args.concurrency,), daemon=False)
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(signum, frame):
+        # SIGTERM makes each worker stop claiming and drain its running tasks
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,23 +6,23 @@ import traceback
 # Set Groq API key from environment
 # os.environ['GROQ_API_KEY'] = 'your-groq-api-key-here'
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from models.agent import Agent
 from orchestrator.task_planner import TaskPlanner
 import asyncio
 
 # Setup database
-engine = create_engine('sqlite:///./demo.db')
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SessionLocal()
+engine = create_async_engine('sqlite+aiosqlite:///./demo.db')
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 async def test_task_creation():
+    db = SessionLocal()
     try:
         print("Testing task creation...")
         
         # Check agents
-        agents = db.query(Agent).all()
+        agents = (await db.scalars(select(Agent))).all()
         print(f"Found {len(agents)} agents")
         for agent in agents:
             print(f"  - {agent.name} ({agent.agent_type})")
@@ -48,9 +48,10 @@ async def test_task_creation():
         print(f"Error message: {str(e)}")
         print("\nFull traceback:")
         traceback.print_exc()
+    finally:
+        await db.close()
+        await engine.dispose()
 
 # Run the test
 asyncio.run(test_task_creation())
 
-db.close()
-
@@ -0,0 +1,45 @@
+"""
+Test configuration
+Points the settings at a throwaway database and turns off on-disk caches
+before any backend module reads them
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="orchestrator-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("LANGGRAPH_CHECKPOINT_PATH", f"{_tmp}/checkpoints.db")
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def run_db():
+    """
+    Fresh tables, and a runner for async scenarios that use them
+
+    The async engine's connections belong to the scenario's event loop, so
+    they are disposed before it closes.
+    """
+    import models  # noqa: F401  Register all tables
+    from models.agent_config_template import AgentConfigTemplate  # noqa: F401
+    from database import Base, engine, async_engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def run(scenario):
+        async def main():
+            try:
+                return await scenario()
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+
+    return run
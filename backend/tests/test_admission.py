@@ -0,0 +1,89 @@
+"""Tests for the per-agent bulkheads"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator.admission import AdmissionController, AdmissionError, AgentBulkhead
+
+
+def test_excess_calls_wait_then_get_the_slot():
+    async def scenario():
+        bulkhead = AgentBulkhead(max_concurrency=1, max_queue=5, max_wait=1.0)
+        order = []
+
+        async def call(name, hold):
+            async with bulkhead.acquire():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(call("first", 0.05), call("second", 0))
+        assert order == ["first", "second"]
+        assert bulkhead.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        bulkhead = AgentBulkhead(max_concurrency=1, max_queue=0, max_wait=1.0)
+        async with bulkhead.acquire():
+            with pytest.raises(AdmissionError):
+                async with bulkhead.acquire():
+                    pass
+        assert bulkhead.rejected == 1
+
+    asyncio.run(scenario())
+
+
+def test_config_change_with_a_call_in_flight_keeps_capacity():
+    async def scenario():
+        controller = AdmissionController()
+        agent = SimpleNamespace(id=1, config={"max_concurrency": 1, "max_wait_seconds": 0.2})
+        release = asyncio.Event()
+
+        async def held_call():
+            async with controller.acquire(agent):
+                await release.wait()
+
+        holder = asyncio.create_task(held_call())
+        await asyncio.sleep(0)
+        agent.config = {"max_concurrency": 2, "max_wait_seconds": 0.2}
+        bulkhead = controller.get(agent)
+        assert bulkhead.in_flight == 1
+
+        release.set()
+        await holder
+        assert bulkhead.in_flight == 0
+
+        for _ in range(3):
+            async with controller.acquire(agent):
+                pass
+        assert bulkhead.rejected == 0
+
+    asyncio.run(scenario())
+
+
+def test_raising_the_limit_admits_waiting_steps():
+    async def scenario():
+        controller = AdmissionController()
+        agent = SimpleNamespace(id=1, config={"max_concurrency": 1, "max_wait_seconds": 1.0})
+        release = asyncio.Event()
+
+        async def held_call():
+            async with controller.acquire(agent):
+                await release.wait()
+
+        holder = asyncio.create_task(held_call())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(held_call())
+        await asyncio.sleep(0)
+        assert controller.get(agent).queued == 1
+
+        agent.config = {"max_concurrency": 2, "max_wait_seconds": 1.0}
+        assert controller.get(agent).in_flight == 2
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(scenario())
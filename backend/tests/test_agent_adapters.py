@@ -0,0 +1,27 @@
+"""Tests for compiled agent adapters"""
+from orchestrator.agent_adapters import CompiledAdapter
+from orchestrator.agent_stats import is_failed_result
+from orchestrator.task_executor import TaskExecutor
+
+ADAPTER = CompiledAdapter(
+    request_mapping={"method": "POST", "path": "/invocations", "body_mapping": {"input": "$.task"}},
+    response_mapping={"result_path": "$.output", "error_path": "$.error.message"}
+)
+
+
+def test_request_body_is_rendered_from_the_step_input():
+    request = ADAPTER.build_request("http://agent", {"task": "summarize"})
+    assert request["url"] == "http://agent/invocations"
+    assert request["json"] == {"input": "summarize"}
+
+
+def test_agent_reported_errors_are_not_call_failures():
+    result = ADAPTER.parse_response({"error": {"message": "model not found"}}, "Databricks")
+    assert result["status"] == "error"
+    assert is_failed_result(result)
+    assert not TaskExecutor._is_call_failure(result)
+
+
+def test_results_are_extracted():
+    result = ADAPTER.parse_response({"output": "done"}, "Databricks")
+    assert result == {"status": "success", "agent": "Databricks", "result": "done"}
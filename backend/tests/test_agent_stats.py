@@ -0,0 +1,38 @@
+"""Tests for the routing statistics"""
+from orchestrator.agent_stats import AgentStats, AgentStatsStore, is_failed_result
+
+
+def test_worker_samples_are_used_before_history():
+    worker = AgentStatsStore()
+    for _ in range(5):
+        worker.record(1, 0.2, True)
+
+    api = AgentStatsStore()
+    for _ in range(5):
+        api.history.setdefault(1, AgentStats()).record(30.0, True)
+    api._load_workers([worker.export(), None])
+
+    summary = api.summary(1)
+    assert summary["source"] == "workers"
+    assert summary["p50_ms"] == 200
+
+
+def test_samples_of_several_workers_are_combined():
+    first, second = AgentStatsStore(), AgentStatsStore()
+    for _ in range(3):
+        first.record(1, 0.1, True)
+        second.record(1, 0.3, False)
+
+    api = AgentStatsStore()
+    api._load_workers([first.export(), second.export()])
+    summary = api.summary(1)
+    assert summary["calls"] == 6
+    assert summary["error_rate"] == 0.5
+
+
+def test_agent_reported_errors_are_failures():
+    assert is_failed_result({"status": "failed", "error": "timeout"})
+    assert is_failed_result({"error": "boom"})
+    assert is_failed_result({"content": {"status": "error", "error": "429"}})
+    assert not is_failed_result({"content": {"status": "success", "response": "ok"}})
+    assert not is_failed_result(None)
@@ -0,0 +1,84 @@
+"""Tests for batch submissions going through the task queue"""
+import httpx
+from sqlalchemy import select
+
+import main
+from database import AsyncSessionLocal
+from models.task import Task, TaskStep, TaskStatus
+from models.task_queue import TaskQueueItem, QueueStatus
+from orchestrator.task_planner import TaskPlanner
+from task_worker import TaskWorker
+
+PLAN = {"steps": [{"step_number": 1, "description": "do it", "agent_id": None,
+                   "agent_name": None, "dependencies": []}]}
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.executed = []
+
+    async def execute_task(self, task_id, step_feed=None):
+        self.executed.append(task_id)
+
+
+def test_batch_tasks_are_queued_with_their_rows(run_db, monkeypatch):
+    monkeypatch.setattr(main.settings, "task_execution_mode", "queue")
+    main.app.state.queue_notifier = None
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/tasks/batch", json={
+                "user_id": "tester",
+                "session_id": "shared",
+                "tasks": [{"description": "first"}, {"description": "second"}]
+            })
+        assert response.status_code == 200
+        task_ids = response.json()["task_ids"]
+
+        async with AsyncSessionLocal() as db:
+            items = (await db.scalars(select(TaskQueueItem))).all()
+            assert sorted(item.task_id for item in items) == sorted(task_ids)
+            assert all(item.status == QueueStatus.QUEUED for item in items)
+            tasks = (await db.scalars(select(Task))).all()
+            assert all(task.status == TaskStatus.PENDING and task.plan is None for task in tasks)
+
+    run_db(scenario)
+
+
+def test_worker_plans_unplanned_tasks_before_running_them(run_db, monkeypatch):
+    async def generate_plan(self, description, allow_fast_path=True):
+        if description == "unplannable":
+            raise RuntimeError("no agents")
+        return {**PLAN, "steps": [dict(step) for step in PLAN["steps"]]}
+
+    monkeypatch.setattr(TaskPlanner, "generate_plan", generate_plan)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            pending = Task(session_id="s", description="plannable", status=TaskStatus.PENDING)
+            broken = Task(session_id="s", description="unplannable", status=TaskStatus.PENDING)
+            db.add_all([pending, broken])
+            await db.commit()
+            pending_id, broken_id = pending.id, broken.id
+
+            executor = RecordingExecutor()
+            await TaskWorker._plan_and_execute(db, executor, pending_id)
+            await TaskWorker._plan_and_execute(db, executor, broken_id)
+            assert executor.executed == [pending_id]
+
+            pending = await db.get(Task, pending_id)
+            broken = await db.get(Task, broken_id)
+            assert pending.status == TaskStatus.PLANNING
+            steps = (await db.scalars(select(TaskStep).where(TaskStep.task_id == pending_id))).all()
+            assert [step.description for step in steps] == ["do it"]
+            assert broken.status == TaskStatus.FAILED
+            assert "no agents" in broken.result["error"]
+
+            # A re-claimed task that was already planned is not planned again
+            await TaskWorker._plan_and_execute(db, executor, pending_id)
+            assert executor.executed == [pending_id, pending_id]
+            steps = (await db.scalars(select(TaskStep).where(TaskStep.task_id == pending_id))).all()
+            assert len(steps) == 1
+
+    run_db(scenario)
@@ -0,0 +1,55 @@
+"""
+HTTP Client Manager Tests
+Pool bounds and cleanup of dropped clients
+"""
+import asyncio
+from services.http_client_manager import HTTPClientManager
+
+
+def test_least_recently_used_client_is_closed_when_pool_is_full():
+    async def scenario():
+        manager = HTTPClientManager(max_origins=2)
+        first = manager.get_client("http://a.example/run")
+        second = manager.get_client("http://b.example/run")
+        assert manager.get_client("http://a.example/other") is first
+
+        manager.get_client("http://c.example/run")
+        await asyncio.sleep(0)
+        states = (first.is_closed, second.is_closed, list(manager._clients))
+        await manager.close()
+        return states
+
+    first_closed, second_closed, origins = asyncio.run(scenario())
+    assert second_closed and not first_closed
+    assert origins == ["http://a.example", "http://c.example"]
+
+
+def test_evicted_client_is_closed_before_close_returns():
+    async def scenario():
+        manager = HTTPClientManager(max_origins=1)
+        evicted = manager.get_client("http://a.example")
+        kept = manager.get_client("http://b.example")
+        assert list(manager._clients) == ["http://b.example"]
+        await manager.close()
+        return evicted, kept
+
+    evicted, kept = asyncio.run(scenario())
+    assert evicted.is_closed and kept.is_closed
+
+
+def test_clients_from_a_previous_event_loop_are_closed():
+    manager = HTTPClientManager()
+
+    async def open_client():
+        return manager.get_client("http://a.example")
+
+    async def switch_loop():
+        client = manager.get_client("http://a.example")
+        await asyncio.sleep(0)
+        await manager.close()
+        return client
+
+    stale = asyncio.run(open_client())
+    fresh = asyncio.run(switch_loop())
+    assert fresh is not stale
+    assert stale.is_closed
@@ -0,0 +1,92 @@
+"""Tests for the LLM gateway retries and response cache"""
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from services import llm_gateway
+from services.llm_gateway import LLMGateway, LLMResponseCache
+
+
+class FakeClient:
+    """Chat model stand-in failing with the given errors before answering"""
+
+    def __init__(self, errors=(), content="answer"):
+        self.errors = list(errors)
+        self.content = content
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return AIMessage(content=self.content)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def gateway(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_gateway.settings, "llm_retry_backoff_seconds", 0.0)
+    monkeypatch.setattr(llm_gateway.settings, "llm_max_retries", 2)
+    gateway = LLMGateway()
+    gateway.cache = LLMResponseCache(str(tmp_path / "cache" / "llm.db"), ttl=60)
+    return gateway
+
+
+def run(gateway, client, **kwargs):
+    gateway.client = lambda model, temperature: client
+    return asyncio.run(gateway.ainvoke([HumanMessage(content="plan")], **kwargs))
+
+
+@pytest.mark.parametrize("error", [
+    StatusError(503),
+    StatusError(429),
+    httpx.ConnectError("refused"),
+    httpx.ReadTimeout("slow"),
+    asyncio.TimeoutError()
+])
+def test_transient_errors_are_retried(gateway, error):
+    client = FakeClient(errors=[error])
+    assert run(gateway, client).content == "answer"
+    assert client.calls == 2
+
+
+def test_client_errors_are_not_retried(gateway):
+    client = FakeClient(errors=[StatusError(400)])
+    with pytest.raises(StatusError):
+        run(gateway, client)
+    assert client.calls == 1
+
+
+def test_retries_are_bounded(gateway):
+    client = FakeClient(errors=[StatusError(500)] * 5)
+    with pytest.raises(StatusError):
+        run(gateway, client)
+    assert client.calls == 3
+
+
+def test_rejected_responses_are_not_cached(gateway):
+    client = FakeClient(content="not a plan")
+    usable = lambda content: content.startswith("{")
+    run(gateway, client, validate=usable)
+    run(gateway, client, validate=usable)
+    assert client.calls == 2
+
+    client.content = "{}"
+    run(gateway, client, validate=usable)
+    assert run(gateway, client, validate=usable).response_metadata.get("cached")
+    assert client.calls == 3
+
+
+def test_cached_response_failing_validation_is_dropped(gateway):
+    client = FakeClient(content="stale")
+    run(gateway, client)
+    response = run(gateway, client, validate=lambda content: content != "stale")
+    assert not response.response_metadata.get("cached")
+    assert client.calls == 2
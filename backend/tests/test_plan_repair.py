@@ -0,0 +1,65 @@
+"""Tests for plan parsing, repair and the streaming step parser"""
+import json
+
+from models.agent import Agent, AgentType
+from orchestrator.plan_repair import PlanRepairer, parse_plan
+from orchestrator.plan_stream import StreamingStepParser
+
+AGENTS = [
+    Agent(id=1, name="Researcher", description="Finds sources", agent_type=AgentType.A2A_SERVER,
+          capabilities=["research"], config={}),
+    Agent(id=2, name="Writer", description="Writes reports", agent_type=AgentType.API,
+          capabilities=["writing"], config={}),
+]
+
+
+def test_plan_is_extracted_from_surrounding_prose():
+    text = 'Here is the plan:\n```json\n{"steps": [{"step_number": 1, "description": "find", "agent_id": 1}]}\n```'
+    plan, error = parse_plan(text, AGENTS, "task")
+    assert error is None
+    assert plan["steps"][0]["agent_name"] == "Researcher"
+    assert plan["complexity"] == "medium" and plan["estimated_duration"] == "unknown"
+
+
+def test_unusable_output_is_reported():
+    assert parse_plan("no plan here", AGENTS)[0] is None
+    assert parse_plan('{"steps": [{"agent_id": 1}]}', AGENTS) == (None, "the plan has no usable steps")
+
+
+def test_steps_are_renumbered_and_agents_matched_by_name():
+    repairer = PlanRepairer(AGENTS, "report")
+    plan = repairer.repair([
+        {"step_number": "a", "description": "find", "agent_name": "researcher"},
+        {"step_number": "a", "description": "write", "agent_id": "Writer", "dependencies": [1]},
+    ])
+    assert [(s["step_number"], s["agent_id"], s["dependencies"]) for s in plan["steps"]] == [
+        (1, 1, []), (2, 2, [1])
+    ]
+    assert "renumbered steps" in plan["repairs"]
+    assert "wrapped a bare list of steps" in plan["repairs"]
+
+
+def test_dangling_dependencies_and_cycles_are_repaired():
+    plan = PlanRepairer(AGENTS).repair({"steps": [
+        {"step_number": 1, "description": "a", "agent_id": 1, "dependencies": [2, 7]},
+        {"step_number": 2, "description": "b", "agent_id": 2, "dependencies": [1]},
+    ]})
+    assert [s["dependencies"] for s in plan["steps"]] == [[], [1]]
+    assert "removed forward dependencies to break a cycle" in plan["repairs"]
+
+
+def test_streaming_parser_yields_steps_as_they_complete():
+    steps = [
+        {"step_number": 1, "description": 'quote " and brace }', "dependencies": []},
+        {"step_number": 2, "description": "nested", "input": {"list": [1, {"x": "]"}]}},
+    ]
+    text = json.dumps({"complexity": "low", "steps": steps, "estimated_duration": "about an hour"})
+    parser = StreamingStepParser()
+    emitted = []
+    for index in range(0, len(text), 7):
+        emitted.append(parser.feed(text[index:index + 7]))
+
+    assert [step for chunk in emitted for step in chunk] == steps
+    assert parser.finished and parser.text == text
+    # Each step comes out with the chunk that closed it, not at the end
+    assert sum(1 for chunk in emitted if chunk) == 2 and emitted[-1] == []
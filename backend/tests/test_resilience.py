@@ -0,0 +1,65 @@
+"""Tests for hedged calls"""
+import asyncio
+
+import pytest
+
+from orchestrator.resilience import hedged
+from orchestrator.task_executor import TaskExecutor
+
+is_failure = lambda result: result.get("status") == "failed"
+
+
+def test_fast_call_is_not_hedged():
+    attempts = []
+
+    async def call(attempt):
+        attempts.append(attempt)
+        return {"ok": attempt}
+
+    assert asyncio.run(hedged(call, 0.05, is_failure)) == {"ok": 0}
+    assert attempts == [0]
+
+
+def test_slow_call_is_hedged_and_the_first_success_wins():
+    async def call(attempt):
+        await asyncio.sleep(0.2 if attempt == 0 else 0.01)
+        return {"ok": attempt}
+
+    assert asyncio.run(hedged(call, 0.02, is_failure)) == {"ok": 1}
+
+
+def test_exception_does_not_hide_a_success_finished_at_the_same_time():
+    async def call(attempt):
+        await asyncio.sleep(0.1 if attempt == 0 else 0.05)
+        if attempt == 0:
+            raise RuntimeError("boom")
+        return {"ok": attempt}
+
+    assert asyncio.run(hedged(call, 0.05, is_failure)) == {"ok": 1}
+
+
+def test_raises_only_when_every_attempt_failed():
+    async def call(attempt):
+        await asyncio.sleep(0.05)
+        raise RuntimeError(f"attempt {attempt}")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedged(call, 0.01, is_failure))
+
+
+def test_failure_result_preferred_over_exception():
+    async def call(attempt):
+        await asyncio.sleep(0.05)
+        if attempt == 0:
+            raise RuntimeError("boom")
+        return {"status": "failed"}
+
+    assert asyncio.run(hedged(call, 0.01, is_failure)) == {"status": "failed"}
+
+
+def test_hedge_attempt_gets_its_own_run_id():
+    input_data = {"message": "m", "run_id": "task-1-step-2"}
+    assert TaskExecutor._hedge_input(input_data, 0) is input_data
+    assert TaskExecutor._hedge_input(input_data, 1)["run_id"] == "task-1-step-2-hedge-1"
+    assert input_data["run_id"] == "task-1-step-2"
+    assert TaskExecutor._hedge_input({"message": "m"}, 1) == {"message": "m"}
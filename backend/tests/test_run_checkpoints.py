@@ -0,0 +1,37 @@
+"""Tests for the LangGraph run checkpoint store"""
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.run_checkpoints import RunCheckpointStore
+
+
+def test_checkpoint_resumes_only_the_same_run(tmp_path):
+    store = RunCheckpointStore(str(tmp_path / "nested" / "checkpoints.db"), ttl=60)
+    state = {"messages": [HumanMessage(content="hi"), AIMessage(content="hello")], "next_node": "tools"}
+
+    async def scenario():
+        await store.save("run-1", "standard", "hi", state)
+        return (
+            await store.load("run-1", "standard", "hi"),
+            await store.load("run-1", "fast", "hi"),
+            await store.load("run-1", "standard", "other message"),
+            await store.load("run-2", "standard", "hi"),
+        )
+
+    resumed, other_profile, other_message, unknown = asyncio.run(scenario())
+    assert resumed["next_node"] == "tools"
+    assert [type(m) for m in resumed["messages"]] == [HumanMessage, AIMessage]
+    assert resumed["messages"][1].content == "hello"
+    assert other_profile is other_message is unknown is None
+    assert store.resumed == 1
+
+
+def test_expired_checkpoints_are_not_resumed(tmp_path):
+    store = RunCheckpointStore(str(tmp_path / "checkpoints.db"), ttl=-1)
+
+    async def scenario():
+        await store.save("run-1", "standard", "hi", {"messages": []})
+        return await store.load("run-1", "standard", "hi")
+
+    assert asyncio.run(scenario()) is None
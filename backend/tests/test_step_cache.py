@@ -0,0 +1,88 @@
+"""Tests for the step result cache"""
+import asyncio
+
+import pytest
+
+from models.agent import Agent, AgentType
+from models.task import TaskStep
+from orchestrator import task_executor
+from orchestrator.step_cache import MemoryStepCache, StepCache
+from orchestrator.task_executor import TaskExecutor
+
+
+def make_agent(agent_id, name):
+    return Agent(
+        id=agent_id, name=name, endpoint=f"http://{name}.example",
+        agent_type=AgentType.API, capabilities=["search"], config={"cacheable": True}
+    )
+
+
+def test_backends_must_implement_get_and_set():
+    class Incomplete(StepCache):
+        async def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired_entries():
+    async def scenario():
+        cache = MemoryStepCache(max_entries=2)
+        await cache.set("a", {"v": 1}, ttl=60)
+        await cache.set("b", {"v": 2}, ttl=60)
+        await cache.get("a")
+        await cache.set("c", {"v": 3}, ttl=-1)
+        return [await cache.get(key) for key in ("a", "b", "c")], cache.stats()
+
+    values, stats = asyncio.run(scenario())
+    assert values == [{"v": 1}, None, None]
+    assert stats["evictions"] == 1
+
+
+def test_key_changes_with_agent_config():
+    agent = make_agent(1, "primary")
+    key = StepCache.make_key(agent, "find", {})
+    agent.config = {"cacheable": True, "model": "other"}
+    assert StepCache.make_key(agent, "find", {}) != key
+
+
+def run_step(monkeypatch, fallback=None):
+    cache = MemoryStepCache(max_entries=10)
+    monkeypatch.setattr(task_executor, "get_step_cache", lambda: cache)
+    planned = make_agent(1, "primary")
+    executor = TaskExecutor(db=None)
+    executor._agents[planned.id] = planned
+    calls = []
+
+    async def select(agent):
+        return fallback or agent
+
+    async def call(agent, input_data, step_number=None):
+        calls.append(agent.name)
+        return {"status": "success", "answer": agent.name}
+
+    monkeypatch.setattr(executor, "_select_available_agent", select)
+    monkeypatch.setattr(executor, "_call_agent", call)
+    step = TaskStep(task_id=1, step_number=1, description="find", agent_id=planned.id, input_data={})
+
+    async def scenario():
+        first = await executor.execute_step(step, {})
+        second = await executor.execute_step(step, {})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    return first, second, calls
+
+
+def test_result_is_served_from_cache_on_repeat(monkeypatch):
+    first, second, calls = run_step(monkeypatch)
+    assert calls == ["primary"]
+    assert second == {**first, "cached": True}
+
+
+def test_rerouted_result_is_not_cached_for_the_planned_agent(monkeypatch):
+    first, second, calls = run_step(monkeypatch, fallback=make_agent(2, "fallback"))
+    assert calls == ["fallback", "fallback"]
+    assert first["rerouted_from"] == "primary"
+    assert "cached" not in second
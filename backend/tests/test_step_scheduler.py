@@ -0,0 +1,38 @@
+"""Tests for the step dependency graph"""
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator.step_scheduler import DependencyCycleError, StepGraph
+
+
+def step(number, *dependencies):
+    return SimpleNamespace(step_number=number, input_data={"dependencies": list(dependencies)})
+
+
+def test_dependency_references_are_normalized():
+    assert StepGraph.normalize_dependencies(None) == []
+    assert StepGraph.normalize_dependencies("step_2") == [2]
+    assert StepGraph.normalize_dependencies([1, "3", "step 4", {"step_number": "5"}, True, "none"]) == [1, 3, 4, 5]
+
+
+def test_order_follows_dependencies_with_ties_by_step_number():
+    graph = StepGraph([step(4, 1), step(3), step(2, 3, 4), step(1)])
+    assert graph.order == [1, 3, 4, 2]
+    assert graph.dependencies[2] == {3, 4}
+
+
+def test_unknown_and_self_dependencies_are_dropped():
+    graph = StepGraph([step(1, 1, 9), step(2, "step_1")])
+    assert graph.dependencies == {1: set(), 2: {1}}
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(DependencyCycleError, match=r"\[2, 3\]"):
+        StepGraph([step(1), step(2, 3), step(3, 2)])
+
+
+def test_descendants_are_transitive():
+    graph = StepGraph([step(1), step(2, 1), step(3, 2), step(4), step(5, 1, 4)])
+    assert graph.descendants(1) == {2, 3, 5}
+    assert graph.descendants(3) == set()
@@ -0,0 +1,154 @@
+"""Tests for streamed planning and its hand-off to the executor"""
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
+from models.agent import Agent, AgentType
+from models.task import Task, TaskStep, TaskStatus
+from orchestrator.task_executor import TaskExecutor
+from orchestrator.task_planner import TaskPlanner
+
+
+class FakeLLM:
+    """Streams the given chunks, then optionally hangs until cancelled"""
+
+    def __init__(self, chunks, hang=False):
+        self.chunks = chunks
+        self.hang = hang
+
+    async def astream(self, messages, validate=None):
+        for chunk in self.chunks:
+            yield chunk
+            await asyncio.sleep(0)
+        if self.hang:
+            await asyncio.Event().wait()
+
+
+async def add_agent(db) -> Agent:
+    agent = Agent(name="Writer", description="Writes things", agent_type=AgentType.A2A_SERVER,
+                  endpoint="http://writer", capabilities=["writing"], config={})
+    db.add(agent)
+    await db.commit()
+    return agent
+
+
+async def planning_task(planner: TaskPlanner, description: str) -> Task:
+    return await planner.create_planning_task(description, "session", {"fast_path": False})
+
+
+def step(number, description, dependencies=()):
+    return {"step_number": number, "description": description, "agent_name": "Writer",
+            "dependencies": list(dependencies)}
+
+
+def test_cancelled_planning_ends_the_feed_and_the_execution(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await add_agent(db)
+            planner = TaskPlanner(db)
+            task = await planning_task(planner, "cancelled planning")
+            first = json.dumps(step(1, "draft"))
+            planner.llm = FakeLLM(['{"steps": [', first + ","], hang=True)
+
+            feed = asyncio.Queue()
+            planning = asyncio.create_task(planner.stream_plan(task, feed))
+            first_id = await asyncio.wait_for(feed.get(), timeout=5)
+            planning.cancel()
+            await asyncio.gather(planning, return_exceptions=True)
+
+        # Replay what the executor would have seen on the feed
+        replay = asyncio.Queue()
+        replay.put_nowait(first_id)
+        while not feed.empty():
+            replay.put_nowait(feed.get_nowait())
+
+        async with AsyncSessionLocal() as db:
+            executor = TaskExecutor(db)
+
+            async def never_finishes(step, context, **kwargs):
+                await asyncio.Event().wait()
+            executor.execute_step = never_finishes
+
+            result = await asyncio.wait_for(executor.execute_task(task.id, step_feed=replay), timeout=5)
+            assert result["status"] == "cancelled"
+            task = await db.get(Task, task.id)
+            assert task.status == TaskStatus.CANCELLED
+            steps = (await db.scalars(select(TaskStep).where(TaskStep.task_id == task.id))).all()
+            assert [s.status for s in steps] == [TaskStatus.CANCELLED]
+
+    run_db(scenario)
+
+
+def test_streamed_steps_with_odd_numbers_are_kept(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await add_agent(db)
+            planner = TaskPlanner(db)
+            task = await planning_task(planner, "odd step numbers")
+            plan = {"steps": [
+                step("1", "research"),
+                {"description": "outline", "agent_name": "Writer", "dependencies": [1]},
+                step("step_3", "write", ["step_1"]),
+                step(1, "duplicate number")
+            ]}
+            planner.llm = FakeLLM([json.dumps(plan)])
+
+            feed = asyncio.Queue()
+            task = await planner.stream_plan(task, feed)
+
+            steps = (await db.scalars(
+                select(TaskStep).where(TaskStep.task_id == task.id).order_by(TaskStep.step_number)
+            )).all()
+            assert [(s.step_number, s.description) for s in steps] == [
+                (1, "research"), (3, "write"), (4, "outline"), (5, "duplicate number")
+            ]
+            assert steps[1].input_data["dependencies"] == [1]
+            assert len(task.plan["steps"]) == 4
+            assert feed.qsize() == 5 and list(feed._queue)[-1] is None
+
+    run_db(scenario)
+
+
+def test_steps_planned_after_a_fail_fast_abort_are_cancelled(run_db):
+    async def scenario():
+        step_failed = asyncio.Event()
+
+        class GatedLLM(FakeLLM):
+            async def astream(self, messages, validate=None):
+                yield '{"steps": [' + json.dumps(step(1, "draft")) + ","
+                await step_failed.wait()
+                yield json.dumps(step(2, "review", [1])) + "]}"
+
+        async with AsyncSessionLocal() as db:
+            await add_agent(db)
+            planner = TaskPlanner(db)
+            task = await planning_task(planner, "fail fast while planning")
+            task_id = task.id
+        planner.llm = GatedLLM([])
+
+        async def failing_step(step, context, **kwargs):
+            step_failed.set()
+            raise RuntimeError("agent down")
+
+        feed = asyncio.Queue()
+        async with AsyncSessionLocal() as plan_db, AsyncSessionLocal() as exec_db:
+            planner.db = plan_db
+            planning = asyncio.create_task(planner.stream_plan(await plan_db.get(Task, task_id), feed))
+            executor = TaskExecutor(exec_db)
+            executor.execute_step = failing_step
+            result = await asyncio.wait_for(executor.execute_task(task_id, step_feed=feed), timeout=5)
+            await planning
+
+        assert result["error"].startswith("Failed at step 1")
+        async with AsyncSessionLocal() as db:
+            assert (await db.get(Task, task_id)).status == TaskStatus.FAILED
+            steps = (await db.scalars(
+                select(TaskStep).where(TaskStep.task_id == task_id).order_by(TaskStep.step_number)
+            )).all()
+            assert [(s.step_number, s.status) for s in steps] == [
+                (1, TaskStatus.FAILED), (2, TaskStatus.CANCELLED)
+            ]
+
+    run_db(scenario)
@@ -0,0 +1,94 @@
+"""Tests for claiming and leasing queued tasks"""
+from datetime import datetime, timedelta
+
+from database import AsyncSessionLocal
+from models.task import Task, TaskStatus
+from models.task_queue import TaskQueueItem, QueueStatus
+from services.task_queue import TaskQueue
+
+
+async def queued_tasks(db, *priorities):
+    queue = TaskQueue(db)
+    item_ids = []
+    for priority in priorities:
+        task = Task(session_id="s", description=f"priority {priority}", status=TaskStatus.PENDING)
+        db.add(task)
+        await db.flush()
+        item_ids.append((await queue.enqueue(task.id, priority=priority)).id)
+    return queue, item_ids
+
+
+def test_claims_go_by_priority_and_are_exclusive(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            queue, (low, high) = await queued_tasks(db, 0, 5)
+            first = await queue.claim("worker-a")
+            second = await queue.claim("worker-b")
+            assert (first.id, first.worker_id, first.attempts) == (high, "worker-a", 1)
+            assert (second.id, second.worker_id) == (low, "worker-b")
+            assert await queue.claim("worker-c") is None
+
+    run_db(scenario)
+
+
+def test_expired_lease_is_reclaimed_and_the_old_worker_loses_it(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            queue, (item_id,) = await queued_tasks(db, 0)
+            await queue.claim("worker-a")
+            assert await queue.heartbeat(item_id, "worker-a")
+
+            item = await db.get(TaskQueueItem, item_id)
+            item.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+
+            reclaimed = await queue.claim("worker-b")
+            assert (reclaimed.id, reclaimed.worker_id, reclaimed.attempts) == (item_id, "worker-b", 2)
+            assert not await queue.heartbeat(item_id, "worker-a")
+            assert await queue.heartbeat(item_id, "worker-b")
+
+    run_db(scenario)
+
+
+def test_failed_items_retry_with_backoff_then_give_up(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            queue, (item_id,) = await queued_tasks(db, 0)
+            item = await db.get(TaskQueueItem, item_id)
+            item.max_attempts = 2
+            await db.commit()
+
+            await queue.claim("worker-a")
+            await queue.fail(item_id, "worker-a", "crashed")
+            item = await db.get(TaskQueueItem, item_id)
+            await db.refresh(item)
+            assert item.status == QueueStatus.QUEUED and item.available_at > datetime.utcnow()
+            assert await queue.claim("worker-a") is None  # Still backing off
+
+            item.available_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+            await queue.claim("worker-a")
+            await queue.fail(item_id, "worker-a", "crashed again")
+
+            item = await db.get(TaskQueueItem, item_id)
+            await db.refresh(item)
+            task = await db.get(Task, item.task_id)
+            await db.refresh(task)
+            assert item.status == QueueStatus.FAILED
+            assert task.status == TaskStatus.FAILED
+            assert "crashed again" in task.result["error"]
+
+    run_db(scenario)
+
+
+def test_only_unclaimed_items_can_be_withdrawn(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            queue, (claimed_id, queued_id) = await queued_tasks(db, 5, 0)
+            claimed = await queue.claim("worker-a")
+            queued = await db.get(TaskQueueItem, queued_id)
+            assert not await queue.cancel(claimed.task_id)
+            assert await queue.cancel(queued.task_id)
+            assert await queue.claim("worker-b") is None
+
+    run_db(scenario)
@@ -0,0 +1,100 @@
+"""Tests for the worker's lease watcher"""
+import asyncio
+
+import pytest
+
+import task_worker
+from task_worker import TaskWorker
+
+
+class FakeSession:
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeQueue:
+    """Scripted queue: cancel flag, and errors raised by the next calls"""
+
+    cancelled = False
+    errors = []
+    heartbeats = 0
+
+    def __init__(self, db):
+        pass
+
+    async def is_cancelled(self, task_id):
+        if FakeQueue.errors:
+            raise FakeQueue.errors.pop(0)
+        return FakeQueue.cancelled
+
+    async def heartbeat(self, item_id, worker_id, lease_seconds=None):
+        FakeQueue.heartbeats += 1
+        return True
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(task_worker, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(task_worker, "TaskQueue", FakeQueue)
+    monkeypatch.setattr(task_worker.settings, "task_cancel_poll_interval", 0.01)
+    FakeQueue.cancelled = False
+    FakeQueue.errors = []
+    FakeQueue.heartbeats = 0
+    worker = TaskWorker(concurrency=1, lease_seconds=0.06)
+    return worker
+
+
+def test_cancel_before_the_execution_registered_is_retried(worker, monkeypatch):
+    attempts = []
+
+    def cancel(task_id):
+        attempts.append(task_id)
+        # Not registered yet on the first tries
+        return len(attempts) >= 3
+
+    monkeypatch.setattr(task_worker.cancellation_registry, "cancel", cancel)
+    FakeQueue.cancelled = True
+
+    async def scenario():
+        execution = asyncio.create_task(asyncio.sleep(10))
+        await asyncio.wait_for(worker._watch_item(1, 7, execution), timeout=2)
+        assert not execution.cancelled()
+        execution.cancel()
+
+    asyncio.run(scenario())
+    assert attempts == [7, 7, 7]
+
+
+def test_watcher_keeps_heartbeating_while_a_cancel_cannot_be_delivered(worker, monkeypatch):
+    monkeypatch.setattr(task_worker.cancellation_registry, "cancel", lambda task_id: False)
+    FakeQueue.cancelled = True
+
+    async def scenario():
+        execution = asyncio.create_task(asyncio.sleep(10))
+        watcher = asyncio.create_task(worker._watch_item(1, 7, execution))
+        await asyncio.sleep(0.2)
+        assert not watcher.done()
+        watcher.cancel()
+        execution.cancel()
+
+    asyncio.run(scenario())
+    assert FakeQueue.heartbeats >= 2
+
+
+def test_watcher_survives_database_errors(worker):
+    FakeQueue.errors = [RuntimeError("database is locked")] * 3
+
+    async def scenario():
+        execution = asyncio.create_task(asyncio.sleep(10))
+        watcher = asyncio.create_task(worker._watch_item(1, 7, execution))
+        await asyncio.sleep(0.2)
+        assert not watcher.done()
+        watcher.cancel()
+        execution.cancel()
+
+    asyncio.run(scenario())
+    assert FakeQueue.errors == []
+    assert FakeQueue.heartbeats >= 1
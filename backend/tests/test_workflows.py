@@ -0,0 +1,78 @@
+"""Tests for saved workflows"""
+import httpx
+from sqlalchemy import select, func
+
+import main
+from database import AsyncSessionLocal
+from models.agent import Agent, AgentType
+from models.task import Task
+from models.workflow import Workflow
+
+
+async def add_agent(db) -> int:
+    agent = Agent(name="Writer", description="Writes reports", agent_type=AgentType.A2A_SERVER,
+                  endpoint="http://writer", capabilities=["writing"], config={})
+    db.add(agent)
+    await db.commit()
+    return agent.id
+
+
+async def post(path, body):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(path, json=body)
+
+
+def test_malformed_plans_are_rejected_at_creation(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await add_agent(db)
+
+        for plan in ({"steps": "write it"}, {"steps": [{"agent_name": "Writer"}]}, {"stages": ["write it"]}):
+            response = await post("/api/workflows", {"name": "bad", "description": "d", "plan": plan})
+            assert response.status_code == 400, plan
+
+    run_db(scenario)
+
+
+def test_explicit_plans_are_normalized(run_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            agent_id = await add_agent(db)
+
+        response = await post("/api/workflows", {
+            "name": "report",
+            "description": "Report on {region}",
+            "parameters": {"region": None},
+            "plan": {"steps": [
+                {"description": "Write the {region} report", "agent_name": "writer", "dependencies": ["step_9"]}
+            ]}
+        })
+        assert response.status_code == 200
+        step = response.json()["plan"]["steps"][0]
+        assert step["step_number"] == 1
+        assert step["agent_id"] == agent_id
+        assert step["dependencies"] == []
+
+    run_db(scenario)
+
+
+def test_running_a_malformed_stored_workflow_is_a_client_error(run_db, monkeypatch):
+    monkeypatch.setattr(main.settings, "task_execution_mode", "queue")
+    main.app.state.queue_notifier = None
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            agent_id = await add_agent(db)
+            # Saved before plans were validated
+            db.add(Workflow(name="legacy", description="d", parameters={},
+                            plan={"steps": [{"agent_id": agent_id, "description": "no number"}]}))
+            await db.commit()
+
+        response = await post("/api/workflows/legacy/run", {"user_id": "tester", "session_id": "s"})
+        assert response.status_code == 400
+
+        async with AsyncSessionLocal() as db:
+            assert await db.scalar(select(func.count(Task.id))) == 0
+
+    run_db(scenario)
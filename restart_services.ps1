@@ -22,6 +22,14 @@ foreach ($port in $ports) {
     }
 }
 
+# Stop task workers (no port to look up)
+Get-CimInstance Win32_Process -Filter "Name = 'python.exe'" -ErrorAction SilentlyContinue |
+    Where-Object { $_.CommandLine -like "*task_worker.py*" } |
+    ForEach-Object {
+        Write-Host "  Stopping task worker (PID: $($_.ProcessId))" -ForegroundColor Gray
+        Stop-Process -Id $_.ProcessId -Force -ErrorAction SilentlyContinue
+    }
+
 Start-Sleep -Seconds 3
 
 # Start all services
@@ -59,6 +67,16 @@ Start-Process powershell -ArgumentList `
     "cd '$backendPath'; .\venv\Scripts\python.exe api_agent_server.py" `
     -WindowStyle Minimized
 
+Start-Sleep -Seconds 3
+
+# Start Task Workers (run queued tasks)
+Write-Host "4. Starting Task Workers..." -ForegroundColor Cyan
+Start-Process powershell -ArgumentList `
+    "-NoExit", `
+    "-Command", `
+    "cd '$backendPath'; .\venv\Scripts\python.exe task_worker.py" `
+    -WindowStyle Minimized
+
 Start-Sleep -Seconds 5
 
 # Verify services
@@ -31,6 +31,10 @@ Start-Sleep -Seconds 2
 
 Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd C:\Users\shnarang\multi-agent-orchestrator\backend; Write-Host '⚙️ Starting API Agent (Port 8002)...' -ForegroundColor Magenta; python api_agent_server.py"
 
+Start-Sleep -Seconds 2
+
+Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd C:\Users\shnarang\multi-agent-orchestrator\backend; Write-Host '⚙️ Starting Task Workers...' -ForegroundColor Magenta; python task_worker.py"
+
 Start-Sleep -Seconds 5
 
 # Start Frontend
@@ -45,6 +49,7 @@ Write-Host "   Frontend:              http://localhost:3000" -ForegroundColor Wh
 Write-Host "   Main Orchestrator:     http://localhost:8000" -ForegroundColor White
 Write-Host "   A2A Server:            http://localhost:8001" -ForegroundColor White
 Write-Host "   API Agent:             http://localhost:8002" -ForegroundColor White
+Write-Host "   Task Queue Stats:      http://localhost:8000/api/queue/stats" -ForegroundColor White
 Write-Host "   CrewAI Agent:          http://localhost:8003" -ForegroundColor White
 Write-Host "   Databricks Agent:      http://localhost:8004" -ForegroundColor White
 Write-Host "   OpenAI Agent:          http://localhost:8005" -ForegroundColor White